@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/3.1/ref/settings/
 
 from pathlib import Path
 
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -38,15 +40,17 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
-    'core',
-    'user',
-    'recipe',
+    'core.apps.CoreConfig',
+    'user.apps.UserConfig',
+    'recipe.apps.RecipeConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -86,9 +90,87 @@ DATABASES = {
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
     }
 }
 
+# Read replicas, given as comma separated hosts in DB_REPLICA_HOSTS, get
+# the aliases replica1, replica2... Safe requests of the API views read
+# from a healthy replica, except for users who wrote in the last
+# REPLICA_STICKY_SECONDS. Replicas lagging more than REPLICA_MAX_LAG
+# seconds or failing are skipped for REPLICA_RETRY_SECONDS.
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))
+):
+    alias = f'replica{index + 1}'
+    DATABASES[alias] = dict(
+        DATABASES['default'],
+        HOST=host.strip(),
+        TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+REPLICA_MAX_LAG = 5
+REPLICA_CHECK_INTERVAL = 5
+REPLICA_RETRY_SECONDS = 30
+
+# Connections are kept for CONN_MAX_AGE seconds instead of one request.
+# One idle for longer than DB_HEALTH_CHECK_INTERVAL seconds is pinged
+# before a request uses it, so dead connections are replaced.
+DB_HEALTH_CHECK_INTERVAL = int(os.environ.get('DB_HEALTH_CHECK_INTERVAL', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+# Recipe API responses default to a size capped, LRU local memory cache.
+# Multi-node deployments point RECIPE_CACHE_BACKEND and
+# RECIPE_CACHE_LOCATION at a shared backend such as memcached.
+# Authenticated tokens are cached the same way for TOKEN_CACHE_TIMEOUT
+# seconds, configured through TOKEN_CACHE_BACKEND/TOKEN_CACHE_LOCATION.
+
+RECIPE_CACHE_ALIAS = 'recipes'
+RECIPE_CACHE_BACKEND = os.environ.get(
+    'RECIPE_CACHE_BACKEND',
+    'django.core.cache.backends.locmem.LocMemCache'
+)
+
+TOKEN_CACHE_ALIAS = 'tokens'
+TOKEN_CACHE_BACKEND = os.environ.get(
+    'TOKEN_CACHE_BACKEND',
+    'django.core.cache.backends.locmem.LocMemCache'
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    RECIPE_CACHE_ALIAS: {
+        'BACKEND': RECIPE_CACHE_BACKEND,
+        'LOCATION': os.environ.get('RECIPE_CACHE_LOCATION', 'recipes'),
+        'TIMEOUT': 300,
+    },
+    TOKEN_CACHE_ALIAS: {
+        'BACKEND': TOKEN_CACHE_BACKEND,
+        'LOCATION': os.environ.get('TOKEN_CACHE_LOCATION', 'tokens'),
+        'TIMEOUT': int(os.environ.get('TOKEN_CACHE_TIMEOUT', 300)),
+    },
+}
+
+if RECIPE_CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES[RECIPE_CACHE_ALIAS]['OPTIONS'] = {'MAX_ENTRIES': 10000}
+if TOKEN_CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES[TOKEN_CACHE_ALIAS]['OPTIONS'] = {'MAX_ENTRIES': 10000}
+
+# Users pinned to the primary after a write, shared like recipe responses.
+# With DATABASE_REPLICAS the server refuses to start unless this cache is
+# shared, since a pin held by one process leaves the others reading stale.
+REPLICA_PIN_CACHE_ALIAS = os.environ.get(
+    'REPLICA_PIN_CACHE_ALIAS', RECIPE_CACHE_ALIAS
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -132,4 +214,88 @@ MEDIA_URL = '/media/'
 STATIC_ROOT = '/vol/web/static'
 MEDIA_ROOT = '/vol/web/media'
 
+# Media files get new names when their content changes, so browsers and
+# proxies may keep them for long. Set MEDIA_OFFLOAD_HEADER to
+# X-Accel-Redirect (with the internal nginx location in
+# MEDIA_OFFLOAD_PREFIX) or X-Sendfile to let the front proxy send them.
+MEDIA_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+MEDIA_OFFLOAD_HEADER = os.environ.get('MEDIA_OFFLOAD_HEADER')
+MEDIA_OFFLOAD_PREFIX = os.environ.get('MEDIA_OFFLOAD_PREFIX', '/protected/')
+
+# Resized recipe image variants are generated in a pool of this many
+# processes per server worker, or inline when set to 0.
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+
+# Recipe videos are uploaded in chunks of at most
+# RECIPE_VIDEO_CHUNK_MAX_SIZE bytes. Uploads without a new chunk for
+# RECIPE_VIDEO_UPLOAD_EXPIRY seconds are removed by clear_video_uploads.
+RECIPE_VIDEO_MAX_SIZE = 2 * 1024 ** 3
+RECIPE_VIDEO_CHUNK_MAX_SIZE = 8 * 1024 ** 2
+RECIPE_VIDEO_UPLOAD_EXPIRY = 24 * 60 * 60
+
+# API payloads of these types and at least GZIP_MIN_SIZE bytes are gzipped
+# for clients sending Accept-Encoding: gzip.
+GZIP_MIN_SIZE = 1024
+GZIP_CONTENT_TYPES = (
+    'application/json',
+    'application/msgpack',
+    'application/x-ndjson',
+    'text/csv',
+)
+
 AUTH_USER_MODEL = 'core.User'
+
+# Passwords are hashed with the PBKDF2 iteration count recorded by
+# tune_password_hasher, re-read every PASSWORD_HASHER_REFRESH seconds and
+# never below PASSWORD_HASH_MIN_ITERATIONS. The floor is Django's own count,
+# so tuning only raises the cost and logins never rehash to a weaker one.
+PASSWORD_HASHERS = [
+    'user.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PASSWORD_HASH_MIN_ITERATIONS = PBKDF2PasswordHasher.iterations
+PASSWORD_HASHER_REFRESH = 60
+
+# Token requests take a token from a bucket per client IP and per account
+# before the password is hashed. Buckets hold `burst` attempts and refill
+# `per_minute` a minute. They live in each process unless
+# LOGIN_THROTTLE_CACHE_ALIAS names a cache shared by the servers.
+LOGIN_THROTTLE_RATES = {
+    'ip': {'burst': 20, 'per_minute': 10},
+    'account': {'burst': 5, 'per_minute': 2},
+}
+LOGIN_THROTTLE_CACHE_ALIAS = os.environ.get('LOGIN_THROTTLE_CACHE_ALIAS')
+
+REST_FRAMEWORK = {
+    'PAGE_SIZE': 50,
+}
+
+# Pagination classes are set per viewset, PAGE_SIZE is their default.
+SILENCED_SYSTEM_CHECKS = ['rest_framework.W001']
+
+RECIPE_BULK_MAX_ITEMS = 5000
+
+# Width of the buckets of the recipe price histogram.
+RECIPE_STATS_PRICE_BUCKET = 5
+
+# List endpoints build their pages from database rows instead of running
+# every row through the serializers.
+RECIPE_FAST_LISTS = bool(int(os.environ.get('RECIPE_FAST_LISTS', 1)))
+
+# MinHash signatures of similar recipes, cut into bands of rows. More
+# bands find recipes with less in common, more rows per band fewer
+# unrelated candidates. Run rebuild_similar_index after changing them.
+RECIPE_SIMILAR_BANDS = int(os.environ.get('RECIPE_SIMILAR_BANDS', 16))
+RECIPE_SIMILAR_ROWS = int(os.environ.get('RECIPE_SIMILAR_ROWS', 4))
+
+# Most candidates ranked exactly per similar recipes request.
+RECIPE_SIMILAR_CANDIDATES = int(
+    os.environ.get('RECIPE_SIMILAR_CANDIDATES', 500)
+)
+
+# Users whose pantry index each process keeps in memory, and the most
+# missing ingredients a pantry query may allow.
+RECIPE_PANTRY_INDEXES = int(os.environ.get('RECIPE_PANTRY_INDEXES', 100))
+RECIPE_PANTRY_MAX_MISSING = 5
@@ -3,3 +3,14 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.core.signals import request_finished, request_started
+        from django.db.backends.signals import connection_created
+
+        from core import db, routers
+
+        connection_created.connect(db.connection_opened)
+        request_started.connect(db.request_started)
+        request_finished.connect(db.request_finished)
+        routers.check_pin_cache()
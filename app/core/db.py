@@ -0,0 +1,89 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+_stats = {
+    'requests': 0,
+    'connections_opened': 0,
+    'health_checks': 0,
+    'health_check_failures': 0,
+}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def connection_stats():
+    """Return the database connection counters of this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+
+    requests = stats['requests']
+    stats['connections_per_request'] = (
+        stats['connections_opened'] / requests if requests else 0.0
+    )
+    return stats
+
+
+def reset_connection_stats():
+    """Reset the database connection counters."""
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def ping(alias='default'):
+    """Open the connection if needed and run a trivial query on it."""
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+def check_connections():
+    """Drop persistent connections that died while they were idle.
+
+    Connections idle for more than DB_HEALTH_CHECK_INTERVAL seconds are
+    pinged before the request uses them, so a database restart or an
+    idle timeout on the server costs a reconnect instead of an error.
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+
+        last_used = getattr(connection, 'last_used', now)
+        if now - last_used < settings.DB_HEALTH_CHECK_INTERVAL:
+            continue
+
+        _count('health_checks')
+        if not connection.is_usable():
+            _count('health_check_failures')
+            connection.close()
+
+
+def connection_opened(**kwargs):
+    """Count a new database connection."""
+    _count('connections_opened')
+
+
+def request_started(**kwargs):
+    """Count a request and check its persistent connections."""
+    _count('requests')
+    check_connections()
+
+
+def mark_used():
+    """Note when the connections of this thread were last used."""
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.last_used = now
+
+
+def request_finished(**kwargs):
+    """Note the end of a request on the connections it used."""
+    mark_used()
@@ -0,0 +1,26 @@
+from django.db.utils import DatabaseError
+from django.http import JsonResponse
+
+from core.db import connection_stats, ping
+
+
+def healthz(request):
+    """Report that the process is up, without touching the database."""
+    return JsonResponse({'status': 'ok'})
+
+
+def readyz(request):
+    """Report whether the database answers, with connection counters."""
+    try:
+        ping()
+    except DatabaseError:
+        return JsonResponse(
+            {'status': 'unavailable', 'database': 'unavailable'},
+            status=503
+        )
+
+    return JsonResponse({
+        'status': 'ok',
+        'database': 'ok',
+        'connections': connection_stats(),
+    })
@@ -0,0 +1,79 @@
+import os
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views import static
+
+from core import media
+
+PATH = 'benchmark/video.mp4'
+
+
+class Command(BaseCommand):
+    """Django command to measure media serving throughput of one worker."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=64,
+                            help='Size of the served file in MB')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--range-size', type=int, default=1024 * 1024,
+                            help='Bytes asked for by each seek')
+
+    def handle(self, *args, **options):
+        size = options['size'] * 1024 * 1024
+        with tempfile.TemporaryDirectory() as root, \
+                override_settings(MEDIA_ROOT=root, MEDIA_OFFLOAD_HEADER=None):
+            full_path = os.path.join(root, PATH)
+            os.makedirs(os.path.dirname(full_path))
+            with open(full_path, 'wb') as video:
+                for _ in range(options['size']):
+                    video.write(os.urandom(1024 * 1024))
+
+            factory = RequestFactory()
+            requests = options['requests']
+            span = options['range_size']
+            etag = media.file_etag(os.stat(full_path))
+
+            def static_seek():
+                return static.serve(factory.get('/'), PATH, root)
+
+            def range_seek():
+                first = random.randrange(0, max(size - span, 1))
+                request = factory.get(
+                    '/', HTTP_RANGE=f'bytes={first}-{first + span - 1}'
+                )
+                return media.serve(request, PATH)
+
+            def revalidate():
+                request = factory.get('/', HTTP_IF_NONE_MATCH=etag)
+                return media.serve(request, PATH)
+
+            def offload():
+                with override_settings(MEDIA_OFFLOAD_HEADER='X-Sendfile'):
+                    return media.serve(factory.get('/'), PATH)
+
+            self.report('seek, static.serve whole file', static_seek,
+                        max(requests // 10, 1))
+            self.report('seek, Range request', range_seek, requests)
+            self.report('revalidate, 304', revalidate, requests)
+            self.report('offload, X-Sendfile', offload, requests)
+
+    def report(self, label, view, requests):
+        sent = 0
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = view()
+            if response.streaming:
+                sent += sum(len(data) for data in response.streaming_content)
+            else:
+                sent += len(response.content)
+            response.close()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f'{label:32} {requests / elapsed:10.1f} req/s '
+            f'{sent / elapsed / 1024 ** 2:10.1f} MB/s'
+        )
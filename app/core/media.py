@@ -0,0 +1,166 @@
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, \
+    StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+BLOCK_SIZE = 64 * 1024
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Unfinished video uploads and files still being hashed are never served.
+PRIVATE_PREFIXES = ('uploads/recipe/partial/', 'uploads/tmp/')
+
+
+def _resolve(path):
+    """Return the absolute path and stat of a public media file."""
+    if path.startswith(PRIVATE_PREFIXES):
+        raise Http404('Not found.')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stats = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404('Not found.')
+    if not stat.S_ISREG(stats.st_mode):
+        raise Http404('Not found.')
+
+    return full_path, stats
+
+
+def file_etag(stats):
+    """Return a strong ETag for a file from its size and mtime.
+
+    Media files are written once under a new name, or replaced with
+    os.replace, so a size and mtime match means identical bytes.
+    """
+    return f'"{stats.st_size:x}-{stats.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """Return the (first, last) byte of a single range Range header.
+
+    None means the whole file should be sent, as multiple or malformed
+    ranges may be ignored. ValueError means no byte is in range.
+    """
+    match = RANGE.match(header.replace(' ', ''))
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # A suffix range asks for the last bytes of the file.
+        first, last = max(size - int(last), 0), size - 1
+    else:
+        first = int(first)
+        last = min(int(last), size - 1) if last else size - 1
+    if first > last or first >= size:
+        raise ValueError('Range not satisfiable.')
+
+    return first, last
+
+
+def _if_range_matches(request, etag, mtime):
+    header = request.META.get('HTTP_IF_RANGE')
+    if header is None:
+        return True
+    if header.startswith('"'):
+        return header == etag
+
+    date = parse_http_date_safe(header)
+    return date is not None and int(mtime) <= date
+
+
+def _read_range(full_path, first, last):
+    with open(full_path, 'rb') as media:
+        media.seek(first)
+        remaining = last - first + 1
+        while remaining:
+            data = media.read(min(BLOCK_SIZE, remaining))
+            if not data:
+                return
+            remaining -= len(data)
+            yield data
+
+
+@require_safe
+def serve(request, path):
+    """Serve a media file with range, conditional and caching support.
+
+    With MEDIA_OFFLOAD_HEADER set the bytes are left to the front proxy:
+    Django only resolves the file and answers with X-Accel-Redirect (the
+    MEDIA_OFFLOAD_PREFIX location plus the path) or X-Sendfile (the file
+    path).
+    """
+    full_path, stats = _resolve(path)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    offload = settings.MEDIA_OFFLOAD_HEADER
+    if offload:
+        response = HttpResponse(content_type=content_type)
+        if offload.lower() == 'x-sendfile':
+            response[offload] = full_path
+        else:
+            response[offload] = settings.MEDIA_OFFLOAD_PREFIX + path
+        return response
+
+    etag = file_etag(stats)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stats.st_mtime),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control':
+            f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}',
+    }
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=int(stats.st_mtime)
+    )
+    if conditional is not None:
+        for header, value in headers.items():
+            conditional[header] = value
+        return conditional
+
+    size = stats.st_size
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and \
+            _if_range_matches(request, etag, stats.st_mtime):
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = size
+    elif byte_range is None:
+        # FileResponse lets the WSGI server use sendfile() when it can.
+        response = FileResponse(
+            open(full_path, 'rb'),
+            content_type=content_type
+        )
+    else:
+        first, last = byte_range
+        response = StreamingHttpResponse(
+            _read_range(full_path, first, last),
+            status=206,
+            content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+        response['Content-Length'] = last - first + 1
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    for header, value in headers.items():
+        response[header] = value
+
+    return response
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Gzip API responses whose content type is worth compressing.
+
+    Only the types in GZIP_CONTENT_TYPES are compressed, which leaves
+    images, videos and other already compressed media alone, as well as
+    HTML pages carrying CSRF tokens. Responses shorter than GZIP_MIN_SIZE
+    are sent as they are, and streamed exports are compressed chunk by
+    chunk.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type.strip().lower() not in settings.GZIP_CONTENT_TYPES:
+            return response
+        if response.status_code == 206:
+            return response
+        if not response.streaming and \
+                len(response.content) < settings.GZIP_MIN_SIZE:
+            return response
+
+        return super().process_response(request, response)
@@ -0,0 +1,149 @@
+# Generated by Django 3.1.14 on 2026-10-16 20:27
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_SQL = """
+CREATE FUNCTION recipe_unaccent(text) RETURNS text AS $$
+    SELECT translate(
+        $1,
+        'àáâãäåèéêëìíîïòóôõöùúûüýÿçñÀÁÂÃÄÅÈÉÊËÌÍÎÏÒÓÔÕÖÙÚÛÜÝÇÑ',
+        'aaaaaaeeeeiiiiooooouuuuyycnAAAAAAEEEEIIIIOOOOOUUUUYCN'
+    )
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
+CREATE TEXT SEARCH CONFIGURATION recipe_search (COPY = pg_catalog.french);
+
+CREATE FUNCTION recipe_search_document(
+    recipe_id integer, title text, description text
+) RETURNS tsvector AS $$
+    SELECT
+        setweight(to_tsvector(
+            'recipe_search', recipe_unaccent(coalesce(title, ''))
+        ), 'A') ||
+        setweight(to_tsvector('recipe_search', recipe_unaccent(coalesce((
+            SELECT string_agg(names.name, ' ') FROM (
+                SELECT tag.name FROM core_tag tag
+                JOIN core_recipe_tags link ON link.tag_id = tag.id
+                WHERE link.recipe_id = $1
+                UNION ALL
+                SELECT ingredient.name FROM core_ingredient ingredient
+                JOIN core_recipe_ingredients link
+                    ON link.ingredient_id = ingredient.id
+                WHERE link.recipe_id = $1
+            ) names
+        ), ''))), 'B') ||
+        setweight(to_tsvector(
+            'recipe_search', recipe_unaccent(coalesce(description, ''))
+        ), 'C')
+$$ LANGUAGE sql STABLE;
+
+CREATE FUNCTION core_recipe_search_row() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := recipe_search_document(
+        NEW.id, NEW.title, NEW.description
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_recipe_search_row
+    BEFORE INSERT OR UPDATE OF title, description ON core_recipe
+    FOR EACH ROW EXECUTE PROCEDURE core_recipe_search_row();
+
+CREATE FUNCTION core_recipe_search_links() RETURNS trigger AS $$
+BEGIN
+    UPDATE core_recipe
+    SET search_vector = recipe_search_document(id, title, description)
+    WHERE id IN (SELECT recipe_id FROM changed);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_recipe_tags_search_insert
+    AFTER INSERT ON core_recipe_tags REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE PROCEDURE core_recipe_search_links();
+CREATE TRIGGER core_recipe_tags_search_delete
+    AFTER DELETE ON core_recipe_tags REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE PROCEDURE core_recipe_search_links();
+CREATE TRIGGER core_recipe_ingredients_search_insert
+    AFTER INSERT ON core_recipe_ingredients REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE PROCEDURE core_recipe_search_links();
+CREATE TRIGGER core_recipe_ingredients_search_delete
+    AFTER DELETE ON core_recipe_ingredients REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE PROCEDURE core_recipe_search_links();
+
+CREATE FUNCTION core_tag_search_rename() RETURNS trigger AS $$
+BEGIN
+    UPDATE core_recipe
+    SET search_vector = recipe_search_document(id, title, description)
+    WHERE id IN (
+        SELECT link.recipe_id FROM core_recipe_tags link
+        JOIN changed ON changed.id = link.tag_id
+    );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_tag_search_rename
+    AFTER UPDATE ON core_tag REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE PROCEDURE core_tag_search_rename();
+
+CREATE FUNCTION core_ingredient_search_rename() RETURNS trigger AS $$
+BEGIN
+    UPDATE core_recipe
+    SET search_vector = recipe_search_document(id, title, description)
+    WHERE id IN (
+        SELECT link.recipe_id FROM core_recipe_ingredients link
+        JOIN changed ON changed.id = link.ingredient_id
+    );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_ingredient_search_rename
+    AFTER UPDATE ON core_ingredient REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE PROCEDURE core_ingredient_search_rename();
+
+UPDATE core_recipe
+SET search_vector = recipe_search_document(id, title, description);
+"""
+
+REVERSE_SEARCH_SQL = """
+DROP TRIGGER core_ingredient_search_rename ON core_ingredient;
+DROP FUNCTION core_ingredient_search_rename();
+DROP TRIGGER core_tag_search_rename ON core_tag;
+DROP FUNCTION core_tag_search_rename();
+DROP TRIGGER core_recipe_ingredients_search_delete ON core_recipe_ingredients;
+DROP TRIGGER core_recipe_ingredients_search_insert ON core_recipe_ingredients;
+DROP TRIGGER core_recipe_tags_search_delete ON core_recipe_tags;
+DROP TRIGGER core_recipe_tags_search_insert ON core_recipe_tags;
+DROP FUNCTION core_recipe_search_links();
+DROP TRIGGER core_recipe_search_row ON core_recipe;
+DROP FUNCTION core_recipe_search_row();
+DROP FUNCTION recipe_search_document(integer, text, text);
+DROP TEXT SEARCH CONFIGURATION recipe_search;
+DROP FUNCTION recipe_unaccent(text);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_SQL, REVERSE_SEARCH_SQL),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='core_recipe_search_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations
+
+
+LINKS = (
+    ('core_recipe_tags', 'tag_id', 'core_recipe_tags_tag_recipe_idx'),
+    (
+        'core_recipe_ingredients',
+        'ingredient_id',
+        'core_recipe_ingr_ingr_recipe_idx',
+    ),
+)
+
+
+def single_column_indexes(schema_editor, table, column):
+    """Return the names of plain indexes covering only column."""
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+
+    return [
+        name for name, info in constraints.items()
+        if info['index'] and not info['unique'] and
+        not info['primary_key'] and info['columns'] == [column]
+    ]
+
+
+def add_link_indexes(apps, schema_editor):
+    """Replace the foreign key indexes with (key, recipe_id) ones."""
+    quote = schema_editor.quote_name
+    for table, column, index in LINKS:
+        for name in single_column_indexes(schema_editor, table, column):
+            schema_editor.execute(f'DROP INDEX {quote(name)}')
+        schema_editor.execute(
+            f'CREATE INDEX {quote(index)} ON {quote(table)} '
+            f'({quote(column)}, {quote("recipe_id")})'
+        )
+
+
+def remove_link_indexes(apps, schema_editor):
+    """Restore the single column foreign key indexes."""
+    quote = schema_editor.quote_name
+    for table, column, index in LINKS:
+        schema_editor.execute(f'DROP INDEX {quote(index)}')
+        name = schema_editor._create_index_name(table, [column], suffix='')
+        schema_editor.execute(
+            f'CREATE INDEX {quote(name)} ON {quote(table)} ({quote(column)})'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_recipe_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_link_indexes, remove_link_indexes),
+    ]
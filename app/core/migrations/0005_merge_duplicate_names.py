@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+MERGE_SQL = """
+CREATE TEMPORARY TABLE merged_{model} ON COMMIT DROP AS
+SELECT id, keep_id FROM (
+    SELECT id, min(id) OVER (PARTITION BY user_id, name) AS keep_id
+    FROM core_{model}
+) named
+WHERE id <> keep_id;
+
+INSERT INTO core_recipe_{links} (recipe_id, {model}_id)
+SELECT link.recipe_id, merged.keep_id
+FROM core_recipe_{links} link
+JOIN merged_{model} merged ON merged.id = link.{model}_id
+ON CONFLICT DO NOTHING;
+
+DELETE FROM core_recipe_{links}
+WHERE {model}_id IN (SELECT id FROM merged_{model});
+
+DELETE FROM core_{model}
+WHERE id IN (SELECT id FROM merged_{model});
+"""
+
+
+class Migration(migrations.Migration):
+    """Merge tags and ingredients sharing a name, keeping the oldest."""
+
+    dependencies = [
+        ('core', '0004_recipe_link_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            MERGE_SQL.format(model='tag', links='tags'),
+            migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(
+            MERGE_SQL.format(model='ingredient', links='ingredients'),
+            migrations.RunSQL.noop
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.1.14 on 2026-10-16 20:47
+
+import core.models
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_video_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('refs', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.recipe_upload_file_path),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='video',
+            field=models.FileField(null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.recipe_upload_file_path),
+        ),
+    ]
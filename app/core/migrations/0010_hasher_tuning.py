@@ -0,0 +1,23 @@
+# Generated by Django 3.1.14 on 2026-10-16 21:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_media_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HasherTuning',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('algorithm', models.CharField(max_length=64, unique=True)),
+                ('iterations', models.PositiveIntegerField()),
+                ('hash_ms', models.FloatField()),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
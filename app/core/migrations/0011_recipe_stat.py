@@ -0,0 +1,29 @@
+# Generated by Django 3.1.14 on 2026-10-16 21:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_hasher_tuning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStat',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('time', 'Time in minutes'), ('price', 'Price bucket'), ('tag', 'Tag'), ('ingredient', 'Ingredient')], max_length=10)),
+                ('key', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='recipestat',
+            constraint=models.UniqueConstraint(fields=('user', 'kind', 'key'), name='core_stat_user_kind_key_uniq'),
+        ),
+    ]
@@ -1,9 +1,14 @@
 from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
     PermissionsMixin
 
 from django.conf import settings
 
+from core.storage import media_storage
+
 import uuid
 import os
 # Create your models here.
@@ -62,6 +67,20 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_tag_user_name_id_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='core_tag_user_name_uniq'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -74,6 +93,20 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_ingr_user_name_id_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='core_ingr_user_name_uniq'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -91,8 +124,156 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
-    image = models.ImageField(null=True, upload_to=recipe_upload_file_path)
-    video = models.FileField(null=True, upload_to=recipe_upload_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_upload_file_path,
+        storage=media_storage
+    )
+    video = models.FileField(
+        null=True,
+        upload_to=recipe_upload_file_path,
+        storage=media_storage
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=['search_vector'],
+                name='core_recipe_search_idx'
+            ),
+            models.Index(
+                fields=['user', '-id'],
+                name='core_recipe_user_id_idx'
+            ),
+            models.Index(
+                fields=['user', 'time_minutes', 'id'],
+                name='core_recipe_user_time_idx'
+            ),
+            models.Index(
+                fields=['user', 'price', 'id'],
+                name='core_recipe_user_price_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RecipeImport(models.Model):
+    """Progress of a recipe dataset import, used to resume it."""
+    source = models.CharField(max_length=1024, unique=True)
+    size = models.BigIntegerField()
+    records_done = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.source
+
+
+class VideoUpload(models.Model):
+    """A resumable upload of a recipe video, received in chunks."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    recipe = models.ForeignKey('Recipe', on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    offset = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
+
+    @property
+    def partial_name(self):
+        """Storage name of the file the chunks are appended to."""
+        return f'uploads/recipe/partial/{self.id}.part'
+
+    def __str__(self):
+        return self.filename
+
+
+class MediaBlob(models.Model):
+    """A stored media file and how many recipe fields reference it."""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    refs = models.IntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+
+
+class HasherTuning(models.Model):
+    """Iteration count measured for a password hasher on this hardware."""
+    algorithm = models.CharField(max_length=64, unique=True)
+    iterations = models.PositiveIntegerField()
+    hash_ms = models.FloatField()
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.algorithm}: {self.iterations}'
+
+
+class RecipeStat(models.Model):
+    """Number of recipes of a user sharing a statistics key.
+
+    Keys are a time in minutes, a price bucket, a tag id or an
+    ingredient id depending on the kind. The rows are kept up to date
+    as recipes change and can be rebuilt with rebuild_recipe_stats.
+    """
+    TIME = 'time'
+    PRICE = 'price'
+    TAG = 'tag'
+    INGREDIENT = 'ingredient'
+    KIND_CHOICES = (
+        (TIME, 'Time in minutes'),
+        (PRICE, 'Price bucket'),
+        (TAG, 'Tag'),
+        (INGREDIENT, 'Ingredient'),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    key = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'kind', 'key'],
+                name='core_stat_user_kind_key_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.key}: {self.count}'
+
+
+class RecipeSignature(models.Model):
+    """Locality sensitive hashes of the ingredients and tags of a recipe.
+
+    Recipes sharing a band key are candidates for the similar recipes of
+    each other, found through the GIN index instead of comparing pairs.
+    """
+    recipe = models.OneToOneField(
+        'Recipe',
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    bands = ArrayField(models.BigIntegerField())
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['bands'], name='core_signature_bands_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.recipe_id)
@@ -0,0 +1,167 @@
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import DatabaseError
+
+from rest_framework.permissions import SAFE_METHODS
+
+_read_alias = ContextVar('read_alias', default=None)
+_health = {}
+_health_lock = threading.Lock()
+
+
+def _pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def check_pin_cache():
+    """Refuse to start with replicas but pins kept in each process.
+
+    A pin must be seen by every worker, or a user's next read can land
+    on a process that never saw their write and go to a lagging replica.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return
+
+    cache = caches[settings.REPLICA_PIN_CACHE_ALIAS]
+    if isinstance(cache, (LocMemCache, DummyCache)):
+        raise ImproperlyConfigured(
+            'DATABASE_REPLICAS needs REPLICA_PIN_CACHE_ALIAS to name a '
+            'cache shared by every server, not '
+            f'{type(cache).__name__}.'
+        )
+
+
+def pin_to_primary(user_id):
+    """Send the reads of a user to the primary for a while after a write."""
+    if not settings.DATABASE_REPLICAS:
+        return
+
+    caches[settings.REPLICA_PIN_CACHE_ALIAS].set(
+        _pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS
+    )
+
+
+def is_pinned(user_id):
+    """Return whether the reads of a user must go to the primary."""
+    cache = caches[settings.REPLICA_PIN_CACHE_ALIAS]
+    return bool(cache.get(_pin_key(user_id)))
+
+
+def mark_down(alias):
+    """Stop reading from a replica for REPLICA_RETRY_SECONDS."""
+    with _health_lock:
+        _health[alias] = {
+            'down_until': time.monotonic() + settings.REPLICA_RETRY_SECONDS,
+        }
+
+
+def _replication_lag(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            'SELECT EXTRACT(EPOCH FROM now() - '
+            'pg_last_xact_replay_timestamp())'
+        )
+        # NULL when the server is not replaying, like a local stand-in.
+        return cursor.fetchone()[0] or 0
+
+
+def is_healthy(alias):
+    """Return whether a replica answers and is not lagging behind.
+
+    The replication lag is only measured every REPLICA_CHECK_INTERVAL
+    seconds, and a failing replica is skipped for REPLICA_RETRY_SECONDS.
+    """
+    now = time.monotonic()
+    with _health_lock:
+        health = _health.get(alias, {})
+    if health.get('down_until', 0) > now:
+        return False
+    if health.get('checked', 0) > now - settings.REPLICA_CHECK_INTERVAL:
+        return True
+
+    try:
+        connection = connections[alias]
+        connection.ensure_connection()
+        healthy = connection.vendor != 'postgresql' or \
+            _replication_lag(alias) <= settings.REPLICA_MAX_LAG
+    except DatabaseError:
+        healthy = False
+    if not healthy:
+        mark_down(alias)
+        return False
+
+    with _health_lock:
+        _health[alias] = {'checked': now}
+    return True
+
+
+def choose_replica():
+    """Return a random healthy replica, or None to read from the primary."""
+    replicas = list(settings.DATABASE_REPLICAS)
+    random.shuffle(replicas)
+    for alias in replicas:
+        if is_healthy(alias):
+            return alias
+
+    return None
+
+
+class ReplicaRouter:
+    """Route reads to the replica chosen for the current request."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+class ReplicaReadMixin:
+    """Serve safe requests of a view from a replica.
+
+    A successful write pins the user to the primary for
+    REPLICA_STICKY_SECONDS, so they read their own writes. Actions in
+    read_actions only read, whatever their method.
+    """
+    read_actions = ()
+
+    def is_read(self, request):
+        """Return whether a request only reads."""
+        return request.method in SAFE_METHODS or \
+            getattr(self, 'action', None) in self.read_actions
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not settings.DATABASE_REPLICAS:
+            return
+        if self.is_read(request) and not is_pinned(request.user.pk):
+            alias = choose_replica()
+            if alias:
+                self._read_alias_token = _read_alias.set(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_read_alias_token', None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._read_alias_token = None
+        elif not self.is_read(request) and \
+                response.status_code < 400 and \
+                request.user and request.user.is_authenticated:
+            pin_to_primary(request.user.pk)
+
+        return super().finalize_response(request, response, *args, **kwargs)
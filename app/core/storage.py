@@ -0,0 +1,101 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import Counter
+
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.utils.deconstruct import deconstructible
+
+TEMP_DIR = 'uploads/tmp'
+
+RESERVE_SQL = """
+INSERT INTO core_mediablob (name, size, refs) VALUES (%s, %s, 1)
+ON CONFLICT (name) DO UPDATE SET refs = core_mediablob.refs + 1
+"""
+
+
+def blob_name(name, digest):
+    """Return the content addressed name of a file in the folder of name."""
+    folder = os.path.dirname(name)
+    extension = os.path.splitext(name)[1].lower()[:10]
+    return os.path.join(folder, digest[:2], f'{digest}{extension}')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage keeping each distinct content only once.
+
+    Uploads are hashed with sha256 while they are written to a temporary
+    file and then stored under their digest. Saving a file whose content
+    is already stored returns the existing name, so references must be
+    counted before deleting a blob, see recipe.blobs.
+
+    Storing a file counts the reference it is stored for right away, so
+    a blob released concurrently is never deleted under a new upload.
+    The recipe save claims that reference instead of counting another.
+    """
+    _reserved = threading.local()
+
+    def _save(self, name, content):
+        temp_dir = self.path(TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False) as temp:
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            for chunk in content.chunks():
+                digest.update(chunk)
+                temp.write(chunk)
+
+        return self.store_file(temp.name, name, digest.hexdigest())
+
+    def store_file(self, path, name, digest):
+        """Move the local file at path, with the given sha256, into place.
+
+        The file is dropped when the same content is already stored.
+        Return the content addressed name.
+        """
+        name = blob_name(name, digest)
+        target = self.path(name)
+        # Waits for a release deleting this blob, which holds its row.
+        with connection.cursor() as cursor:
+            cursor.execute(RESERVE_SQL, [name, os.path.getsize(path)])
+        self._reservations()[name] += 1
+
+        if os.path.exists(target):
+            os.remove(path)
+            return name
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.chmod(path, self.file_permissions_mode or 0o644)
+        os.replace(path, target)
+        return name
+
+    def _reservations(self):
+        if not hasattr(self._reserved, 'names'):
+            self._reserved.names = Counter()
+        return self._reserved.names
+
+    def claim(self, name):
+        """Take a reference counted when name was stored by this thread.
+
+        Return False when there is none left to take.
+        """
+        reservations = self._reservations()
+        if not reservations[name]:
+            return False
+        reservations[name] -= 1
+        return True
+
+    def discard_reservations(self):
+        """Forget the unclaimed references of this thread."""
+        self._reservations().clear()
+
+    def get_available_name(self, name, max_length=None):
+        # Names are only picked once the content is hashed in _save.
+        return name
+
+
+media_storage = ContentAddressedStorage()
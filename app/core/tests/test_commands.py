@@ -1,23 +1,44 @@
 from unittest.mock import patch
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
 
 
+@patch('core.management.commands.wait_for_db.connections')
 class CommandTests(TestCase):
 
-    def test_wait_for_db_ready(self):
+    def test_wait_for_db_ready(self, connections):
         """Test waiting for db when db is available."""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
+        with patch('core.management.commands.wait_for_db.ping') as ping:
             call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+            self.assertEqual(ping.call_count, 1)
+
+    def test_wait_for_db_connects(self, connections):
+        """Test the readiness check queries the database."""
+        with self.assertNumQueries(1):
+            call_command('wait_for_db', timeout=1)
 
     @patch('time.sleep', return_value=True)
-    def test_wait_for_db(self, ts):
+    def test_wait_for_db(self, ts, connections):
         """Test waiting for db."""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
+        with patch('core.management.commands.wait_for_db.ping') as ping:
+            ping.side_effect = [OperationalError] * 5 + [None]
             call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+            self.assertEqual(ping.call_count, 6)
+
+        delays = [call.args[0] for call in ts.call_args_list]
+        self.assertEqual(delays, [0.1, 0.2, 0.4, 0.8, 1.6])
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_timeout(self, ts, connections):
+        """Test waiting for db gives up after the timeout."""
+        with patch('core.management.commands.wait_for_db.ping') as ping, \
+                patch('time.monotonic') as monotonic:
+            ping.side_effect = OperationalError
+            monotonic.side_effect = [0, 1, 2, 3, 11]
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', timeout=10)
+
+        self.assertEqual(ts.call_count, 3)
@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import db
+
+
+class HealthEndpointTests(TestCase):
+    """Test the load balancer health endpoints."""
+
+    def test_healthz_skips_database(self):
+        """Test the liveness probe answers without any query."""
+        with self.assertNumQueries(0):
+            res = self.client.get(reverse('healthz'))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    def test_readyz_checks_database(self):
+        """Test the readiness probe runs one query and reports counters."""
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse('readyz'))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['database'], 'ok')
+        self.assertIn('connections_per_request', res.json()['connections'])
+
+    def test_readyz_database_down(self):
+        """Test the readiness probe fails while the database is down."""
+        with patch('core.health.ping', side_effect=OperationalError):
+            res = self.client.get(reverse('readyz'))
+
+        self.assertEqual(res.status_code, 503)
+
+
+class ConnectionLifecycleTests(TestCase):
+    """Test persistent connections are counted and health checked."""
+
+    def setUp(self):
+        db.reset_connection_stats()
+
+    def test_requests_counted(self):
+        """Test requests are counted for the churn ratio."""
+        self.client.get(reverse('healthz'))
+        self.client.get(reverse('healthz'))
+
+        self.assertEqual(db.connection_stats()['requests'], 2)
+
+    @override_settings(DB_HEALTH_CHECK_INTERVAL=0)
+    def test_idle_connection_checked(self):
+        """Test a dead idle connection is closed before it is used."""
+        connection.ensure_connection()
+        db.mark_used()
+        in_atomic_block = connection.in_atomic_block
+        connection.in_atomic_block = False
+        try:
+            with patch.object(connection, 'is_usable', return_value=False), \
+                    patch.object(connection, 'close') as close:
+                db.check_connections()
+        finally:
+            connection.in_atomic_block = in_atomic_block
+
+        close.assert_called_once_with()
+        self.assertEqual(db.connection_stats()['health_check_failures'], 1)
+
+    def test_busy_connection_not_checked(self):
+        """Test connections used recently are not pinged."""
+        connection.ensure_connection()
+        db.mark_used()
+
+        with patch.object(connection, 'is_usable') as is_usable:
+            db.check_connections()
+
+        is_usable.assert_not_called()
@@ -0,0 +1,136 @@
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from core.media import parse_range
+
+CONTENT = bytes(range(256)) * 16
+
+
+def media_url(path):
+    """Return the URL serving a media file."""
+    return reverse('media', args=[path])
+
+
+class MediaServingTests(TestCase):
+    """Test serving uploaded media files."""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        media_settings = override_settings(
+            MEDIA_ROOT=self.media.name,
+            MEDIA_OFFLOAD_HEADER=None
+        )
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.addCleanup(self.media.cleanup)
+
+        os.makedirs(os.path.join(self.media.name, 'uploads/recipe/partial'))
+        self.path = os.path.join(self.media.name, 'uploads/recipe/clip.mp4')
+        with open(self.path, 'wb') as clip:
+            clip.write(CONTENT)
+        self.url = media_url('uploads/recipe/clip.mp4')
+
+    def test_serve_whole_file(self):
+        """Test files are served with validators and cache headers."""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT)
+        self.assertEqual(res['Content-Type'], 'video/mp4')
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertTrue(res['ETag'].startswith('"'))
+        self.assertIn('max-age=', res['Cache-Control'])
+
+    def test_media_not_gzipped(self):
+        """Test media files are sent as they are to gzip clients."""
+        res = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(res.streaming_content), CONTENT)
+
+    def test_serve_range(self):
+        """Test a byte range is answered with 206 Partial Content."""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT[100:200])
+        self.assertEqual(res['Content-Range'], f'bytes 100-199/{len(CONTENT)}')
+        self.assertEqual(res['Content-Length'], '100')
+
+    def test_serve_suffix_and_open_ranges(self):
+        """Test ranges counted from the end or to the end of the file."""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(res.streaming_content), CONTENT[-10:])
+
+        res = self.client.get(self.url, HTTP_RANGE='bytes=4000-')
+        self.assertEqual(b''.join(res.streaming_content), CONTENT[4000:])
+
+    def test_unsatisfiable_range(self):
+        """Test a range past the end of the file is rejected."""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=99999-')
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_if_range_mismatch_sends_whole_file(self):
+        """Test a stale If-Range validator gets the whole file."""
+        res = self.client.get(
+            self.url,
+            HTTP_RANGE='bytes=0-9',
+            HTTP_IF_RANGE='"stale"'
+        )
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_not_modified(self):
+        """Test revalidation with If-None-Match or If-Modified-Since."""
+        etag = self.client.get(self.url)['ETag']
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res['ETag'], etag)
+
+        res = self.client.get(
+            self.url,
+            HTTP_IF_MODIFIED_SINCE=http_date(os.stat(self.path).st_mtime)
+        )
+        self.assertEqual(res.status_code, 304)
+
+    def test_private_and_missing_files(self):
+        """Test partial uploads, traversal and directories are hidden."""
+        with open(os.path.join(
+            self.media.name, 'uploads/recipe/partial/a.part'
+        ), 'wb') as part:
+            part.write(b'x')
+
+        for path in ('uploads/recipe/partial/a.part', '../etc/passwd',
+                     'uploads/recipe', 'missing.jpg'):
+            res = self.client.get(media_url(path))
+            self.assertEqual(res.status_code, 404, path)
+
+    def test_offload_to_proxy(self):
+        """Test the proxy is told which file to send."""
+        with override_settings(
+            MEDIA_OFFLOAD_HEADER='X-Accel-Redirect',
+            MEDIA_OFFLOAD_PREFIX='/protected/'
+        ):
+            res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(
+            res['X-Accel-Redirect'],
+            '/protected/uploads/recipe/clip.mp4'
+        )
+
+    def test_parse_range(self):
+        """Test multiple or malformed ranges fall back to the file."""
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 10))
+        self.assertIsNone(parse_range('items=0-1', 10))
+        self.assertEqual(parse_range('bytes=5-100', 10), (5, 9))
+        with self.assertRaises(ValueError):
+            parse_range('bytes=5-1', 10)
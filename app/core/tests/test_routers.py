@@ -0,0 +1,185 @@
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.test import (
+    SimpleTestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import routers
+from core.models import Ingredient, Recipe
+from recipe import pantry
+
+RECIPES_URL = reverse('recipe:recipe-list')
+ME_URL = reverse('user:me')
+REPLICA = 'replica_test'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Test safe requests read from a replica with read-your-writes.
+
+    A second connection to the test database stands in for the replica.
+    """
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        connections.databases[REPLICA] = dict(connections.databases['default'])
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections.databases[REPLICA]
+        delattr(connections._connections, REPLICA)
+
+    def setUp(self):
+        routers._health.clear()
+        routers.caches['recipes'].clear()
+        self.user = get_user_model().objects.create_user(
+            'replica@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def replica_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connections[REPLICA]) as queries:
+            res = getattr(self.client, method)(url, data, format='json')
+        return res, len(queries)
+
+    def test_reads_use_replica(self):
+        """Test safe requests are answered from the replica."""
+        Recipe.objects.create(
+            user=self.user,
+            title='Tasso',
+            time_minutes=45,
+            price=10.00
+        )
+
+        res, queries = self.replica_queries('get', RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertGreater(queries, 0)
+
+    def test_writes_pin_user_to_primary(self):
+        """Test a user reads from the primary right after writing."""
+        payload = {
+            'title': 'Akasan', 'time_minutes': 15, 'price': 3.00,
+            'description': 'Mayi ak lèt', 'tags': [], 'ingredients': [],
+        }
+
+        res, queries = self.replica_queries('post', RECIPES_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(queries, 0)
+
+        res, queries = self.replica_queries('get', RECIPES_URL)
+        self.assertEqual(queries, 0)
+        self.assertEqual(len(res.data['results']), 1)
+
+        res, queries = self.replica_queries('get', ME_URL)
+        self.assertEqual(queries, 0)
+
+    def test_profile_update_pins_user(self):
+        """Test updating the profile pins the user to the primary."""
+        res = self.client.patch(ME_URL, {'name': 'Tidjo'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertTrue(routers.is_pinned(self.user.pk))
+
+    def test_pantry_index_reads_primary(self):
+        """Test the pantry index is loaded from the primary.
+
+        It is stamped with the current version, so a lagging replica
+        would keep its stale rows in the index.
+        """
+        pantry.clear_indexes()
+        ingredient = Ingredient.objects.create(user=self.user, name='mayi')
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Mayi moulen',
+            time_minutes=30,
+            price=4.00
+        )
+        recipe.ingredients.add(ingredient)
+
+        with CaptureQueriesContext(connections[REPLICA]) as queries:
+            res = self.client.post(
+                reverse('recipe:recipe-pantry'),
+                {'ingredients': [ingredient.id]},
+                format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data], [recipe.id])
+        self.assertFalse(any(
+            'core_recipe_ingredients link' in query['sql']
+            for query in queries.captured_queries
+        ))
+        self.assertFalse(routers.is_pinned(self.user.pk))
+
+    def test_unhealthy_replica_skipped(self):
+        """Test reads fall back to the primary while a replica is down."""
+        with patch.object(
+            routers, '_replication_lag', return_value=60
+        ):
+            res, queries = self.replica_queries('get', RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, 0)
+        self.assertFalse(routers.is_healthy(REPLICA))
+
+    def test_writes_always_go_to_primary(self):
+        """Test the router never writes to a replica."""
+        router = routers.ReplicaRouter()
+        token = routers._read_alias.set(REPLICA)
+        try:
+            self.assertEqual(router.db_for_read(Recipe), REPLICA)
+            self.assertEqual(router.db_for_write(Recipe), 'default')
+        finally:
+            routers._read_alias.reset(token)
+
+        self.assertIsNone(router.db_for_read(Recipe))
+
+
+class PinCacheCheckTests(SimpleTestCase):
+    """Test replicas are refused with pins kept in each process."""
+
+    @override_settings(DATABASE_REPLICAS=[REPLICA])
+    def test_local_pin_cache_refused(self):
+        """Test a local memory pin cache fails the startup check."""
+        with self.assertRaises(ImproperlyConfigured):
+            routers.check_pin_cache()
+
+    def test_shared_pin_cache_accepted(self):
+        """Test a cache shared by the servers passes the check."""
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            DATABASE_REPLICAS=[REPLICA],
+            REPLICA_PIN_CACHE_ALIAS='pins',
+            CACHES={
+                'default': {
+                    'BACKEND':
+                        'django.core.cache.backends.locmem.LocMemCache',
+                },
+                'pins': {
+                    'BACKEND':
+                        'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': location,
+                },
+            }
+        ):
+            routers.check_pin_cache()
+
+    def test_no_replicas(self):
+        """Test a local pin cache is fine without replicas."""
+        routers.check_pin_cache()
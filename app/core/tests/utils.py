@@ -0,0 +1,35 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Assertions that keep endpoints from issuing queries per row."""
+
+    def assertQueryBudget(self, budget, func, *args, **kwargs):
+        """Assert func runs at most `budget` queries and return its result."""
+        with CaptureQueriesContext(connection) as context:
+            result = func(*args, **kwargs)
+
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        self.assertLessEqual(
+            len(context), budget,
+            f'{len(context)} queries executed, budget is {budget}:\n{queries}'
+        )
+        return result
+
+    def assertQueriesConstant(self, func, add_rows, steps=(1, 5)):
+        """Assert the query count of func does not grow with row count.
+
+        `add_rows(n)` must create `n` more rows visible to `func`.
+        """
+        counts = []
+        for rows in steps:
+            add_rows(rows)
+            with CaptureQueriesContext(connection) as context:
+                func()
+            counts.append(len(context))
+
+        self.assertEqual(
+            len(set(counts)), 1,
+            f'Query count grows with row count: {counts} for {steps} rows'
+        )
@@ -0,0 +1,66 @@
+"""Async versions of the hot recipe read endpoints for the ASGI server.
+
+Django 3.1 has no async ORM, and a sync view served over ASGI runs on
+the single thread shared by every thread sensitive call, so requests
+queue up behind each other. These views instead hand the whole request
+(authentication, queries, serialization and rendering) to one
+non-thread-sensitive sync_to_async call. Many requests are then served
+in parallel on the executor threads while the event loop only awaits.
+"""
+from asgiref.sync import sync_to_async
+
+from django.db import close_old_connections
+from django.http import HttpResponse, HttpResponseNotAllowed
+
+from core.db import check_connections, mark_used
+from recipe import views
+
+
+def _render(response):
+    """Copy a rendered DRF response into a plain HttpResponse.
+
+    Returning the DRF response itself would make the ASGI handler render
+    it with another thread sensitive call.
+    """
+    response.render()
+    rendered = HttpResponse(
+        response.content,
+        status=response.status_code,
+        content_type=response['Content-Type']
+    )
+    for header, value in response.items():
+        rendered[header] = value
+
+    return rendered
+
+
+def _serve(view, request, **kwargs):
+    # Executor threads are not covered by the request_started and
+    # request_finished signals, so connections are checked here instead.
+    close_old_connections()
+    check_connections()
+    try:
+        return _render(view(request, **kwargs))
+    finally:
+        close_old_connections()
+        mark_used()
+
+
+def _async_view(viewset, actions):
+    view = viewset.as_view(actions)
+    serve = sync_to_async(_serve, thread_sensitive=False)
+
+    async def async_view(request, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+        return await serve(view, request, **kwargs)
+
+    async_view.csrf_exempt = True
+    return async_view
+
+
+recipe_list = _async_view(views.RecipeViewSet, {'get': 'list'})
+recipe_detail = _async_view(views.RecipeViewSet, {'get': 'retrieve'})
+tag_list = _async_view(views.TagViewSet, {'get': 'list'})
+ingredient_list = _async_view(views.IngredientViewSet, {'get': 'list'})
@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from core.models import MediaBlob, Recipe
+from recipe.images import delete_variants
+
+MEDIA_FIELDS = ('image', 'video')
+
+
+def _storage():
+    return Recipe._meta.get_field('image').storage
+
+
+def retain(name):
+    """Count one more reference to a stored media file."""
+    storage = _storage()
+    MediaBlob.objects.bulk_create(
+        [MediaBlob(name=name, size=storage.size(name))],
+        ignore_conflicts=True
+    )
+    MediaBlob.objects.filter(name=name).update(refs=F('refs') + 1)
+
+
+def release(name):
+    """Count one reference less, deleting the file after the last one.
+
+    Files stored before references were counted have no MediaBlob and
+    are left alone until dedupe_media adopts them.
+    """
+    MediaBlob.objects.filter(name=name).update(refs=F('refs') - 1)
+    if MediaBlob.objects.filter(name=name, refs__lte=0).exists():
+        transaction.on_commit(lambda: delete_unreferenced(name))
+
+
+@transaction.atomic
+def delete_unreferenced(name):
+    """Delete a stored media file and its variants unless counted again.
+
+    The blob row stays locked until the file is gone, so an upload of
+    the same content waits to count its reference and then stores the
+    file again.
+    """
+    blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+    if blob is None or blob.refs > 0:
+        return
+
+    _storage().delete(name)
+    delete_variants(name)
+    blob.delete()
+
+
+def media_names(recipe):
+    """Return the stored media file names of a recipe."""
+    return {
+        getattr(recipe, field).name for field in MEDIA_FIELDS
+        if getattr(recipe, field)
+    }
+
+
+def update_references(old_names, new_names):
+    """Retain and release references for a change of media files."""
+    storage = _storage()
+    for name in new_names:
+        if storage.claim(name):
+            # Counted when stored, once too many if it was already set.
+            if name in old_names:
+                release(name)
+        elif name not in old_names:
+            retain(name)
+    for name in old_names - new_names:
+        release(name)
+
+
+def storage_report():
+    """Return the stored and referenced bytes of the media blobs."""
+    totals = MediaBlob.objects.filter(refs__gt=0).aggregate(
+        blobs=Count('id'),
+        references=Sum('refs'),
+        bytes_stored=Sum('size'),
+        bytes_referenced=Sum(F('size') * F('refs')),
+    )
+    report = {key: value or 0 for key, value in totals.items()}
+    report['bytes_saved'] = \
+        report.pop('bytes_referenced') - report['bytes_stored']
+
+    return report
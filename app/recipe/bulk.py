@@ -0,0 +1,161 @@
+from django.db import transaction
+
+from rest_framework.exceptions import ValidationError
+
+from core.models import Tag, Ingredient, Recipe, RecipeStat
+from recipe.cache import bump_version
+from recipe.pantry import record_changes
+from recipe.serializers import RecipeBulkItemSerializer
+from recipe.similar import index_recipes
+from recipe.stats import StatsDelta
+
+BATCH_SIZE = 1000
+RECIPE_FIELDS = ('title', 'time_minutes', 'description', 'price', 'link')
+LINKS = (
+    ('tags', Tag, Recipe.tags.through, 'tag_id'),
+    ('ingredients', Ingredient, Recipe.ingredients.through, 'ingredient_id'),
+)
+LINK_KINDS = {'tags': RecipeStat.TAG, 'ingredients': RecipeStat.INGREDIENT}
+
+
+def _validate_items(items):
+    """Validate every item, returning (index, data) pairs and errors."""
+    serializer = RecipeBulkItemSerializer()
+    # Updates only carry the fields they change.
+    partial = RecipeBulkItemSerializer(partial=True)
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        validator = partial \
+            if isinstance(item, dict) and 'id' in item else serializer
+        try:
+            valid.append((index, validator.run_validation(item)))
+        except ValidationError as exc:
+            errors[index] = exc.detail
+
+    return valid, errors
+
+
+def _check_ownership(user, valid, errors):
+    """Drop items referencing objects the user does not own."""
+    owned = {}
+    for name, model, through, column in LINKS:
+        ids = {pk for _, data in valid for pk in data.get(name, ())}
+        owned[name] = set(
+            model.objects.filter(user=user, id__in=ids)
+            .values_list('id', flat=True)
+        )
+
+    recipe_ids = {data['id'] for _, data in valid if 'id' in data}
+    owned['id'] = set(
+        Recipe.objects.filter(user=user, id__in=recipe_ids)
+        .values_list('id', flat=True)
+    )
+
+    checked = []
+    seen = set()
+    for index, data in valid:
+        item_errors = {}
+        if 'id' in data and data['id'] not in owned['id']:
+            item_errors['id'] = [f'Invalid pk "{data["id"]}" - '
+                                 'object does not exist.']
+        elif 'id' in data and data['id'] in seen:
+            # Its links would be written twice in one bulk insert.
+            item_errors['id'] = ['Repeated in this request.']
+        elif 'id' in data:
+            seen.add(data['id'])
+        for name, _, _, _ in LINKS:
+            missing = sorted(set(data.get(name, ())) - owned[name])
+            if missing:
+                item_errors[name] = [
+                    f'Invalid pk "{pk}" - object does not exist.'
+                    for pk in missing
+                ]
+
+        if item_errors:
+            errors[index] = item_errors
+        else:
+            checked.append((index, data))
+
+    return checked
+
+
+def bulk_write_recipes(user, items):
+    """Create or update recipes in one transaction with set based writes.
+
+    Items carrying an `id` update that recipe, the others are created.
+    Returns one result per item: `{'id': pk}` or `{'errors': {...}}`.
+    """
+    valid, errors = _validate_items(items)
+    valid = _check_ownership(user, valid, errors)
+
+    # Bulk writes send no signals, so the statistics are updated here.
+    stats = StatsDelta()
+    with transaction.atomic():
+        # Updated recipes start from their rows, so fields an item
+        # leaves out keep their values.
+        existing = Recipe.objects.only(*RECIPE_FIELDS).in_bulk(
+            [data['id'] for _, data in valid if 'id' in data]
+        )
+        for recipe in existing.values():
+            stats.recipe(user.id, recipe.time_minutes, recipe.price, sign=-1)
+
+        recipes = {}
+        for index, data in valid:
+            recipe = existing[data['id']] if 'id' in data \
+                else Recipe(user=user)
+            for field in RECIPE_FIELDS:
+                if field in data:
+                    setattr(recipe, field, data[field])
+            recipes[index] = recipe
+
+        created = [recipe for recipe in recipes.values() if recipe.id is None]
+        updated = [recipe for recipe in recipes.values() if recipe.id]
+        for recipe in created + updated:
+            stats.recipe(user.id, recipe.time_minutes, recipe.price)
+
+        Recipe.objects.bulk_create(created, batch_size=BATCH_SIZE)
+        Recipe.objects.bulk_update(
+            updated, RECIPE_FIELDS, batch_size=BATCH_SIZE
+        )
+
+        for name, _, through, column in LINKS:
+            replaced = through.objects.filter(recipe_id__in=[
+                recipes[index].id for index, data in valid
+                if 'id' in data and name in data
+            ])
+            stats.links(
+                user.id, LINK_KINDS[name],
+                replaced.values_list(column, flat=True), sign=-1
+            )
+            replaced.delete()
+
+            links = [
+                through(recipe_id=recipes[index].id, **{column: pk})
+                for index, data in valid
+                for pk in set(data.get(name, ()))
+            ]
+            through.objects.bulk_create(links, batch_size=BATCH_SIZE)
+            stats.links(
+                user.id, LINK_KINDS[name],
+                [getattr(link, column) for link in links]
+            )
+
+        stats.apply()
+        index_recipes(
+            recipes[index].id for index, data in valid
+            if 'id' not in data or set(data).intersection(LINK_KINDS)
+        )
+
+    if recipes:
+        bump_version(user.id)
+    relinked = [
+        recipes[index].id for index, data in valid if 'ingredients' in data
+    ]
+    if relinked:
+        record_changes(user.id, relinked)
+
+    return [
+        {'errors': errors[index]} if index in errors
+        else {'id': recipes[index].id}
+        for index in range(len(items))
+    ]
@@ -0,0 +1,90 @@
+import functools
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework import status
+from rest_framework.response import Response
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the cache backend holding recipe API responses."""
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f'recipe-api:{user_id}:version'
+
+
+def get_version(user_id):
+    """Return the current response cache version of a user."""
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so an evicted counter never reuses the
+        # version of responses that may still be cached.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+
+    return version
+
+
+def bump_version(user_id):
+    """Invalidate every cached response of a user."""
+    cache = get_cache()
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats():
+    """Return the response cache hit and miss counters of this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_cache_stats():
+    """Reset the response cache hit and miss counters."""
+    with _stats_lock:
+        _stats.update(hits=0, misses=0)
+
+
+def cache_response(view_method):
+    """Serve a viewset action from the per user response cache."""
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        user_id = request.user.pk
+        url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        key = (
+            f'recipe-api:{user_id}:{get_version(user_id)}:'
+            f'{self.basename}:{self.action}:{url}'
+        )
+
+        cache = get_cache()
+        data = cache.get(key)
+        if data is not None:
+            _count('hits')
+            return Response(data)
+
+        _count('misses')
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+
+        return response
+
+    return wrapper
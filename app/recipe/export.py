@@ -0,0 +1,105 @@
+import csv
+import json
+from itertools import islice
+
+from core.models import Recipe
+
+EXPORT_FIELDS = (
+    'id', 'title', 'time_minutes', 'description', 'price', 'link', 'tags',
+    'ingredients',
+)
+CHUNK_SIZE = 2000
+
+
+def _names_by_recipe(through, name_field, recipe_ids):
+    """Return {recipe_id: [name, ...]} for the given recipes."""
+    names = {}
+    rows = through.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by(name_field).values_list('recipe_id', name_field)
+    for recipe_id, name in rows:
+        names.setdefault(recipe_id, []).append(name)
+
+    return names
+
+
+def export_rows(queryset, chunk_size=CHUNK_SIZE, with_user=False):
+    """Yield recipes as dicts with their tag and ingredient names.
+
+    Recipes are read through a server side cursor and names are fetched
+    once per chunk, so memory stays flat whatever the number of rows.
+    """
+    fields = ['id', 'title', 'time_minutes', 'description', 'price', 'link']
+    if with_user:
+        fields.append('user_id')
+
+    rows = queryset.order_by('id').values_list(*fields).iterator(
+        chunk_size=chunk_size
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+
+        ids = [row[0] for row in chunk]
+        tags = _names_by_recipe(Recipe.tags.through, 'tag__name', ids)
+        ingredients = _names_by_recipe(
+            Recipe.ingredients.through, 'ingredient__name', ids
+        )
+        for row in chunk:
+            recipe = dict(zip(fields, row))
+            recipe['price'] = str(recipe['price'])
+            recipe['tags'] = tags.get(recipe['id'], [])
+            recipe['ingredients'] = ingredients.get(recipe['id'], [])
+            yield recipe
+
+
+def _batches(rows, size=500):
+    """Group rows so the writers yield fewer, larger strings."""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def ndjson_lines(rows, fields=EXPORT_FIELDS):
+    """Yield recipes encoded as newline delimited JSON."""
+    for batch in _batches(rows):
+        yield ''.join(
+            json.dumps(
+                {field: row[field] for field in fields},
+                ensure_ascii=False
+            ) + '\n'
+            for row in batch
+        )
+
+
+class _Echo:
+    """File-like object returning what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, fields=EXPORT_FIELDS):
+    """Yield recipes encoded as CSV with `;` separated names."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+
+    for batch in _batches(rows):
+        yield ''.join(
+            writer.writerow([
+                ';'.join(row[field]) if isinstance(row[field], list)
+                else row[field]
+                for field in fields
+            ])
+            for row in batch
+        )
+
+
+EXPORT_WRITERS = {
+    'ndjson': ndjson_lines,
+    'csv': csv_lines,
+}
@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from PIL import Image, ImageOps
+
+# name: (width, height, crop to fill the box)
+VARIANTS = {
+    'thumb': (160, 160, True),
+    'small': (480, 480, False),
+    'medium': (960, 960, False),
+    'large': (1600, 1600, False),
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# EXIF orientation: the transpositions that turn the image upright.
+ORIENTATION_TAG = 0x0112
+ORIENTATIONS = {
+    2: Image.FLIP_LEFT_RIGHT,
+    3: Image.ROTATE_180,
+    4: Image.FLIP_TOP_BOTTOM,
+    5: Image.TRANSPOSE,
+    6: Image.ROTATE_270,
+    7: Image.TRANSVERSE,
+    8: Image.ROTATE_90,
+}
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variant_name(name, variant, image_format):
+    """Return the storage name of a variant, next to the original."""
+    stem, _ = os.path.splitext(name)
+    return f'{stem}_{variant}.{image_format}'
+
+
+def variant_names(name):
+    """Return the storage names of every variant of an image."""
+    return {
+        variant: {
+            image_format: variant_name(name, variant, image_format)
+            for image_format in FORMATS
+        }
+        for variant in VARIANTS
+    }
+
+
+def upright(image):
+    """Return a copy of an image turned as its EXIF orientation says.
+
+    ImageOps.exif_transpose only exists from Pillow 6.0.
+    """
+    getexif = getattr(image, '_getexif', None)
+    try:
+        exif = getexif() if getexif else None
+    except (AttributeError, OSError, SyntaxError, ValueError):
+        exif = None
+    method = ORIENTATIONS.get((exif or {}).get(ORIENTATION_TAG))
+
+    return image.transpose(method) if method is not None else image.copy()
+
+
+def _is_fresh(path, source_mtime):
+    try:
+        return os.stat(path).st_mtime >= source_mtime
+    except FileNotFoundError:
+        return False
+
+
+def render_variants(path, force=False):
+    """Write the variants of the image file at path.
+
+    Variants newer than the original are kept unless force is set, and
+    each file is written to a temporary name first, so running this again
+    or concurrently for the same image is safe. Return how many files
+    were written.
+    """
+    source_mtime = os.stat(path).st_mtime
+    targets = [
+        (variant, image_format, variant_name(path, variant, image_format))
+        for variant in VARIANTS
+        for image_format in FORMATS
+    ]
+    if not force:
+        targets = [
+            target for target in targets
+            if not _is_fresh(target[2], source_mtime)
+        ]
+    if not targets:
+        return 0
+
+    largest = max(VARIANTS[variant][:2] for variant, _, _ in targets)
+    with Image.open(path) as original:
+        # Let the JPEG decoder downscale while decoding, which is much
+        # cheaper than loading a full camera photo and resizing it.
+        original.draft('RGB', largest)
+        image = upright(original).convert('RGB')
+
+    resized = {}
+    for variant, image_format, target in targets:
+        if variant not in resized:
+            width, height, crop = VARIANTS[variant]
+            if crop:
+                resized[variant] = ImageOps.fit(
+                    image, (width, height), Image.LANCZOS
+                )
+            else:
+                resized[variant] = image.copy()
+                resized[variant].thumbnail((width, height), Image.LANCZOS)
+
+        pil_format, options = FORMATS[image_format]
+        partial = f'{target}.{os.getpid()}.tmp'
+        resized[variant].save(partial, pil_format, **options)
+        os.replace(partial, target)
+
+    return len(targets)
+
+
+def delete_variants(name):
+    """Delete the variants of an image that are present in storage."""
+    for formats in variant_names(name).values():
+        for variant in formats.values():
+            default_storage.delete(variant)
+
+
+def get_executor():
+    """Return the process pool shared by the image uploads of a worker."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(settings.RECIPE_IMAGE_WORKERS)
+        return _executor
+
+
+def schedule_variants(name):
+    """Generate the variants of an uploaded image off the request thread.
+
+    With RECIPE_IMAGE_WORKERS set to 0 they are generated right away.
+    """
+    path = default_storage.path(name)
+    if not settings.RECIPE_IMAGE_WORKERS:
+        render_variants(path)
+        return None
+
+    future = get_executor().submit(render_variants, path)
+    future.add_done_callback(_log_failure(name))
+    return future
+
+
+def _log_failure(name):
+    """Return a future callback logging why the variants of name failed."""
+    def callback(future):
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            logger.error(
+                'Could not render the variants of %s', name,
+                exc_info=(type(exc), exc, exc.__traceback__)
+            )
+
+    return callback
@@ -0,0 +1,266 @@
+import csv
+import io
+import json
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from core.models import RecipeImport
+from recipe.cache import bump_version
+from recipe.pantry import record_changes
+from recipe.similar import index_staged_recipes
+from recipe.stats import add_staged_recipes
+
+BATCH_SIZE = 50000
+LINK_FIELDS = ('tags', 'ingredients')
+
+STAGING_SQL = """
+CREATE TEMPORARY TABLE IF NOT EXISTS import_recipe (
+    record bigint PRIMARY KEY,
+    recipe_id integer,
+    user_id integer NOT NULL,
+    title text NOT NULL,
+    time_minutes integer NOT NULL,
+    description text NOT NULL,
+    price numeric(5, 2) NOT NULL,
+    link text NOT NULL
+);
+CREATE TEMPORARY TABLE IF NOT EXISTS import_link (
+    record bigint NOT NULL,
+    kind text NOT NULL,
+    name text NOT NULL
+);
+"""
+
+# Links go in before their recipes, which is allowed because the foreign
+# keys are only checked at commit, so the search trigger builds each
+# recipe's document once instead of again after every link insert.
+MERGE_SQL = (
+    """
+    UPDATE import_recipe
+    SET recipe_id = nextval(pg_get_serial_sequence('core_recipe', 'id'))
+    """,
+    """
+    INSERT INTO core_tag (user_id, name)
+    SELECT DISTINCT recipe.user_id, link.name
+    FROM import_link link JOIN import_recipe recipe USING (record)
+    WHERE link.kind = 'tags'
+    ON CONFLICT (user_id, name) DO NOTHING
+    """,
+    """
+    INSERT INTO core_ingredient (user_id, name)
+    SELECT DISTINCT recipe.user_id, link.name
+    FROM import_link link JOIN import_recipe recipe USING (record)
+    WHERE link.kind = 'ingredients'
+    ON CONFLICT (user_id, name) DO NOTHING
+    """,
+    """
+    INSERT INTO core_recipe_tags (recipe_id, tag_id)
+    SELECT DISTINCT recipe.recipe_id, tag.id
+    FROM import_link link JOIN import_recipe recipe USING (record)
+    JOIN core_tag tag
+        ON tag.user_id = recipe.user_id AND tag.name = link.name
+    WHERE link.kind = 'tags'
+    """,
+    """
+    INSERT INTO core_recipe_ingredients (recipe_id, ingredient_id)
+    SELECT DISTINCT recipe.recipe_id, ingredient.id
+    FROM import_link link JOIN import_recipe recipe USING (record)
+    JOIN core_ingredient ingredient
+        ON ingredient.user_id = recipe.user_id
+        AND ingredient.name = link.name
+    WHERE link.kind = 'ingredients'
+    """,
+    """
+    INSERT INTO core_recipe (
+        id, user_id, title, time_minutes, description, price, link
+    )
+    SELECT recipe_id, user_id, title, time_minutes, description, price, link
+    FROM import_recipe
+    """,
+)
+
+
+def read_ndjson(source):
+    """Yield the records of a newline delimited JSON file."""
+    for line in source:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+def read_csv(source):
+    """Yield the records of a CSV file with `;` separated names."""
+    for row in csv.DictReader(source):
+        for field in LINK_FIELDS:
+            row[field] = [
+                name for name in (row.get(field) or '').split(';') if name
+            ]
+        yield row
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+def clean_record(record, user_id=None):
+    """Return a record ready to stage or raise ValueError."""
+    if not isinstance(record, dict):
+        raise ValueError('record is not an object')
+
+    try:
+        price = Decimal(str(record['price']))
+        cleaned = {
+            'user_id': int(user_id or record['user_id']),
+            'title': str(record['title'] or ''),
+            'time_minutes': int(record['time_minutes']),
+            'description': str(record.get('description') or ''),
+            'price': price,
+            'link': str(record.get('link') or ''),
+        }
+    except (KeyError, TypeError, InvalidOperation) as exc:
+        raise ValueError(f'invalid or missing field {exc}')
+
+    if not cleaned['title'] or len(cleaned['title']) > 255:
+        raise ValueError('title must be 1 to 255 characters')
+    if len(cleaned['link']) > 255:
+        raise ValueError('link must be at most 255 characters')
+    low, high = connection.ops.integer_field_range('IntegerField')
+    if not low <= cleaned['time_minutes'] <= high:
+        raise ValueError('time_minutes is out of range')
+    # Rounded like numeric(5, 2) before the bound, so 999.999 is refused.
+    if price.is_finite() and abs(price) < 1000:
+        price = price.quantize(Decimal('0.01'), ROUND_HALF_UP)
+    if not price.is_finite() or abs(price) >= 1000:
+        raise ValueError('price must be below 1000')
+    cleaned['price'] = price
+
+    for field in LINK_FIELDS:
+        names = record.get(field) or []
+        if not isinstance(names, list) or \
+                any(not name or len(str(name)) > 255 for name in names):
+            raise ValueError(f'{field} must be a list of names')
+        cleaned[field] = [str(name) for name in names]
+
+    return cleaned
+
+
+def _copy(cursor, table, columns, rows):
+    """Load rows into a staging table with COPY FROM STDIN."""
+    buffer = io.StringIO()
+    csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f'COPY {table} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)',
+        buffer
+    )
+
+
+class RecipeImporter:
+    """Import recipe records in batches through COPY and set based merges.
+
+    Every batch commits together with its checkpoint, so a failed import
+    run again with the same source resumes after the last batch.
+    """
+
+    def __init__(self, source, size, user_id=None, batch_size=BATCH_SIZE):
+        self.source = source
+        self.size = size
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.errors = []
+
+    def progress(self, restart=False):
+        """Return the checkpoint of this source, reset when it changed."""
+        checkpoint, _ = RecipeImport.objects.get_or_create(
+            source=self.source,
+            defaults={'size': self.size}
+        )
+        if restart or checkpoint.size != self.size:
+            checkpoint.size = self.size
+            checkpoint.records_done = 0
+            checkpoint.save()
+
+        return checkpoint
+
+    def run(self, records, restart=False, report=None):
+        """Import records, calling report(done, imported) per batch."""
+        checkpoint = self.progress(restart)
+        records = enumerate(records)
+        done = checkpoint.records_done
+        for _ in islice(records, done):
+            pass
+
+        with connection.cursor() as cursor:
+            cursor.execute(STAGING_SQL)
+
+        imported = 0
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                return imported
+
+            imported += self._import_batch(checkpoint, batch)
+            if report:
+                report(checkpoint.records_done, imported)
+
+    def _import_batch(self, checkpoint, batch):
+        recipes, links = [], []
+        for index, record in batch:
+            try:
+                cleaned = clean_record(record, self.user_id)
+            except ValueError as exc:
+                self.errors.append((index + 1, str(exc)))
+                continue
+
+            recipes.append(cleaned)
+            cleaned['record'] = index
+            for field in LINK_FIELDS:
+                links.extend(
+                    (index, field, name) for name in set(cleaned[field])
+                )
+
+        user_ids = {recipe['user_id'] for recipe in recipes}
+        known = set(
+            get_user_model().objects.filter(id__in=user_ids)
+            .values_list('id', flat=True)
+        )
+        for recipe in recipes:
+            if recipe['user_id'] not in known:
+                self.errors.append((recipe['record'] + 1, 'unknown user'))
+        recipes = [recipe for recipe in recipes if recipe['user_id'] in known]
+        staged = {recipe['record'] for recipe in recipes}
+
+        columns = (
+            'record', 'user_id', 'title', 'time_minutes', 'description',
+            'price', 'link',
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('TRUNCATE import_recipe, import_link')
+            _copy(
+                cursor, 'import_recipe', columns,
+                ([recipe[column] for column in columns] for recipe in recipes)
+            )
+            _copy(
+                cursor, 'import_link', ('record', 'kind', 'name'),
+                (link for link in links if link[0] in staged)
+            )
+            for sql in MERGE_SQL:
+                cursor.execute(sql)
+            add_staged_recipes(cursor)
+            index_staged_recipes(cursor)
+
+            checkpoint.records_done = batch[-1][0] + 1
+            checkpoint.save()
+
+        for user_id in known:
+            bump_version(user_id)
+            record_changes(user_id)
+
+        return len(recipes)
@@ -0,0 +1,224 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from itertools import cycle
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.models import Ingredient, Recipe, Tag
+
+
+def percentile(values, fraction):
+    """Return the value below which the given fraction of values fall."""
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    """Django command to compare the WSGI and ASGI read paths.
+
+    Requests are fed straight to the WSGI and ASGI applications from the
+    given number of concurrent connections, so the numbers measure the
+    request handling and not an HTTP server.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--wsgi-threads', type=int, default=32,
+                            help='Threads of the WSGI worker')
+        parser.add_argument('--recipes', type=int, default=100)
+        parser.add_argument(
+            '--with-cache', action='store_true',
+            help='Keep the recipe response cache enabled'
+        )
+
+    def handle(self, *args, **options):
+        caches = dict(settings.CACHES)
+        if not options['with_cache']:
+            caches[settings.RECIPE_CACHE_ALIAS] = {
+                'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+            }
+
+        user = self.create_data(options['recipes'])
+        try:
+            with override_settings(CACHES=caches, ALLOWED_HOSTS=['*']):
+                self.run_benchmarks(user, options)
+        finally:
+            user.delete()
+
+    def create_data(self, count):
+        """Create a user with recipes, tags and ingredients."""
+        name = uuid.uuid4().hex
+        user = get_user_model().objects.create_user(
+            f'benchmark-{name}@example.com',
+            login=f'benchmark-{name}'
+        )
+        tags = Tag.objects.bulk_create(
+            [Tag(user=user, name=f'tag {index}') for index in range(10)]
+        )
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(user=user, name=f'ingredient {index}')
+            for index in range(10)
+        ])
+        recipes = Recipe.objects.bulk_create([
+            Recipe(user=user, title=f'Recipe {index}', time_minutes=10,
+                   price=5, description='Benchmark')
+            for index in range(count)
+        ])
+        for index, recipe in enumerate(recipes):
+            recipe.tags.set(tags[index % 10:index % 10 + 3])
+            recipe.ingredients.set(ingredients[index % 10:index % 10 + 3])
+
+        self.token = Token.objects.create(user=user).key
+        self.recipe_ids = [recipe.id for recipe in recipes]
+        return user
+
+    def paths(self, namespace):
+        """Return the read endpoints of a URL namespace in request order."""
+        paths = [
+            reverse(f'{namespace}:recipe-list'),
+            reverse(f'{namespace}:tag-list'),
+            reverse(f'{namespace}:ingredient-list'),
+        ]
+        paths += [
+            reverse(f'{namespace}:recipe-detail', args=[recipe_id])
+            for recipe_id in self.recipe_ids[:20]
+        ]
+        return paths
+
+    def run_benchmarks(self, user, options):
+        wsgi = get_wsgi_application()
+        asgi = get_asgi_application()
+        threads = options['wsgi_threads']
+        runs = (
+            (f'WSGI, {threads} threads, sync views',
+             self.wsgi_client(wsgi, threads), self.paths('recipe')),
+            ('ASGI, sync views',
+             self.asgi_client(asgi), self.paths('recipe')),
+            ('ASGI, async views',
+             self.asgi_client(asgi), self.paths('recipe-async')),
+        )
+
+        self.stdout.write(
+            f'{options["requests"]} requests from '
+            f'{options["connections"]} connections'
+        )
+        for label, client, paths in runs:
+            rate, p50, p99, errors = asyncio.run(self.load(
+                client, paths, options['connections'], options['requests']
+            ))
+            self.stdout.write(
+                f'{label:34} {rate:8.1f} req/s  p50 {p50 * 1000:8.1f} ms  '
+                f'p99 {p99 * 1000:8.1f} ms  {errors} errors'
+            )
+
+    async def load(self, client, paths, connections, requests):
+        """Send requests from concurrent connections and time them."""
+        paths = cycle(paths)
+        remaining = requests
+        latencies = []
+        errors = 0
+
+        async def connection():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                status = await client(next(paths))
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(connection() for _ in range(connections)))
+        elapsed = time.perf_counter() - start
+
+        return (
+            len(latencies) / elapsed,
+            percentile(latencies, 0.5),
+            percentile(latencies, 0.99),
+            errors,
+        )
+
+    def asgi_client(self, application):
+        authorization = f'Token {self.token}'.encode()
+
+        async def request(path):
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'query_string': b'',
+                'root_path': '',
+                'headers': [
+                    (b'host', b'benchmark'),
+                    (b'authorization', authorization),
+                ],
+                'client': ('127.0.0.1', 0),
+                'server': ('benchmark', 80),
+            }
+            status = None
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                nonlocal status
+                if message['type'] == 'http.response.start':
+                    status = message['status']
+
+            await application(scope, receive, send)
+            return status
+
+        return request
+
+    def wsgi_client(self, application, threads):
+        executor = ThreadPoolExecutor(threads)
+        authorization = f'Token {self.token}'
+
+        def call(path):
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': '',
+                'SERVER_NAME': 'benchmark',
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'benchmark',
+                'HTTP_AUTHORIZATION': authorization,
+                'wsgi.input': BytesIO(),
+                'wsgi.url_scheme': 'http',
+                'wsgi.errors': self.stderr,
+            }
+            statuses = []
+
+            def start_response(status, headers, exc_info=None):
+                statuses.append(int(status.split()[0]))
+
+            response = application(environ, start_response)
+            try:
+                for _ in response:
+                    pass
+            finally:
+                response.close()
+            return statuses[0]
+
+        async def request(path):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, call, path)
+
+        return request
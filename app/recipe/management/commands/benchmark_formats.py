@@ -0,0 +1,102 @@
+import gzip
+import time
+import uuid
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.fast import recipe_data, recipe_values
+from recipe.renderers import MessagePackParser, MessagePackRenderer
+
+
+class Command(BaseCommand):
+    """Django command to compare the payload size and speed of formats.
+
+    A page of recipes is rendered as JSON and MessagePack, each with and
+    without gzip at the level the compression middleware uses.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        user = self.create_data(options['rows'])
+        try:
+            request = APIRequestFactory().get('/api/recipe/recipes/')
+            recipes = Recipe.objects.filter(user=user).order_by('-id')
+            data = {
+                'next': None,
+                'previous': None,
+                'results': recipe_data(recipe_values(recipes), request),
+            }
+            self.run_benchmarks(data, options['repeat'])
+        finally:
+            user.delete()
+
+    def create_data(self, count):
+        """Create a user with recipes, tags and ingredients."""
+        name = uuid.uuid4().hex
+        user = get_user_model().objects.create_user(
+            f'benchmark-{name}@example.com',
+            login=f'benchmark-{name}'
+        )
+        tags = Tag.objects.bulk_create(
+            [Tag(user=user, name=f'tag {index}') for index in range(10)]
+        )
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(user=user, name=f'ingredient {index}')
+            for index in range(20)
+        ])
+        recipes = Recipe.objects.bulk_create([
+            Recipe(user=user, title=f'Recipe {index}', time_minutes=10,
+                   price=5, description=f'Benchmark recipe number {index}')
+            for index in range(count)
+        ])
+        for index, recipe in enumerate(recipes):
+            recipe.tags.set(tags[index % 10:index % 10 + 3])
+            recipe.ingredients.set(ingredients[index % 20:index % 20 + 8])
+
+        return user
+
+    def best_time(self, func, repeat):
+        """Return the best wall time of func in milliseconds."""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        return min(timings) * 1000
+
+    def run_benchmarks(self, data, repeat):
+        self.stdout.write(
+            f'{"format":<14} {"bytes":>9} {"encode ms":>10} '
+            f'{"decode ms":>10}'
+        )
+        for name, renderer, parser in (
+            ('json', JSONRenderer(), JSONParser()),
+            ('msgpack', MessagePackRenderer(), MessagePackParser()),
+        ):
+            for compressed in (False, True):
+                def encode():
+                    body = renderer.render(data)
+                    return gzip.compress(body, 6) if compressed else body
+
+                def decode():
+                    body = gzip.decompress(payload) if compressed else payload
+                    return parser.parse(BytesIO(body))
+
+                payload = encode()
+                label = f'{name}+gzip' if compressed else name
+                self.stdout.write(
+                    f'{label:<14} {len(payload):>9} '
+                    f'{self.best_time(encode, repeat):>10.2f} '
+                    f'{self.best_time(decode, repeat):>10.2f}'
+                )
@@ -0,0 +1,159 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.models import Ingredient
+from recipe.pantry import PantryIndex, get_version
+
+RECIPES_SQL = """
+INSERT INTO core_recipe (user_id, title, time_minutes, description, price,
+                         link, image, video)
+SELECT %(user)s, 'Recipe ' || n, 30, 'Benchmark', 5, '', '', ''
+FROM generate_series(1, %(count)s) n
+"""
+
+# Common ingredients are drawn far more often than rare ones.
+LINKS_SQL = """
+INSERT INTO core_recipe_ingredients (recipe_id, ingredient_id)
+SELECT DISTINCT recipe.id,
+       (%(ids)s::integer[])[1 + floor(power(random(), 3) * %(size)s)::integer]
+FROM core_recipe recipe, generate_series(1, %(slots)s) slot
+WHERE recipe.user_id = %(user)s
+"""
+
+# The same query as a join on the link table, run per request.
+JOIN_SQL = """
+SELECT link.recipe_id
+FROM core_recipe_ingredients link
+JOIN core_recipe recipe ON recipe.id = link.recipe_id
+WHERE recipe.user_id = %(user)s
+GROUP BY link.recipe_id
+HAVING count(*) FILTER (
+    WHERE link.ingredient_id <> ALL(%(pantry)s::integer[])
+) <= %(missing)s
+"""
+
+CLEANUP_SQL = (
+    'DELETE FROM core_recipe_ingredients WHERE recipe_id IN '
+    '(SELECT id FROM core_recipe WHERE user_id = %(user)s)',
+    'DELETE FROM core_recipe WHERE user_id = %(user)s',
+)
+
+
+class Command(BaseCommand):
+    """Django command to compare the pantry index with a join.
+
+    Both answer the same pantries for every allowed number of missing
+    ingredients, and their results are checked to match.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--pantry', type=int, default=300)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--missing', type=int, default=2)
+
+    def handle(self, *args, **options):
+        user = self.create_data(options)
+        try:
+            self.run_benchmarks(user, options)
+        finally:
+            with connection.cursor() as cursor:
+                for sql in CLEANUP_SQL:
+                    cursor.execute(sql, {'user': user.id})
+            user.delete()
+
+    def create_data(self, options):
+        """Create a user with many recipes linked without signals."""
+        name = uuid.uuid4().hex
+        user = get_user_model().objects.create_user(
+            f'benchmark-{name}@example.com',
+            login=f'benchmark-{name}'
+        )
+        self.ingredient_ids = [
+            ingredient.id for ingredient in Ingredient.objects.bulk_create([
+                Ingredient(user=user, name=f'ingredient {index}')
+                for index in range(options['ingredients'])
+            ])
+        ]
+
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT setseed(0.5)')
+            cursor.execute(
+                RECIPES_SQL, {'user': user.id, 'count': options['recipes']}
+            )
+            cursor.execute(LINKS_SQL, {
+                'user': user.id,
+                'ids': self.ingredient_ids,
+                'size': len(self.ingredient_ids),
+                'slots': 8,
+            })
+            cursor.execute('ANALYZE core_recipe_ingredients')
+        self.stdout.write(
+            f'Created {options["recipes"]} recipes in '
+            f'{time.perf_counter() - start:.1f} s'
+        )
+
+        return user
+
+    def run_benchmarks(self, user, options):
+        index = PantryIndex(user.id)
+        start = time.perf_counter()
+        index.clear(get_version(user.id))
+        index.load()
+        self.stdout.write(
+            f'Indexed {len(index)} recipes in '
+            f'{time.perf_counter() - start:.2f} s'
+        )
+
+        # Pantries hold the common ingredients more often, like real ones.
+        rng = random.Random(0)
+        weights = [
+            1 / (rank + 1) for rank in range(len(self.ingredient_ids))
+        ]
+        pantries = [
+            set(rng.choices(
+                self.ingredient_ids, weights, k=options['pantry']
+            ))
+            for _ in range(options['queries'])
+        ]
+
+        self.stdout.write(
+            f'{"missing":<8} {"search":<8} {"p50 ms":>8} {"max ms":>8} '
+            f'{"recipes":>8}'
+        )
+        for missing in range(options['missing'] + 1):
+            timings = {'join': [], 'index': []}
+            found = []
+            for pantry in pantries:
+                start = time.perf_counter()
+                with connection.cursor() as cursor:
+                    cursor.execute(JOIN_SQL, {
+                        'user': user.id,
+                        'pantry': sorted(pantry),
+                        'missing': missing,
+                    })
+                    joined = {pk for pk, in cursor.fetchall()}
+                timings['join'].append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                indexed = index.query(pantry, missing)
+                timings['index'].append((time.perf_counter() - start) * 1000)
+
+                if joined != {pk for pk, _ in indexed}:
+                    self.stderr.write(f'Results differ for {missing} missing')
+                found.append(len(joined))
+
+            for label, values in timings.items():
+                self.stdout.write(
+                    f'{missing:<8} {label:<8} '
+                    f'{statistics.median(values):>8.2f} '
+                    f'{max(values):>8.2f} {statistics.mean(found):>8.0f}'
+                )
@@ -0,0 +1,160 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.similar import similar_recipes
+
+# Recipes mostly follow one of many families of dishes, with some
+# ingredients swapped for others drawn towards a few common ones.
+RECIPES_SQL = """
+INSERT INTO core_recipe (user_id, title, time_minutes, description, price,
+                         link, image, video)
+SELECT %(user)s, 'Recipe ' || n, 30, 'Benchmark', 5, '', '', ''
+FROM generate_series(1, %(count)s) n
+"""
+
+LINKS_SQL = """
+INSERT INTO {table} (recipe_id, {column})
+SELECT DISTINCT recipe.id, (%(ids)s::integer[])[1 + CASE
+    WHEN random() < %(kept)s
+        THEN (recipe.id %% %(families)s * 7 + slot * 13) %% %(size)s
+    ELSE floor(power(random(), 3) * %(size)s)::integer
+END]
+FROM core_recipe recipe, generate_series(1, %(slots)s) slot
+WHERE recipe.user_id = %(user)s
+"""
+
+CLEANUP_SQL = (
+    'DELETE FROM core_recipe_tags WHERE recipe_id IN '
+    '(SELECT id FROM core_recipe WHERE user_id = %(user)s)',
+    'DELETE FROM core_recipe_ingredients WHERE recipe_id IN '
+    '(SELECT id FROM core_recipe WHERE user_id = %(user)s)',
+    'DELETE FROM core_recipesignature WHERE user_id = %(user)s',
+    'DELETE FROM core_recipe WHERE user_id = %(user)s',
+)
+
+
+class Command(BaseCommand):
+    """Django command to compare exact and indexed similar recipes.
+
+    The exact search ranks every recipe sharing an ingredient or tag,
+    the indexed one only the candidates sharing a signature band. Both
+    are timed on the same recipes, and the recall of the indexed top
+    results is reported against the exact ones.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--queries', type=int, default=100)
+        parser.add_argument('--limit', type=int, default=10)
+
+    def handle(self, *args, **options):
+        user = self.create_data(options)
+        try:
+            self.run_benchmarks(user, options)
+        finally:
+            with connection.cursor() as cursor:
+                for sql in CLEANUP_SQL:
+                    cursor.execute(sql, {'user': user.id})
+            user.delete()
+
+    def create_data(self, options):
+        """Create a user with many recipes linked without signals."""
+        name = uuid.uuid4().hex
+        user = get_user_model().objects.create_user(
+            f'benchmark-{name}@example.com',
+            login=f'benchmark-{name}'
+        )
+        tags = Tag.objects.bulk_create([
+            Tag(user=user, name=f'tag {index}')
+            for index in range(options['tags'])
+        ])
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(user=user, name=f'ingredient {index}')
+            for index in range(options['ingredients'])
+        ])
+
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT setseed(0.5)')
+            cursor.execute(
+                RECIPES_SQL, {'user': user.id, 'count': options['recipes']}
+            )
+            for table, column, objects, slots in (
+                ('core_recipe_ingredients', 'ingredient_id', ingredients, 9),
+                ('core_recipe_tags', 'tag_id', tags, 3),
+            ):
+                cursor.execute(LINKS_SQL.format(table=table, column=column), {
+                    'user': user.id,
+                    'ids': [obj.id for obj in objects],
+                    'size': len(objects),
+                    'slots': slots,
+                    'families': max(options['recipes'] // 20, 1),
+                    'kept': 0.7,
+                })
+            cursor.execute('ANALYZE core_recipe_ingredients')
+            cursor.execute('ANALYZE core_recipe_tags')
+        self.stdout.write(
+            f'Created {options["recipes"]} recipes in '
+            f'{time.perf_counter() - start:.1f} s'
+        )
+
+        start = time.perf_counter()
+        call_command(
+            'rebuild_similar_index', user=[user.id], stdout=self.stdout
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_recipesignature')
+        self.stdout.write(
+            f'Indexed in {time.perf_counter() - start:.1f} s'
+        )
+
+        return user
+
+    def run_benchmarks(self, user, options):
+        recipe_ids = list(
+            Recipe.objects.filter(user=user).order_by('?')
+            .values_list('id', flat=True)[:options['queries']]
+        )
+        limit = options['limit']
+        timings = {False: [], True: []}
+        results = {False: [], True: []}
+        for recipe_id in recipe_ids:
+            for exact in (True, False):
+                start = time.perf_counter()
+                ranked = similar_recipes(recipe_id, limit, exact=exact)
+                timings[exact].append((time.perf_counter() - start) * 1000)
+                results[exact].append(ranked)
+
+        recalls = []
+        for exact_ranked, indexed in zip(results[True], results[False]):
+            if not exact_ranked:
+                continue
+            # Recipes tied with the last exact result are as good a match.
+            cutoff = exact_ranked[-1][1]
+            found = sum(similarity >= cutoff for _, similarity in indexed)
+            recalls.append(min(found, len(exact_ranked)) / len(exact_ranked))
+
+        self.stdout.write(
+            f'{"search":<8} {"p50 ms":>8} {"p95 ms":>8} {"max ms":>8}'
+        )
+        for label, exact in (('exact', True), ('indexed', False)):
+            values = sorted(timings[exact])
+            self.stdout.write(
+                f'{label:<8} {statistics.median(values):>8.2f} '
+                f'{values[int(len(values) * 0.95) - 1]:>8.2f} '
+                f'{values[-1]:>8.2f}'
+            )
+        if recalls:
+            self.stdout.write(
+                f'Recall of the top {limit}: '
+                f'{statistics.mean(recalls):.3f}'
+            )
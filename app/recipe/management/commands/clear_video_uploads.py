@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from recipe.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    """Django command to delete abandoned recipe video uploads."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=float,
+            help='Age of the last chunk, default RECIPE_VIDEO_UPLOAD_EXPIRY'
+        )
+
+    def handle(self, *args, **options):
+        max_age = None
+        if options['hours'] is not None:
+            max_age = timedelta(hours=options['hours'])
+
+        count = purge_stale_uploads(max_age)
+        self.stdout.write(self.style.SUCCESS(f'{count} uploads deleted'))
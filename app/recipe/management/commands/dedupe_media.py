@@ -0,0 +1,149 @@
+import hashlib
+import os
+import re
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import MediaBlob, Recipe
+from core.storage import blob_name
+from recipe.blobs import MEDIA_FIELDS, delete_unreferenced, storage_report
+from recipe.cache import bump_version
+from recipe.images import FORMATS, VARIANTS, delete_variants, variant_name
+
+BLOB_NAME = re.compile(r'/([0-9a-f]{2})/\1[0-9a-f]{62}(\.[^/]*)?$')
+
+
+def file_digest(path):
+    """Return the sha256 of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as media:
+        for data in iter(lambda: media.read(1024 * 1024), b''):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    """Django command to move recipe media to content addressed names.
+
+    Copies of the same content are merged into one blob, the reference
+    counts are rebuilt and the bytes saved are reported.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report the bytes deduplication would save'
+        )
+
+    def handle(self, *args, **options):
+        self.storage = Recipe._meta.get_field('image').storage
+        self.dry_run = options['dry_run']
+        self.renamed = {}
+        self.seen = set()
+        self.saved = self.moved = self.merged = self.missing = 0
+        users = set()
+
+        for field in MEDIA_FIELDS:
+            recipes = Recipe.objects.exclude(**{field: ''}) \
+                .exclude(**{field: None}) \
+                .values_list('id', 'user_id', field).iterator()
+            for recipe_id, user_id, name in recipes:
+                target = self.adopt(name)
+                if target and target != name and not self.dry_run:
+                    Recipe.objects.filter(id=recipe_id) \
+                        .update(**{field: target})
+                    users.add(user_id)
+
+        verb = 'would be' if self.dry_run else 'were'
+        self.stdout.write(
+            f'{self.moved} files renamed, {self.merged} duplicates '
+            f'{verb} merged, {self.missing} missing, '
+            f'{self.saved} bytes {verb} freed'
+        )
+        if self.dry_run:
+            return
+
+        self.recount()
+        for user_id in users:
+            bump_version(user_id)
+
+        report = storage_report()
+        self.stdout.write(self.style.SUCCESS(
+            '{blobs} blobs stored for {references} references, '
+            '{bytes_stored} bytes stored, {bytes_saved} bytes saved'
+            .format(**report)
+        ))
+
+    def adopt(self, name):
+        """Return the content addressed name of a stored file."""
+        if name in self.renamed:
+            return self.renamed[name]
+        if BLOB_NAME.search(name):
+            self.seen.add(name)
+            return name
+
+        path = self.storage.path(name)
+        if not os.path.exists(path):
+            self.missing += 1
+            self.stderr.write(f'{name}: missing')
+            return None
+
+        digest = file_digest(path)
+        target = blob_name(name, digest)
+        if target in self.seen or os.path.exists(self.storage.path(target)):
+            self.merged += 1
+            self.saved += os.path.getsize(path)
+            if not self.dry_run:
+                os.remove(path)
+                delete_variants(name)
+        else:
+            self.moved += 1
+            if not self.dry_run:
+                self.storage.store_file(path, name, digest)
+                self.move_variants(name, target)
+
+        self.seen.add(target)
+        self.renamed[name] = target
+        return target
+
+    def move_variants(self, name, target):
+        """Keep the image variants of a renamed original."""
+        for variant in VARIANTS:
+            for image_format in FORMATS:
+                old = self.storage.path(variant_name(name, variant,
+                                                     image_format))
+                if os.path.exists(old):
+                    os.replace(old, self.storage.path(
+                        variant_name(target, variant, image_format)
+                    ))
+
+    @transaction.atomic
+    def recount(self):
+        """Rebuild the reference counts from the recipe media fields."""
+        counts = Counter()
+        for field in MEDIA_FIELDS:
+            counts.update(
+                Recipe.objects.exclude(**{field: ''})
+                .exclude(**{field: None})
+                .values_list(field, flat=True)
+                .iterator()
+            )
+
+        blobs = {blob.name: blob for blob in MediaBlob.objects.all()}
+        for blob in blobs.values():
+            blob.refs = counts.get(blob.name, 0)
+        MediaBlob.objects.bulk_update(blobs.values(), ['refs'])
+        MediaBlob.objects.bulk_create([
+            MediaBlob(name=name, size=self.storage.size(name), refs=refs)
+            for name, refs in counts.items()
+            if name not in blobs and self.storage.exists(name)
+        ])
+        # Files moved above counted references the recount replaces.
+        self.storage.discard_reservations()
+        unreferenced = MediaBlob.objects.filter(refs=0)
+        for name in unreferenced.values_list('name', flat=True):
+            transaction.on_commit(
+                lambda name=name: delete_unreferenced(name)
+            )
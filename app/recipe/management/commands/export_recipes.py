@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.export import CHUNK_SIZE, EXPORT_FIELDS, EXPORT_WRITERS, \
+    export_rows
+
+
+class Command(BaseCommand):
+    """Django command to dump recipes as NDJSON or CSV."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=sorted(EXPORT_WRITERS), default='ndjson'
+        )
+        parser.add_argument('--output', help='File to write, default stdout')
+        parser.add_argument('--user', help='Only export recipes of this email')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.all()
+        if options['user']:
+            queryset = queryset.filter(user__email=options['user'])
+
+        fields = EXPORT_FIELDS + ('user_id',)
+        rows = export_rows(
+            queryset,
+            chunk_size=options['chunk_size'],
+            with_user=True
+        )
+        lines = EXPORT_WRITERS[options['format']](rows, fields)
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
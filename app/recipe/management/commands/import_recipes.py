@@ -0,0 +1,78 @@
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.importer import BATCH_SIZE, READERS, RecipeImporter
+
+
+class Command(BaseCommand):
+    """Django command to bulk load recipes from NDJSON or CSV files."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('file')
+        parser.add_argument(
+            '--format', choices=sorted(READERS),
+            help='Input format, guessed from the file extension by default'
+        )
+        parser.add_argument(
+            '--user', help='Email of the owner of every imported recipe'
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore the progress of a previous run of this file'
+        )
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options['file'])
+        if not os.path.isfile(path):
+            raise CommandError(f'{path} does not exist.')
+
+        input_format = options['format'] or \
+            os.path.splitext(path)[1].lstrip('.').lower()
+        if input_format not in READERS:
+            raise CommandError('Unknown format, use --format.')
+
+        user_id = None
+        if options['user']:
+            try:
+                user_id = get_user_model().objects.get(
+                    email=options['user']
+                ).id
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'No user with email {options["user"]}.')
+
+        importer = RecipeImporter(
+            path,
+            os.path.getsize(path),
+            user_id=user_id,
+            batch_size=options['batch_size']
+        )
+        started = time.monotonic()
+
+        def report(done, imported):
+            rate = imported / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(
+                f'{done} records read, {imported} imported '
+                f'({rate:.0f} rows/s)'
+            )
+
+        with open(path, newline='') as source:
+            imported = importer.run(
+                READERS[input_format](source),
+                restart=options['restart'],
+                report=report
+            )
+
+        for record, error in importer.errors[:20]:
+            self.stderr.write(f'Record {record} skipped: {error}')
+        if len(importer.errors) > 20:
+            self.stderr.write(f'... {len(importer.errors) - 20} more skipped')
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} recipes in {elapsed:.1f}s '
+            f'({imported / elapsed:.0f} rows/s).'
+        ))
@@ -0,0 +1,58 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.images import render_variants
+
+
+class Command(BaseCommand):
+    """Django command to generate missing recipe image variants."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Number of processes resizing images'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Regenerate variants that are already up to date'
+        )
+
+    def handle(self, *args, **options):
+        names = Recipe.objects.exclude(image='').exclude(image=None) \
+            .values_list('image', flat=True).iterator()
+        workers = max(options['workers'], 1)
+        self.images = self.written = self.failed = 0
+
+        with ProcessPoolExecutor(workers) as executor:
+            # Keep a bounded number of images queued so memory use does
+            # not grow with the number of recipes.
+            pending = {}
+            for name in names:
+                path = default_storage.path(name)
+                future = executor.submit(render_variants, path,
+                                         options['force'])
+                pending[future] = name
+                if len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._collect(future, pending.pop(future))
+
+            for future in list(pending):
+                self._collect(future, pending.pop(future))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{self.images} images checked, {self.written} variants '
+            f'written, {self.failed} failed'
+        ))
+
+    def _collect(self, future, name):
+        self.images += 1
+        try:
+            self.written += future.result()
+        except Exception as exc:
+            self.failed += 1
+            self.stderr.write(f'{name}: {exc}')
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from recipe.cache import bump_version
+from recipe.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    """Django command to reconcile recipe statistics with the recipes.
+
+    Writes that bypass the model signals, such as queryset updates or
+    raw SQL, leave the statistics behind until this command runs.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='users',
+            help='Only rebuild the statistics of this user id'
+        )
+
+    def handle(self, *args, **options):
+        drift = rebuild_stats(options['users'])
+        for user_id in drift:
+            bump_version(user_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Recipe statistics rebuilt, {sum(drift.values())} rows of '
+            f'{len(drift)} users were out of date'
+        ))
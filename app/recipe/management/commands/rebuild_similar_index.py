@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.similar import index_recipes
+
+
+class Command(BaseCommand):
+    """Django command to recompute the similar recipes signatures.
+
+    Needed once for recipes written before the index existed, after
+    writes that bypass the model signals, and after changing the
+    RECIPE_SIMILAR_BANDS or RECIPE_SIMILAR_ROWS settings.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='users',
+            help='Only rebuild the signatures of this user id'
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.order_by('id')
+        if options['users']:
+            recipes = recipes.filter(user_id__in=options['users'])
+
+        done, last = 0, 0
+        while True:
+            ids = list(
+                recipes.filter(id__gt=last)
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            index_recipes(ids)
+            done += len(ids)
+            last = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Similar recipes index rebuilt for {done} recipes'
+        ))
@@ -0,0 +1,136 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class NameCursorPagination(CursorPagination):
+    """Keyset pagination for user owned recipe attributes."""
+    ordering = ('-name', 'id')
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class CompositeCursorPagination(CursorPagination):
+    """Keyset pagination positioned on every field of the ordering.
+
+    DRF keeps only the first ordering field in the cursor and steps over
+    rows sharing its value with an offset, capped at offset_cutoff. Here
+    the position holds the value of each ordering field, so with a unique
+    last field every position is distinct and any number of ties is paged
+    with a (value, id) comparison alone. The ordering must sort all fields
+    the same direction.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Page the queryset, filtering past the composite position."""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*self._reverse(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            try:
+                queryset = queryset.filter(
+                    self._after(current_position, reverse)
+                )
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = None
+        if has_following_position:
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and \
+                self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _reverse(self, ordering):
+        return tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in ordering
+        )
+
+    def _after(self, position, reverse):
+        """Return a filter for rows past a position in the page order."""
+        values = json.loads(position)
+        if not isinstance(values, list) or \
+                len(values) != len(self.ordering):
+            raise ValueError('Position does not match the ordering.')
+
+        descending = self.ordering[0].startswith('-')
+        lookup = 'lt' if descending != reverse else 'gt'
+        fields = [field.lstrip('-') for field in self.ordering]
+
+        after = Q(**{f'{fields[-1]}__{lookup}': values[-1]})
+        for field, value in zip(fields[-2::-1], values[-2::-1]):
+            after = Q(**{f'{field}__{lookup}': value}) | \
+                Q(**{field: value}) & after
+
+        return after
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            field = field.lstrip('-')
+            if isinstance(instance, dict):
+                values.append(str(instance[field]))
+            else:
+                values.append(str(getattr(instance, field)))
+
+        return json.dumps(values)
+
+
+class RecipeCursorPagination(CompositeCursorPagination):
+    """Keyset pagination for recipes with a client selectable sort key."""
+    ordering = ('-id',)
+    ordering_fields = ('id', 'time_minutes', 'price')
+    ordering_query_param = 'ordering'
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        """Return the requested ordering, breaking ties on the id."""
+        ordering = request.query_params.get(self.ordering_query_param, '')
+        field = ordering.lstrip('-')
+
+        if field not in self.ordering_fields:
+            return self.ordering
+        if field == 'id':
+            return (ordering,)
+
+        direction = '-' if ordering.startswith('-') else ''
+        return (ordering, f'{direction}id')
@@ -0,0 +1,274 @@
+"""Recipes a user can cook with the ingredients of a pantry.
+
+Each process keeps a PantryIndex of the ingredients of the recipes of
+recently queried users. Recipes get a slot in a compact array, and each
+ingredient a bitset of the slots of the recipes needing it, held in a
+Python integer. A query walks the bitsets of the ingredients missing
+from the pantry, counting per recipe up to k missing ingredients with
+bit-sliced counters, so every step works on all recipes at once and no
+join on core_recipe_ingredients runs per request.
+
+Writers record the recipes they changed under a per user version in the
+shared cache. An index behind the current version reloads only the
+recipes changed since, or everything when the changes were evicted or
+not recorded, as for imports.
+"""
+import heapq
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connections, router
+
+from core.models import Recipe
+from recipe.cache import get_cache
+
+# More changed recipes than this are not recorded, readers reload all.
+MAX_RECORDED = 1000
+# Indexes more versions behind than this are rebuilt.
+MAX_BEHIND = 100
+CHANGES_TIMEOUT = 24 * 60 * 60
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+INGREDIENTS_SQL = """
+SELECT link.recipe_id, array_agg(link.ingredient_id)
+FROM core_recipe_ingredients link
+JOIN core_recipe recipe ON recipe.id = link.recipe_id
+WHERE recipe.user_id = %(user)s {where}
+GROUP BY link.recipe_id
+"""
+
+
+def _version_key(user_id):
+    return f'pantry:{user_id}:version'
+
+
+def _changes_key(user_id, version):
+    return f'pantry:{user_id}:changes:{version}'
+
+
+def get_version(user_id):
+    """Return the current pantry index version of a user."""
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+
+    return version
+
+
+def record_changes(user_id, recipe_ids=None):
+    """Note that the ingredients of some recipes of a user changed.
+
+    Without recipe_ids every index of the user is rebuilt.
+    """
+    cache = get_cache()
+    key = _version_key(user_id)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+        return
+
+    if recipe_ids is not None:
+        recipe_ids = sorted(set(recipe_ids))
+        if len(recipe_ids) <= MAX_RECORDED:
+            cache.set(
+                _changes_key(user_id, version), recipe_ids, CHANGES_TIMEOUT
+            )
+
+
+def _bits(value):
+    """Return the positions of the set bits of an integer."""
+    digits = bin(value)[:1:-1]
+    position = digits.find('1')
+    while position != -1:
+        yield position
+        position = digits.find('1', position + 1)
+
+
+class PantryIndex:
+    """Bitsets of the recipes needing each ingredient of one user."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.lock = threading.Lock()
+        self.clear(None)
+
+    def clear(self, version):
+        """Empty the index, to be loaded at a version."""
+        self.version = version
+        self.recipe_ids = array('l')
+        self.needs = []
+        self.slots = {}
+        self.free = []
+        self.postings = {}
+        self.live = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def load(self, recipe_ids=None):
+        """Read the ingredients of some or all recipes of the user."""
+        if recipe_ids is not None and not recipe_ids:
+            return
+
+        params = {'user': self.user_id}
+        where = ''
+        if recipe_ids is not None:
+            params['recipes'] = list(recipe_ids)
+            where = 'AND link.recipe_id = ANY(%(recipes)s)'
+        # The index is stamped with the version of the cache, which a
+        # lagging replica may not have caught up with yet.
+        alias = router.db_for_write(Recipe)
+        with connections[alias].cursor() as cursor:
+            cursor.execute(INGREDIENTS_SQL.format(where=where), params)
+            needs = dict(cursor.fetchall())
+
+        for recipe_id in recipe_ids or ():
+            self.set(recipe_id, needs.get(recipe_id, ()))
+        if recipe_ids is None:
+            for recipe_id, ingredient_ids in sorted(needs.items()):
+                self.set(recipe_id, ingredient_ids)
+
+    def set(self, recipe_id, ingredient_ids):
+        """Replace the ingredients of a recipe, dropping it when none."""
+        ingredient_ids = frozenset(ingredient_ids)
+        slot = self.slots.get(recipe_id)
+        if slot is not None:
+            if self.needs[slot] == ingredient_ids:
+                return
+            bit = 1 << slot
+            for ingredient_id in self.needs[slot]:
+                posting = self.postings[ingredient_id] & ~bit
+                if posting:
+                    self.postings[ingredient_id] = posting
+                else:
+                    del self.postings[ingredient_id]
+            self.live &= ~bit
+            self.needs[slot] = frozenset()
+            self.recipe_ids[slot] = 0
+            del self.slots[recipe_id]
+            self.free.append(slot)
+
+        if not ingredient_ids:
+            return
+
+        if self.free:
+            slot = self.free.pop()
+            self.recipe_ids[slot] = recipe_id
+            self.needs[slot] = ingredient_ids
+        else:
+            slot = len(self.recipe_ids)
+            self.recipe_ids.append(recipe_id)
+            self.needs.append(ingredient_ids)
+        self.slots[recipe_id] = slot
+        bit = 1 << slot
+        for ingredient_id in ingredient_ids:
+            self.postings[ingredient_id] = \
+                self.postings.get(ingredient_id, 0) | bit
+        self.live |= bit
+
+    def missing_counts(self, pantry, missing=0):
+        """Return bitsets of the recipes missing 0 to missing ingredients.
+
+        counts[j] holds the recipes missing at least j + 1 ingredients,
+        found by adding each missing ingredient's bitset to saturating
+        bit-sliced counters.
+        """
+        counts = [0] * (missing + 1)
+        for ingredient_id, posting in self.postings.items():
+            if ingredient_id in pantry:
+                continue
+            for level in range(missing, 0, -1):
+                counts[level] |= counts[level - 1] & posting
+            counts[0] |= posting
+
+        found = []
+        below = self.live
+        for level in counts:
+            found.append(below & ~level)
+            below = level
+
+        return found
+
+    def query(self, pantry, missing=0, limit=None):
+        """Return (recipe id, missing ingredient ids) pairs.
+
+        Recipes missing fewer ingredients come first, then the most
+        recent ones.
+        """
+        pantry = frozenset(pantry)
+        results = []
+        for found in self.missing_counts(pantry, missing):
+            recipe_ids = [self.recipe_ids[slot] for slot in _bits(found)]
+            if limit is None:
+                recipe_ids.sort(reverse=True)
+            else:
+                recipe_ids = heapq.nlargest(limit - len(results), recipe_ids)
+            results.extend(
+                (pk, sorted(self.needs[self.slots[pk]] - pantry))
+                for pk in recipe_ids
+            )
+            if limit is not None and len(results) >= limit:
+                break
+
+        return results
+
+    def refresh(self, version):
+        """Catch up with the recorded changes, returning False if lost."""
+        if self.version is None or \
+                not 0 < version - self.version <= MAX_BEHIND:
+            return False
+
+        changes = get_cache().get_many([
+            _changes_key(self.user_id, number)
+            for number in range(self.version + 1, version + 1)
+        ])
+        if len(changes) < version - self.version:
+            return False
+
+        self.load({pk for recipe_ids in changes.values()
+                   for pk in recipe_ids})
+        self.version = version
+        return True
+
+
+def get_index(user_id):
+    """Return the pantry index of a user kept by this process."""
+    with _lock:
+        index = _indexes.pop(user_id, None) or PantryIndex(user_id)
+        _indexes[user_id] = index
+        while len(_indexes) > settings.RECIPE_PANTRY_INDEXES:
+            _indexes.popitem(last=False)
+
+    return index
+
+
+def clear_indexes():
+    """Forget the pantry indexes of this process."""
+    with _lock:
+        _indexes.clear()
+
+
+def pantry_recipes(user_id, ingredients, missing=0, limit=None):
+    """Return the recipes of a user cookable from some ingredients.
+
+    Pairs of recipe id and the ids of its ingredients missing from the
+    pantry are returned, for recipes missing at most `missing` of them.
+    Recipes without ingredients are left out.
+    """
+    version = get_version(user_id)
+    index = get_index(user_id)
+    with index.lock:
+        if index.version != version and not index.refresh(version):
+            index.clear(version)
+            index.load()
+
+        return index.query(ingredients, missing, limit)
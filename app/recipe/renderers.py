@@ -0,0 +1,75 @@
+import json
+
+import msgpack
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from recipe.export import csv_lines
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Render data as newline delimited JSON, one object per line."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, list):
+            data = [data]
+
+        return ''.join(json.dumps(item) + '\n' for item in data).encode()
+
+
+class CSVRenderer(BaseRenderer):
+    """Content type for CSV exports, whose rows are streamed by the view.
+
+    Other responses, like errors, are rendered as CSV with a column per
+    key, e.g. `detail`.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        rows = data if isinstance(data, list) else [data]
+        rows = [row if isinstance(row, dict) else {'detail': row}
+                for row in rows]
+        fields = list(dict.fromkeys(field for row in rows for field in row))
+        return ''.join(csv_lines(
+            ({field: row.get(field, '') for field in fields} for row in rows),
+            fields
+        )).encode()
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Render data as MessagePack, a compact binary form of JSON.
+
+    Values JSON has no type for are encoded as DRF's JSON renderer does.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return msgpack.packb(data, default=JSONEncoder().default)
+
+
+class MessagePackParser(BaseParser):
+    """Parse MessagePack request bodies."""
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except ValueError as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
@@ -0,0 +1,26 @@
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, \
+    SearchRank
+from django.db.models import F, Func, Value
+
+SEARCH_CONFIG = 'recipe_search'
+
+
+def search_recipes(queryset, text):
+    """Return recipes matching text, best ranked first."""
+    query = SearchQuery(
+        Func(Value(text), function='recipe_unaccent'),
+        config=SEARCH_CONFIG,
+    )
+
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query),
+        headline=SearchHeadline(
+            'description',
+            query,
+            config=SEARCH_CONFIG,
+            start_sel='<mark>',
+            stop_sel='</mark>',
+            max_words=30,
+            min_words=10,
+        ),
+    ).order_by('-rank', '-id')
@@ -1,6 +1,10 @@
+from django.conf import settings
+
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
-from core.models import Tag, Ingredient, Recipe
+from core.models import Tag, Ingredient, Recipe, VideoUpload
+from recipe.images import variant_names
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -19,23 +23,121 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_Fields = ('id',)
 
 
+class NameListSerializer(serializers.Serializer):
+    """Serializer for a list of tag or ingredient names."""
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False,
+        max_length=1000
+    )
+
+    def validate_names(self, value):
+        """Drop repeated names, keeping the order they were sent in."""
+        return list(dict.fromkeys(value))
+
+
+class OwnedManyRelatedField(serializers.ManyRelatedField):
+    """Resolve a list of primary keys with a single query."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        ids = []
+        for pk in data:
+            if isinstance(pk, bool):
+                child.fail('incorrect_type', data_type=type(pk).__name__)
+            try:
+                ids.append(int(pk))
+            except (TypeError, ValueError):
+                child.fail('incorrect_type', data_type=type(pk).__name__)
+        ids = list(dict.fromkeys(ids))
+
+        found = child.get_queryset().in_bulk(ids)
+        missing = [pk for pk in ids if pk not in found]
+        if missing:
+            raise serializers.ValidationError([
+                child.error_messages['does_not_exist'].format(pk_value=pk)
+                for pk in missing
+            ])
+
+        return [found[pk] for pk in ids]
+
+
+class OwnedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field limited to the objects of the request user.
+
+    With many=True every submitted key is checked in one query, and the
+    fetched objects are what save() links.
+    """
+
+    def get_queryset(self):
+        request = self.context.get('request')
+        queryset = super().get_queryset()
+        if request is None:
+            return queryset.none()
+        return queryset.filter(user=request.user)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return OwnedManyRelatedField(**list_kwargs)
+
+
+def image_variant_urls(image_name, storage, request=None):
+    """Return the URLs of the variants of an image by size and format."""
+    variants = {}
+    for variant, names in variant_names(image_name).items():
+        variants[variant] = {}
+        for image_format, name in names.items():
+            url = storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            variants[variant][image_format] = url
+
+    return variants
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Serialize the URLs of the resized variants of a recipe image."""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'image'
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+
+        return image_variant_urls(
+            value.name, value.storage, self.context.get('request')
+        )
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     """Serializer for recipe objects."""
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = OwnedPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
 
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = OwnedPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'title', 'time_minutes', 'description', 'ingredients',
-            'tags', 'price', 'link',
+            'tags', 'price', 'link', 'image_variants',
         )
         read_only_Fields = ('id',)
 
@@ -46,11 +148,90 @@ class RecipeDetailSerializer(RecipeSerializer):
     ingredients = IngredientSerializer(many=True, read_only=True)
 
 
+class RecipeBulkItemSerializer(serializers.ModelSerializer):
+    """Validate one recipe of a bulk write without querying."""
+    id = serializers.IntegerField(required=False)
+    tags = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+
+    class Meta:
+        model = Recipe
+        fields = (
+            'id', 'title', 'time_minutes', 'description', 'ingredients',
+            'tags', 'price', 'link',
+        )
+
+
+class RecipeSearchSerializer(RecipeSerializer):
+    """Serialize a ranked recipe search result."""
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('rank', 'headline')
+
+
+class RecipeSimilarSerializer(RecipeSerializer):
+    """Serialize a recipe similar to another one."""
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('similarity',)
+
+
+class RecipePantrySerializer(RecipeSerializer):
+    """Serialize a recipe with the ingredients missing from a pantry."""
+    missing = serializers.ListField(
+        child=serializers.IntegerField(),
+        read_only=True
+    )
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('missing',)
+
+
+class PantryQuerySerializer(serializers.Serializer):
+    """Serializer for the ingredients of a pantry query."""
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(),
+        max_length=10000
+    )
+    missing = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate_missing(self, value):
+        """Check the allowed missing ingredients are within the limit."""
+        if value > settings.RECIPE_PANTRY_MAX_MISSING:
+            raise serializers.ValidationError(
+                'At most {} missing ingredients.'.format(
+                    settings.RECIPE_PANTRY_MAX_MISSING
+                )
+            )
+        return value
+
+
+class ShoppingListSerializer(serializers.Serializer):
+    """Serializer for the recipes of a shopping list."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=100
+    )
+
+
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serilaizer for uploading images to recipe."""
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'image_variants')
         read_only_fields = ('id',)
 
 
@@ -60,3 +241,29 @@ class RecipeVideoSerilizer(serializers.ModelSerializer):
         model = Recipe
         fields = ('id', 'video')
         read_only_fields = ('id',)
+
+
+class VideoUploadSerializer(serializers.ModelSerializer):
+    """Serializer for resumable recipe video uploads."""
+    sha256 = serializers.RegexField(r'^[0-9a-f]{64}$')
+
+    class Meta:
+        model = VideoUpload
+        fields = ('id', 'recipe', 'filename', 'size', 'sha256', 'offset')
+        read_only_fields = ('id', 'offset')
+
+    def validate_recipe(self, value):
+        """Only allow uploads to the recipes of the user."""
+        if value.user_id != self.context['request'].user.id:
+            raise serializers.ValidationError('Recipe not found.')
+        return value
+
+    def validate_size(self, value):
+        """Check the video fits in the upload limit."""
+        if not 0 < value <= settings.RECIPE_VIDEO_MAX_SIZE:
+            raise serializers.ValidationError(
+                'Videos must be 1 to {} bytes.'.format(
+                    settings.RECIPE_VIDEO_MAX_SIZE
+                )
+            )
+        return value
@@ -0,0 +1,29 @@
+from django.contrib.postgres.aggregates import ArrayAgg
+
+from core.models import Recipe
+
+
+def shopping_list(user, recipe_ids):
+    """Return the ingredients of some recipes of a user, merged.
+
+    Each ingredient appears once, with the ids of the given recipes
+    using it, all read in one grouped query over the link table.
+    Recipes of other users or that do not exist are left out.
+    """
+    rows = Recipe.ingredients.through.objects.filter(
+        recipe_id__in=recipe_ids,
+        recipe__user=user
+    ).values(
+        'ingredient_id', 'ingredient__name'
+    ).annotate(
+        recipes=ArrayAgg('recipe_id', ordering='recipe_id')
+    ).order_by('ingredient__name', 'ingredient_id')
+
+    return [
+        {
+            'id': row['ingredient_id'],
+            'name': row['ingredient__name'],
+            'recipes': row['recipes'],
+        }
+        for row in rows
+    ]
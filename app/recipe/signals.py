@@ -0,0 +1,233 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, \
+    pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recipe, RecipeStat
+from recipe.blobs import MEDIA_FIELDS, media_names, update_references
+from recipe.cache import bump_version
+from recipe.pantry import record_changes
+from recipe.similar import index_recipes
+from recipe.stats import StatsDelta
+
+STAT_FIELDS = ('time_minutes', 'price')
+LINK_STATS = {
+    Recipe.tags.through: ('tag_id', RecipeStat.TAG),
+    Recipe.ingredients.through: ('ingredient_id', RecipeStat.INGREDIENT),
+}
+
+
+def bump_version_on_commit(user_id):
+    """Invalidate the cached responses of a user once the write commits.
+
+    A read served before then would cache the old rows under the new
+    version.
+    """
+    transaction.on_commit(lambda: bump_version(user_id))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_owner_cache(sender, instance, **kwargs):
+    """Invalidate cached responses of the owner of a changed object."""
+    bump_version_on_commit(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_links_cache(sender, instance, action, **kwargs):
+    """Invalidate cached responses when recipe links change."""
+    if action.startswith('post_'):
+        bump_version_on_commit(instance.user_id)
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_saved_values(sender, instance, update_fields=None, **kwargs):
+    """Note the media files and statistics fields before a recipe is saved.
+
+    `_saved_media` and `_saved_stats` stay None when the save does not
+    touch those fields.
+    """
+    fields = [
+        field for field in MEDIA_FIELDS
+        if update_fields is None or field in update_fields
+    ]
+    if update_fields is None or set(STAT_FIELDS).intersection(update_fields):
+        fields.extend(STAT_FIELDS)
+    old = Recipe.objects.filter(pk=instance.pk).values(*fields).first() \
+        if instance.pk and fields else None
+    old = old or {}
+
+    instance._saved_media = None
+    if set(MEDIA_FIELDS).intersection(fields):
+        instance._saved_media = {
+            old[field] for field in MEDIA_FIELDS if old.get(field)
+        }
+    instance._saved_stats = None
+    if STAT_FIELDS[0] in old:
+        instance._saved_stats = {field: old[field] for field in STAT_FIELDS}
+
+
+@receiver(post_save, sender=Recipe)
+def count_media_references(sender, instance, **kwargs):
+    """Update the media reference counts after a recipe is saved."""
+    old_names = getattr(instance, '_saved_media', None)
+    if old_names is not None:
+        update_references(old_names, media_names(instance))
+
+
+@receiver(post_delete, sender=Recipe)
+def release_media(sender, instance, **kwargs):
+    """Release the media files of a deleted recipe."""
+    update_references(media_names(instance), set())
+
+
+@receiver(post_save, sender=Recipe)
+def count_recipe_stats(sender, instance, created, **kwargs):
+    """Count a new or changed recipe in its owner's statistics."""
+    old = getattr(instance, '_saved_stats', None)
+    if not created and old is None:
+        return
+
+    delta = StatsDelta()
+    if old is not None:
+        delta.recipe(instance.user_id, sign=-1, **old)
+    delta.recipe(instance.user_id, instance.time_minutes, instance.price)
+    delta.apply()
+
+
+@receiver(pre_delete, sender=Recipe)
+def remember_recipe_links(sender, instance, **kwargs):
+    """Note the links of a recipe, deleted without m2m_changed signals."""
+    instance._saved_links = {
+        kind: list(
+            through.objects.filter(recipe_id=instance.pk)
+            .values_list(column, flat=True)
+        )
+        for through, (column, kind) in LINK_STATS.items()
+    }
+
+
+@receiver(post_delete, sender=Recipe)
+def uncount_recipe_stats(sender, instance, **kwargs):
+    """Remove a deleted recipe from its owner's statistics."""
+    delta = StatsDelta()
+    delta.recipe(
+        instance.user_id, instance.time_minutes, instance.price, sign=-1
+    )
+    for kind, ids in getattr(instance, '_saved_links', {}).items():
+        delta.links(instance.user_id, kind, ids, sign=-1)
+    delta.apply()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def count_link_stats(sender, instance, action, reverse, pk_set, **kwargs):
+    """Count added or removed recipe links in the owner's statistics.
+
+    With reverse, the instance is a tag or ingredient and pk_set holds
+    recipes.
+    """
+    column, kind = LINK_STATS[sender]
+    if action in ('pre_remove', 'pre_clear'):
+        # Removals list every given id, linked or not, so the links
+        # really removed are read before they go.
+        if reverse:
+            links = sender.objects.filter(**{column: instance.pk})
+            if pk_set is not None:
+                links = links.filter(recipe_id__in=pk_set)
+            instance._removed_links = [instance.pk] * links.count()
+        else:
+            links = sender.objects.filter(recipe_id=instance.pk)
+            if pk_set is not None:
+                links = links.filter(**{f'{column}__in': pk_set})
+            instance._removed_links = list(
+                links.values_list(column, flat=True)
+            )
+        return
+
+    if action in ('post_remove', 'post_clear'):
+        ids, sign = instance._removed_links, -1
+    elif action == 'post_add':
+        ids, sign = [instance.pk] * len(pk_set) if reverse else pk_set, 1
+    else:
+        return
+
+    delta = StatsDelta()
+    delta.links(instance.user_id, kind, ids, sign)
+    delta.apply()
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def drop_link_stats(sender, instance, **kwargs):
+    """Drop the statistics of a deleted tag or ingredient."""
+    kind = RecipeStat.TAG if sender is Tag else RecipeStat.INGREDIENT
+    RecipeStat.objects.filter(
+        user_id=instance.user_id, kind=kind, key=instance.pk
+    ).delete()
+
+
+def record_pantry_changes(user_id, recipe_ids):
+    """Record changed pantry recipes once the transaction commits.
+
+    A pantry index loaded before then would read the old links and be
+    stamped with the new version, never to be refreshed.
+    """
+    recipe_ids = list(recipe_ids)
+    transaction.on_commit(lambda: record_changes(user_id, recipe_ids))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def index_linked_recipes(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Reindex the similarity signatures and pantry of relinked recipes."""
+    column = LINK_STATS[sender][0]
+    if not reverse:
+        recipe_ids = [instance.pk]
+    elif action == 'pre_clear':
+        instance._unlinked_recipes = list(
+            sender.objects.filter(**{column: instance.pk})
+            .values_list('recipe_id', flat=True)
+        )
+        return
+    elif action == 'post_clear':
+        recipe_ids = instance._unlinked_recipes
+    else:
+        recipe_ids = pk_set
+
+    if action.startswith('post_'):
+        index_recipes(recipe_ids)
+        if sender is Recipe.ingredients.through:
+            record_pantry_changes(instance.user_id, recipe_ids)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_linked_recipes(sender, instance, **kwargs):
+    """Note the recipes of a tag or ingredient about to be deleted."""
+    instance._unlinked_recipes = list(
+        instance.recipe_set.values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def index_unlinked_recipes(sender, instance, **kwargs):
+    """Reindex the recipes of a deleted tag or ingredient."""
+    recipe_ids = getattr(instance, '_unlinked_recipes', ())
+    index_recipes(recipe_ids)
+    if sender is Ingredient and recipe_ids:
+        record_pantry_changes(instance.user_id, recipe_ids)
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_pantry_recipe(sender, instance, **kwargs):
+    """Drop a deleted recipe from the pantry indexes."""
+    if getattr(instance, '_saved_links', {}).get(RecipeStat.INGREDIENT):
+        record_pantry_changes(instance.user_id, [instance.pk])
@@ -0,0 +1,202 @@
+"""Similar recipes ranked by the overlap of their ingredients and tags.
+
+A recipe is the set of its ingredient and tag ids. Its MinHash signature
+is cut into bands, each hashed into a band key stored in a GIN indexed
+RecipeSignature row, and recipes sharing a band key are likely to share
+much of their sets. A lookup reads the candidates sharing a band with
+the recipe through the index and ranks them by their exact Jaccard
+similarity, so no request compares the recipe with the whole catalogue.
+
+Signatures are computed in the database from the link tables, by the
+signals when the links of a recipe change, by bulk writes and imports,
+and by rebuild_similar_index after the band settings change.
+"""
+import random
+
+from django.conf import settings
+from django.db import connection
+
+# Hashes are (a * token + b) mod a Mersenne prime, which stays within a
+# bigint for integer ids.
+PRIME = 2 ** 31 - 1
+SEED = 9160
+
+# Ingredient and tag ids are kept apart as even and odd tokens.
+TOKENS_SQL = """
+SELECT link.recipe_id, link.ingredient_id * 2 AS token
+FROM core_recipe_ingredients link JOIN {recipes} USING (recipe_id)
+UNION ALL
+SELECT link.recipe_id, link.tag_id * 2 + 1
+FROM core_recipe_tags link JOIN {recipes} USING (recipe_id)
+"""
+
+CLEAR_SQL = """
+DELETE FROM core_recipesignature WHERE recipe_id IN ({recipes})
+"""
+
+INDEX_SQL = """
+WITH hashes AS (
+    SELECT position, a, b
+    FROM unnest(%(a)s::bigint[], %(b)s::bigint[])
+    WITH ORDINALITY AS hash (a, b, position)
+), indexed AS (
+    {recipes}
+), tokens AS (
+    {tokens}
+), minhashes AS (
+    SELECT token.recipe_id, hash.position,
+           min((hash.a * token.token + hash.b) %% {prime}) AS value
+    FROM tokens token CROSS JOIN hashes hash
+    GROUP BY token.recipe_id, hash.position
+), signatures AS (
+    SELECT recipe_id, array_agg(value ORDER BY position) AS signature
+    FROM minhashes
+    GROUP BY recipe_id
+)
+INSERT INTO core_recipesignature (recipe_id, user_id, bands)
+SELECT signature.recipe_id, recipe.user_id, ARRAY(
+    SELECT (band::bigint << 32) | (hashtext(array_to_string(
+        signature.signature[band * %(rows)s + 1:(band + 1) * %(rows)s], ','
+    ))::bigint & 4294967295)
+    FROM generate_series(0, %(bands)s - 1) band
+    ORDER BY band
+)
+FROM signatures signature
+JOIN core_recipe recipe ON recipe.id = signature.recipe_id
+ORDER BY signature.recipe_id
+ON CONFLICT (recipe_id) DO UPDATE SET bands = EXCLUDED.bands
+"""
+
+# Candidates sharing the most bands come first when there are too many.
+CANDIDATES_SQL = """
+SELECT other.recipe_id
+FROM core_recipesignature other
+JOIN core_recipesignature target ON target.recipe_id = %(recipe)s
+WHERE other.bands && target.bands
+    AND other.user_id = target.user_id
+    AND other.recipe_id <> %(recipe)s
+ORDER BY cardinality(ARRAY(
+    SELECT unnest(other.bands) INTERSECT SELECT unnest(target.bands)
+)) DESC, other.recipe_id
+LIMIT %(candidates)s
+"""
+
+# The exact search reads every recipe sharing a token from the link
+# tables, which are already an inverted index of ingredients and tags.
+EXACT_CANDIDATES_SQL = """
+SELECT link.recipe_id
+FROM core_recipe_ingredients link
+JOIN core_recipe_ingredients target
+    ON target.ingredient_id = link.ingredient_id
+WHERE target.recipe_id = %(recipe)s AND link.recipe_id <> %(recipe)s
+UNION
+SELECT link.recipe_id
+FROM core_recipe_tags link
+JOIN core_recipe_tags target ON target.tag_id = link.tag_id
+WHERE target.recipe_id = %(recipe)s AND link.recipe_id <> %(recipe)s
+"""
+
+RANK_SQL = """
+WITH target AS (
+    {target}
+), candidates AS (
+    {candidates}
+), tokens AS (
+    {tokens}
+), overlap AS (
+    SELECT recipe_id,
+           count(*) FILTER (
+               WHERE token IN (SELECT token FROM target)
+           ) AS shared,
+           count(*) AS size
+    FROM tokens
+    GROUP BY recipe_id
+)
+SELECT recipe_id,
+       shared::float / (size + (SELECT count(*) FROM target) - shared)
+           AS similarity
+FROM overlap
+WHERE shared > 0
+ORDER BY similarity DESC, recipe_id
+LIMIT %(limit)s
+"""
+
+
+def hash_params():
+    """Return the (a, b) coefficients of every MinHash hash."""
+    rng = random.Random(SEED)
+    count = settings.RECIPE_SIMILAR_BANDS * settings.RECIPE_SIMILAR_ROWS
+    return [
+        (rng.randrange(1, PRIME), rng.randrange(0, PRIME))
+        for _ in range(count)
+    ]
+
+
+def _index(cursor, recipes, params):
+    """Recompute the signatures of the recipes selected by recipes.
+
+    Recipes without ingredients or tags lose their signature, as they
+    are similar to nothing.
+    """
+    coefficients = hash_params()
+    cursor.execute(CLEAR_SQL.format(recipes=recipes), params)
+    cursor.execute(
+        INDEX_SQL.format(
+            recipes=recipes,
+            tokens=TOKENS_SQL.format(recipes='indexed'),
+            prime=PRIME
+        ),
+        {
+            **params,
+            'a': [a for a, _ in coefficients],
+            'b': [b for _, b in coefficients],
+            'bands': settings.RECIPE_SIMILAR_BANDS,
+            'rows': settings.RECIPE_SIMILAR_ROWS,
+        }
+    )
+
+
+def index_recipes(recipe_ids):
+    """Recompute the signatures of some recipes."""
+    recipe_ids = sorted(set(recipe_ids))
+    if not recipe_ids:
+        return
+
+    with connection.cursor() as cursor:
+        _index(
+            cursor,
+            'SELECT unnest(%(ids)s::integer[]) AS recipe_id',
+            {'ids': recipe_ids}
+        )
+
+
+def index_staged_recipes(cursor):
+    """Compute the signatures of the recipes of the import staging table."""
+    _index(cursor, 'SELECT recipe_id FROM import_recipe', {})
+
+
+def similar_recipes(recipe_id, limit=10, exact=False):
+    """Return (recipe id, similarity) pairs of the most similar recipes.
+
+    The similarity is the Jaccard index of the ingredient and tag ids of
+    both recipes. Candidates come from the signature index, or with
+    exact from every recipe sharing an ingredient or tag, which finds
+    all matches but reads whole posting lists of common ingredients.
+    """
+    candidates = EXACT_CANDIDATES_SQL if exact else CANDIDATES_SQL
+    sql = RANK_SQL.format(
+        target=(
+            'SELECT token FROM ({}) target'.format(TOKENS_SQL.format(
+                recipes='(SELECT %(recipe)s::integer AS recipe_id) recipe'
+            ))
+        ),
+        candidates=candidates,
+        tokens=TOKENS_SQL.format(recipes='candidates'),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {
+            'recipe': recipe_id,
+            'candidates': settings.RECIPE_SIMILAR_CANDIDATES,
+            'limit': limit,
+        })
+        return cursor.fetchall()
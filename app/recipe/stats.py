@@ -0,0 +1,240 @@
+"""Per user recipe statistics kept up to date as recipes change.
+
+RecipeStat rows count the recipes of a user per time in minutes, price
+bucket, tag and ingredient. The count, average and percentiles of the
+time, the price histogram and the top tags and ingredients all derive
+from these rows, so reading the statistics costs a few small queries
+whatever the number of recipes. Signals, bulk writes and imports apply
+their changes as deltas, and rebuild_stats reconciles the rows with a
+full aggregate.
+"""
+import math
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+
+from core.models import Ingredient, RecipeStat, Tag
+
+PERCENTILES = (50, 90, 95, 99)
+TOP_LINKS = 10
+LINK_KINDS = (
+    (RecipeStat.TAG, Tag, 'top_tags'),
+    (RecipeStat.INGREDIENT, Ingredient, 'top_ingredients'),
+)
+
+COUNTS_SQL = """
+SELECT user_id, kind, key, count(*) FROM (
+    SELECT recipe.user_id, 'time' AS kind, recipe.time_minutes AS key
+    FROM {recipes} recipe
+    UNION ALL
+    SELECT recipe.user_id, 'price', floor(recipe.price / %(width)s)::integer
+    FROM {recipes} recipe
+    UNION ALL
+    SELECT recipe.user_id, 'tag', link.tag_id
+    FROM core_recipe_tags link
+    JOIN {recipes} recipe ON recipe.{id} = link.recipe_id
+    UNION ALL
+    SELECT recipe.user_id, 'ingredient', link.ingredient_id
+    FROM core_recipe_ingredients link
+    JOIN {recipes} recipe ON recipe.{id} = link.recipe_id
+) counted
+GROUP BY user_id, kind, key
+"""
+
+# Rows are sorted so concurrent writers lock them in the same order.
+UPSERT_SQL = """
+INSERT INTO core_recipestat (user_id, kind, key, count)
+SELECT user_id, kind, key, count
+FROM ({rows}) AS delta (user_id, kind, key, count)
+ORDER BY user_id, kind, key
+ON CONFLICT (user_id, kind, key)
+DO UPDATE SET count = core_recipestat.count + EXCLUDED.count
+"""
+
+DECREMENT_SQL = """
+UPDATE core_recipestat stat SET count = stat.count + delta.count
+FROM (VALUES {values}) AS delta (kind, key, count)
+WHERE stat.user_id = %s AND stat.kind = delta.kind AND stat.key = delta.key
+"""
+
+DRIFT_SQL = """
+SELECT user_id, count(*)
+FROM ({counts}) AS expected (user_id, kind, key, count)
+FULL JOIN (
+    SELECT user_id, kind, key, count FROM core_recipestat
+    WHERE count <> 0 {where}
+) stat USING (user_id, kind, key)
+WHERE expected.count IS DISTINCT FROM stat.count
+GROUP BY user_id
+"""
+
+
+def _width():
+    return Decimal(settings.RECIPE_STATS_PRICE_BUCKET)
+
+
+def price_bucket(price):
+    """Return the histogram bucket of a price."""
+    return math.floor(Decimal(str(price)) / _width())
+
+
+class StatsDelta:
+    """Changes to the recipe statistics of users, applied in one go."""
+
+    def __init__(self):
+        self.counts = defaultdict(Counter)
+
+    def recipe(self, user_id, time_minutes, price, sign=1):
+        """Count a recipe in, or out with sign=-1."""
+        counts = self.counts[user_id]
+        counts[(RecipeStat.TIME, int(time_minutes))] += sign
+        counts[(RecipeStat.PRICE, price_bucket(price))] += sign
+
+    def links(self, user_id, kind, ids, sign=1):
+        """Count links of recipes to tags or ingredients."""
+        counts = self.counts[user_id]
+        for pk in ids:
+            counts[(kind, pk)] += sign
+
+    def apply(self):
+        """Write the changes and forget them.
+
+        Only increments insert rows. Decrements update existing rows, so
+        recipes deleted along with their owner never recreate the rows
+        of a user that is going away.
+        """
+        with connection.cursor() as cursor:
+            for user_id, counts in sorted(self.counts.items()):
+                changes = sorted(
+                    (kind, key, count)
+                    for (kind, key), count in counts.items() if count
+                )
+                added = [change for change in changes if change[2] > 0]
+                removed = [change for change in changes if change[2] < 0]
+                if added:
+                    values = ', '.join(['(%s, %s, %s, %s)'] * len(added))
+                    cursor.execute(
+                        UPSERT_SQL.format(rows=f'VALUES {values}'),
+                        [value for change in added
+                         for value in (user_id, *change)]
+                    )
+                if removed:
+                    values = ', '.join(['(%s, %s, %s)'] * len(removed))
+                    cursor.execute(
+                        DECREMENT_SQL.format(values=values),
+                        [value for change in removed for value in change]
+                        + [user_id]
+                    )
+
+        self.counts.clear()
+
+
+def add_staged_recipes(cursor):
+    """Count the recipes of the import staging table in."""
+    counts = COUNTS_SQL.format(recipes='import_recipe', id='recipe_id')
+    cursor.execute(UPSERT_SQL.format(rows=counts), {'width': _width()})
+
+
+def rebuild_stats(user_ids=None):
+    """Recompute the statistics of some or all users from their recipes.
+
+    Returns how many rows were wrong per user id. Writers wait on a
+    table lock while the rows are rebuilt, so no change is lost or
+    counted twice.
+    """
+    params = {'width': _width()}
+    recipes, where = 'core_recipe', ''
+    if user_ids is not None:
+        params['users'] = list(user_ids)
+        recipes = '(SELECT * FROM core_recipe WHERE user_id = ANY(%(users)s))'
+        where = 'AND user_id = ANY(%(users)s)'
+    counts = COUNTS_SQL.format(recipes=recipes, id='id')
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'LOCK TABLE core_recipestat IN SHARE ROW EXCLUSIVE MODE'
+        )
+        cursor.execute(DRIFT_SQL.format(counts=counts, where=where), params)
+        drift = dict(cursor.fetchall())
+        cursor.execute(
+            'DELETE FROM core_recipestat WHERE true ' + where, params
+        )
+        cursor.execute(UPSERT_SQL.format(rows=counts), params)
+
+    return drift
+
+
+def _time_stats(times, total):
+    """Return the average and percentiles of (minutes, count) pairs."""
+    stats = {'average': None}
+    stats.update((f'p{percentile}', None) for percentile in PERCENTILES)
+    if not total:
+        return stats
+
+    stats['average'] = round(
+        sum(minutes * count for minutes, count in times) / total, 2
+    )
+    percentiles = list(PERCENTILES)
+    seen = 0
+    for minutes, count in times:
+        seen += count
+        while percentiles and seen * 100 >= percentiles[0] * total:
+            stats[f'p{percentiles.pop(0)}'] = minutes
+
+    return stats
+
+
+def _price_histogram(prices):
+    """Return every price bucket from the cheapest to the dearest."""
+    if not prices:
+        return []
+
+    width = _width()
+    counts = dict(prices)
+    return [
+        {
+            'min': '{:.2f}'.format(bucket * width),
+            'max': '{:.2f}'.format((bucket + 1) * width),
+            'recipes': counts.get(bucket, 0),
+        }
+        for bucket in range(prices[0][0], prices[-1][0] + 1)
+    ]
+
+
+def _top_links(user, kind, model):
+    names = model.objects.filter(pk=OuterRef('key')).values('name')
+    rows = RecipeStat.objects.filter(
+        user=user, kind=kind, count__gt=0
+    ).annotate(
+        name=Subquery(names)
+    ).exclude(name=None).order_by('-count', 'key')
+    rows = rows.values_list('key', 'name', 'count')[:TOP_LINKS]
+
+    return [
+        {'id': key, 'name': name, 'recipes': count}
+        for key, name, count in rows
+    ]
+
+
+def recipe_stats(user):
+    """Return the recipe statistics of a user."""
+    rows = RecipeStat.objects.filter(
+        user=user, kind__in=(RecipeStat.TIME, RecipeStat.PRICE), count__gt=0
+    ).order_by('key').values_list('kind', 'key', 'count')
+    times, prices = [], []
+    for kind, key, count in rows:
+        (times if kind == RecipeStat.TIME else prices).append((key, count))
+    total = sum(count for _, count in times)
+
+    stats = {
+        'recipes': total,
+        'time_minutes': _time_stats(times, total),
+        'price_histogram': _price_histogram(prices),
+    }
+    for kind, model, name in LINK_KINDS:
+        stats[name] = _top_links(user, kind, model)
+
+    return stats
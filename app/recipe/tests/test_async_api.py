@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+
+ASYNC_RECIPES_URL = reverse('recipe-async:recipe-list')
+
+
+class AsyncRecipeApiTests(TransactionTestCase):
+    """Test the async read endpoints served next to the sync ones."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'async@gmail.com',
+            'test123'
+        )
+        token = Token.objects.create(user=self.user)
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+        self.sync_client = APIClient()
+        self.sync_client.force_authenticate(self.user)
+        self.client = AsyncClient()
+
+        tag = Tag.objects.create(user=self.user, name='Lakay')
+        ingredient = Ingredient.objects.create(user=self.user, name='diri')
+        for title in ('Diri kole', 'Mayi moulen'):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=title,
+                time_minutes=30,
+                price=4.00
+            )
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+        self.recipe = recipe
+
+    async def test_login_required(self):
+        """Test the async endpoints require authentication."""
+        res = await self.client.get(ASYNC_RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_read_only(self):
+        """Test the async endpoints only serve reads."""
+        res = await self.client.post(ASYNC_RECIPES_URL, {}, **self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_same_responses_as_sync_views(self):
+        """Test the async endpoints answer like the sync endpoints."""
+        pairs = (
+            ('recipe:recipe-list', 'recipe-async:recipe-list', []),
+            ('recipe:recipe-detail', 'recipe-async:recipe-detail',
+             [self.recipe.id]),
+            ('recipe:tag-list', 'recipe-async:tag-list', []),
+            ('recipe:ingredient-list', 'recipe-async:ingredient-list', []),
+        )
+        for sync_name, async_name, args in pairs:
+            expected = self.sync_client.get(reverse(sync_name, args=args))
+            res = APIClient().get(reverse(async_name, args=args), **self.auth)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            data = res.json()
+            if 'results' in data:
+                data, expected = data['results'], expected.json()['results']
+            else:
+                expected = expected.json()
+            self.assertEqual(data, expected)
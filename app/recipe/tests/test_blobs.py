@@ -0,0 +1,164 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from PIL import Image
+
+from core.models import MediaBlob, Recipe
+from recipe.blobs import delete_unreferenced, storage_report
+from recipe.images import variant_names
+
+
+def image_upload_url(recipe_id):
+    """Return URL for recipe image upload"""
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def sample_image(color='orange'):
+    """Return an uploaded JPEG file of the given color."""
+    buffer = BytesIO()
+    Image.new('RGB', (320, 240), color).save(buffer, format='JPEG')
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(RECIPE_IMAGE_WORKERS=0)
+class MediaBlobTests(TransactionTestCase):
+    """Test recipe media is stored once and reference counted."""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        media_settings = override_settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.addCleanup(self.media.cleanup)
+
+        self.user = get_user_model().objects.create_user(
+            'blobs@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipes = [
+            Recipe.objects.create(
+                user=self.user,
+                title=f'Diri {index}',
+                time_minutes=30,
+                price=5.00
+            )
+            for index in range(2)
+        ]
+
+    def storage_path(self, name):
+        return os.path.join(self.media.name, name)
+
+    def upload(self, recipe, color='orange'):
+        res = self.client.post(
+            image_upload_url(recipe.id),
+            {'image': sample_image(color)},
+            format='multipart'
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+        return recipe.image.name
+
+    def test_same_content_stored_once(self):
+        """Test identical uploads share one content addressed file."""
+        first = self.upload(self.recipes[0])
+        second = self.upload(self.recipes[1])
+
+        self.assertEqual(first, second)
+        with open(self.storage_path(first), 'rb') as image:
+            digest = hashlib.sha256(image.read()).hexdigest()
+        self.assertIn(digest, first)
+        self.assertEqual(MediaBlob.objects.get(name=first).refs, 2)
+        self.assertEqual(storage_report()['blobs'], 1)
+        self.assertGreater(storage_report()['bytes_saved'], 0)
+
+    def test_blob_deleted_after_last_reference(self):
+        """Test a blob and its variants go with its last reference."""
+        name = self.upload(self.recipes[0])
+        self.upload(self.recipes[1])
+        thumb = self.storage_path(variant_names(name)['thumb']['webp'])
+
+        self.upload(self.recipes[0], color='green')
+        self.assertTrue(os.path.exists(self.storage_path(name)))
+        self.assertEqual(MediaBlob.objects.get(name=name).refs, 1)
+
+        self.recipes[1].delete()
+        self.assertFalse(os.path.exists(self.storage_path(name)))
+        self.assertFalse(os.path.exists(thumb))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+
+    def test_upload_counted_before_release_deletes(self):
+        """Test a blob released while its content is stored again stays."""
+        name = self.upload(self.recipes[0])
+        copy = self.storage_path('copy.jpg')
+        shutil.copy(self.storage_path(name), copy)
+        with open(copy, 'rb') as image:
+            digest = hashlib.sha256(image.read()).hexdigest()
+        # The last reference is gone, its deletion is still to run.
+        MediaBlob.objects.filter(name=name).update(refs=0)
+
+        storage = Recipe._meta.get_field('image').storage
+        upload_name = os.path.join(
+            os.path.dirname(os.path.dirname(name)), 'photo.jpg'
+        )
+        self.assertEqual(storage.store_file(copy, upload_name, digest), name)
+        delete_unreferenced(name)
+
+        self.assertTrue(os.path.exists(self.storage_path(name)))
+        self.assertEqual(MediaBlob.objects.get(name=name).refs, 1)
+        storage.discard_reservations()
+
+    def test_dedupe_media_command(self):
+        """Test legacy copies are merged and the savings reported."""
+        source = self.storage_path('photo.jpg')
+        Image.new('RGB', (320, 240), 'blue').save(source, format='JPEG')
+        size = os.path.getsize(source)
+        legacy = []
+        for recipe in self.recipes:
+            name = f'uploads/recipe/images/copy-{recipe.id}.jpg'
+            os.makedirs(os.path.dirname(self.storage_path(name)),
+                        exist_ok=True)
+            shutil.copy(source, self.storage_path(name))
+            Recipe.objects.filter(id=recipe.id).update(image=name)
+            legacy.append(name)
+        out = StringIO()
+
+        call_command('dedupe_media', stdout=out)
+
+        names = set(Recipe.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(os.path.exists(self.storage_path(name)))
+        for old in legacy:
+            self.assertFalse(os.path.exists(self.storage_path(old)))
+        self.assertEqual(MediaBlob.objects.get(name=name).refs, 2)
+        self.assertIn(f'{size} bytes were freed', out.getvalue())
+        self.assertIn(f'{size} bytes saved', out.getvalue())
+
+    def test_dedupe_media_dry_run(self):
+        """Test a dry run leaves the files and names untouched."""
+        name = 'uploads/recipe/images/legacy.jpg'
+        os.makedirs(os.path.dirname(self.storage_path(name)))
+        Image.new('RGB', (8, 8)).save(self.storage_path(name), format='JPEG')
+        Recipe.objects.filter(id=self.recipes[0].id).update(image=name)
+
+        call_command('dedupe_media', dry_run=True, stdout=StringIO())
+
+        self.assertTrue(os.path.exists(self.storage_path(name)))
+        self.assertEqual(
+            Recipe.objects.get(id=self.recipes[0].id).image.name,
+            name
+        )
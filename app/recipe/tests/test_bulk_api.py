@@ -0,0 +1,181 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from core.tests.utils import QueryBudgetMixin
+
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def recipe_payload(**params):
+    """Return the payload of one recipe of a bulk request."""
+    payload = {
+        'title': 'Diri Kole',
+        'time_minutes': 45,
+        'price': '12.50',
+        'description': 'Diri ak pwa wouj.',
+    }
+    payload.update(params)
+    return payload
+
+
+class BulkRecipeApiTests(QueryBudgetMixin, TestCase):
+    """Test writing many recipes in one request."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'bulk@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Lakay')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='Pwa wouj'
+        )
+
+    def post(self, items):
+        return self.client.post(BULK_URL, items, format='json')
+
+    def test_bulk_create_recipes(self):
+        """Test creating recipes with their tags and ingredients."""
+        res = self.post([
+            recipe_payload(
+                tags=[self.tag.id],
+                ingredients=[self.ingredient.id]
+            ),
+            recipe_payload(title='Mayi Moulen'),
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        ids = [result['id'] for result in res.data['results']]
+        recipe = Recipe.objects.get(id=ids[0])
+        self.assertEqual(recipe.user, self.user)
+        self.assertEqual(list(recipe.tags.all()), [self.tag])
+        self.assertEqual(list(recipe.ingredients.all()), [self.ingredient])
+        self.assertEqual(Recipe.objects.get(id=ids[1]).title, 'Mayi Moulen')
+
+    def test_bulk_update_recipes(self):
+        """Test items with an id replace that recipe and its links."""
+        recipe = Recipe.objects.create(
+            user=self.user, title='Old', time_minutes=5, price=1
+        )
+        recipe.ingredients.add(self.ingredient)
+
+        res = self.post([
+            recipe_payload(id=recipe.id, title='New', tags=[self.tag.id]),
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'New')
+        self.assertEqual(list(recipe.tags.all()), [self.tag])
+        self.assertEqual(list(recipe.ingredients.all()), [self.ingredient])
+
+    def test_bulk_update_keeps_missing_fields(self):
+        """Test fields left out of an update keep their values."""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Old',
+            time_minutes=5,
+            price=1,
+            description='Pen patat.',
+            link='https://example.com/pen-patat'
+        )
+
+        res = self.post([{'id': recipe.id, 'title': 'Pen Patat'}])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Pen Patat')
+        self.assertEqual(recipe.time_minutes, 5)
+        self.assertEqual(recipe.description, 'Pen patat.')
+        self.assertEqual(recipe.link, 'https://example.com/pen-patat')
+
+    def test_bulk_item_errors_reported(self):
+        """Test invalid items are reported without failing the batch."""
+        user2 = get_user_model().objects.create_user(
+            'bulk2@gmail.com',
+            'test123',
+            login='bulk2'
+        )
+        foreign_tag = Tag.objects.create(user=user2, name='Foreign')
+
+        res = self.post([
+            recipe_payload(),
+            recipe_payload(time_minutes='long'),
+            recipe_payload(tags=[self.tag.id, foreign_tag.id]),
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        results = res.data['results']
+        self.assertIn('id', results[0])
+        self.assertIn('time_minutes', results[1]['errors'])
+        self.assertEqual(results[2]['errors']['tags'], [
+            f'Invalid pk "{foreign_tag.id}" - object does not exist.'
+        ])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_repeated_id_reported(self):
+        """Test a recipe updated twice in one request is an item error."""
+        recipe = Recipe.objects.create(
+            user=self.user, title='Old', time_minutes=5, price=1
+        )
+
+        res = self.post([
+            {'id': recipe.id, 'title': 'New', 'tags': [self.tag.id]},
+            {'id': recipe.id, 'title': 'Newer', 'tags': [self.tag.id]},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        results = res.data['results']
+        self.assertEqual(results[0], {'id': recipe.id})
+        self.assertEqual(
+            results[1]['errors'], {'id': ['Repeated in this request.']}
+        )
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'New')
+        self.assertEqual(list(recipe.tags.all()), [self.tag])
+
+    def test_bulk_update_foreign_recipe_rejected(self):
+        """Test recipes of other users cannot be updated."""
+        user2 = get_user_model().objects.create_user(
+            'bulk3@gmail.com',
+            'test123',
+            login='bulk3'
+        )
+        recipe = Recipe.objects.create(
+            user=user2, title='Theirs', time_minutes=5, price=1
+        )
+
+        res = self.post([recipe_payload(id=recipe.id, title='Mine')])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Theirs')
+
+    def test_bulk_requires_list(self):
+        """Test the payload must be a list of recipes."""
+        res = self.post(recipe_payload())
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_queries_constant(self):
+        """Test the number of queries does not grow with the batch."""
+        def add_items(count):
+            self.items = [
+                recipe_payload(
+                    tags=[self.tag.id],
+                    ingredients=[self.ingredient.id]
+                )
+                for _ in range(count)
+            ]
+
+        self.assertQueriesConstant(
+            lambda: self.post(self.items), add_items, steps=(2, 50)
+        )
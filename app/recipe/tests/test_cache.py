@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from core.tests.utils import QueryBudgetMixin
+from recipe import cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Return the url of a specific recipe based on its id."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Bouyon',
+        'time_minutes': 60,
+        'price': 10.00,
+        'description': 'Bouyon tèt kabrit.'
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ResponseCacheTests(QueryBudgetMixin, TransactionTestCase):
+    """Test the per user response cache of the recipe API.
+
+    Writes invalidate the cache as they commit, so each test commits them.
+    """
+
+    def setUp(self):
+        cache.get_cache().clear()
+        cache.reset_cache_stats()
+        self.user = get_user_model().objects.create_user(
+            'cache@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_served_from_cache(self):
+        """Test a repeated list call runs no queries."""
+        sample_recipe(user=self.user)
+        first = self.client.get(RECIPES_URL)
+
+        second = self.assertQueryBudget(0, self.client.get, RECIPES_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(cache.cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_save_invalidates_cache(self):
+        """Test creating and updating objects invalidates their lists."""
+        self.client.get(TAGS_URL)
+        tag = Tag.objects.create(user=self.user, name='Soup')
+
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.data['results'][0]['name'], 'Soup')
+
+        tag.name = 'Bouyon'
+        tag.save()
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.data['results'][0]['name'], 'Bouyon')
+
+    def test_delete_invalidates_cache(self):
+        """Test deleting a recipe invalidates the cached detail."""
+        recipe = sample_recipe(user=self.user)
+        self.client.get(detail_url(recipe.id))
+
+        recipe.delete()
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_links_invalidate_cache(self):
+        """Test changing recipe tags invalidates the cached detail."""
+        recipe = sample_recipe(user=self.user)
+        self.client.get(detail_url(recipe.id))
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.data['tags'][0]['name'], 'Vegan')
+
+    def test_invalidated_on_commit(self):
+        """Test a write bumps the version only once it commits."""
+        version = cache.get_version(self.user.id)
+
+        with transaction.atomic():
+            Tag.objects.create(user=self.user, name='Soup')
+            self.assertEqual(cache.get_version(self.user.id), version)
+
+        self.assertNotEqual(cache.get_version(self.user.id), version)
+
+    def test_cache_keyed_by_user(self):
+        """Test users never see each other's cached responses."""
+        sample_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+        user2 = get_user_model().objects.create_user(
+            'cache2@gmail.com',
+            'test123',
+            login='cache2'
+        )
+        self.client.force_authenticate(user2)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_version_not_reused_after_eviction(self):
+        """Test a lost version counter never revives stale responses."""
+        version = cache.get_version(self.user.id)
+        cache.get_cache().delete(f'recipe-api:{self.user.id}:version')
+
+        cache.bump_version(self.user.id)
+
+        self.assertNotEqual(cache.get_version(self.user.id), version)
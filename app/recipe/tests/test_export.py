@@ -0,0 +1,139 @@
+import csv
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from core.tests.utils import QueryBudgetMixin
+from recipe.export import export_rows
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Lalo',
+        'time_minutes': 90,
+        'price': 15.00,
+        'description': 'Lalo ak vyann bèf.'
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeExportTests(QueryBudgetMixin, TestCase):
+    """Test exporting recipes."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'export@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.recipe = sample_recipe(user=self.user)
+        self.recipe.tags.add(
+            Tag.objects.create(user=self.user, name='Lakay'),
+            Tag.objects.create(user=self.user, name='Dine')
+        )
+        self.recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Lalo')
+        )
+
+    def export(self, export_format):
+        res = self.client.get(EXPORT_URL, {'format': export_format})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return b''.join(res.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        """Test recipes are streamed as one JSON object per line."""
+        sample_recipe(user=self.user, title='Tasso')
+
+        lines = self.export('ndjson').splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0]), {
+            'id': self.recipe.id,
+            'title': 'Lalo',
+            'time_minutes': 90,
+            'description': 'Lalo ak vyann bèf.',
+            'price': '15.00',
+            'link': '',
+            'tags': ['Dine', 'Lakay'],
+            'ingredients': ['Lalo'],
+        })
+        self.assertEqual(json.loads(lines[1])['tags'], [])
+
+    def test_export_csv(self):
+        """Test recipes are streamed as CSV rows."""
+        rows = list(csv.DictReader(io.StringIO(self.export('csv'))))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Lalo')
+        self.assertEqual(rows[0]['tags'], 'Dine;Lakay')
+
+    def test_export_csv_error(self):
+        """Test an error on a CSV export is a CSV body too."""
+        res = APIClient().get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(res['Content-Type'].startswith('text/csv'))
+        rows = list(csv.DictReader(io.StringIO(res.content.decode())))
+        self.assertEqual(list(rows[0]), ['detail'])
+
+    def test_export_limited_to_user(self):
+        """Test only the recipes of the authenticated user are exported."""
+        user2 = get_user_model().objects.create_user(
+            'export2@gmail.com',
+            'test123',
+            login='export2'
+        )
+        sample_recipe(user=user2)
+
+        self.assertEqual(len(self.export('ndjson').splitlines()), 1)
+
+    def test_export_queries_per_chunk(self):
+        """Test names are fetched per chunk rather than per recipe."""
+        for index in range(4):
+            sample_recipe(user=self.user).tags.add(
+                Tag.objects.create(user=self.user, name=f'tag {index}')
+            )
+
+        rows = self.assertQueryBudget(
+            7, list,
+            export_rows(Recipe.objects.filter(user=self.user), chunk_size=2)
+        )
+
+        self.assertEqual(len(rows), 5)
+
+    def test_export_command(self):
+        """Test the export command writes every recipe to a file."""
+        user2 = get_user_model().objects.create_user(
+            'export3@gmail.com',
+            'test123',
+            login='export3'
+        )
+        sample_recipe(user=user2)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'recipes.ndjson')
+            call_command('export_recipes', output=path)
+            with open(path) as export_file:
+                rows = [json.loads(line) for line in export_file]
+
+        self.assertEqual(
+            {row['user_id'] for row in rows},
+            {self.user.id, user2.id}
+        )
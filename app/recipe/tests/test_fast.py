@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Ingredient, Recipe, Tag
+from recipe import cache
+from recipe.fast import recipe_data, recipe_values
+from recipe.serializers import RecipeSerializer
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class FastListTests(TestCase):
+    """Test the fast list path renders exactly what the serializers do."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            'fast@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('vegan', 'dinner', 'brunch')
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('lam veritab', 'zaboka', 'piman bouk', 'sèl')
+        ]
+        self.recipes = []
+        for index in range(6):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recette {index} « ayisyen »',
+                time_minutes=10 + index % 3,
+                price='{}.{}5'.format(index, index),
+                description='Liy 1\nLiy 2 "kote"',
+                link='https://example.com/r' if index % 2 else ''
+            )
+            recipe.tags.add(*tags[index % 3:])
+            if index:
+                recipe.ingredients.add(*reversed(ingredients[:index]))
+            self.recipes.append(recipe)
+
+        Recipe.objects.filter(pk=self.recipes[1].pk).update(
+            image='uploads/recipe/ab/abcdef.jpg'
+        )
+
+    def get_both(self, url, params=None):
+        """Return the response bodies of the fast and serializer paths."""
+        bodies = []
+        for fast in (True, False):
+            cache.get_cache().clear()
+            with override_settings(RECIPE_FAST_LISTS=fast):
+                res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            bodies.append(res.content)
+
+        return bodies
+
+    def test_recipe_data_matches_serializer(self):
+        """Test recipe_data renders the same bytes as RecipeSerializer."""
+        request = APIRequestFactory().get(RECIPES_URL)
+        queryset = Recipe.objects.filter(user=self.user).order_by('id')
+        rows = recipe_values(queryset)
+        recipes = queryset.prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            Prefetch('ingredients', queryset=Ingredient.objects.order_by('id'))
+        )
+        serializer = RecipeSerializer(
+            recipes, many=True, context={'request': request}
+        )
+
+        fast = JSONRenderer().render(recipe_data(rows, request))
+        slow = JSONRenderer().render(serializer.data)
+
+        self.assertEqual(fast, slow)
+
+    def test_recipe_list_identical(self):
+        """Test the recipe list is identical on both paths."""
+        fast, slow = self.get_both(RECIPES_URL)
+
+        self.assertEqual(fast, slow)
+        self.assertIn(b'abcdef_thumb.webp', fast)
+
+    def test_recipe_pages_identical(self):
+        """Test every sorted and filtered page is identical on both paths."""
+        tag = Tag.objects.get(name='brunch')
+        for params in (
+            {'page_size': 2},
+            {'page_size': 2, 'ordering': 'price'},
+            {'page_size': 4, 'ordering': '-time_minutes'},
+            {'tags': tag.id},
+        ):
+            url = RECIPES_URL
+            while url:
+                fast, slow = self.get_both(url, params)
+                self.assertEqual(fast, slow)
+                url = self.client.get(url, params).data['next']
+                params = None
+
+    def test_tag_and_ingredient_lists_identical(self):
+        """Test tag and ingredient lists are identical on both paths."""
+        for url in (TAGS_URL, INGREDIENTS_URL):
+            fast, slow = self.get_both(url, {'page_size': 2})
+            self.assertEqual(fast, slow)
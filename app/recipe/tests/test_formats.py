@@ -0,0 +1,129 @@
+import gzip
+import json
+
+import msgpack
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe import cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+MSGPACK = 'application/msgpack'
+
+
+class ResponseFormatTests(TestCase):
+    """Test gzip compression and MessagePack negotiation of the API."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            'formats@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Dinner')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='Diri'
+        )
+
+    def add_recipes(self, count):
+        for index in range(count):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Diri djon djon {index}',
+                time_minutes=30,
+                price=8.00,
+                description='Diri ak djon djon nwa.'
+            )
+            recipe.tags.add(self.tag)
+
+    def test_large_list_gzipped(self):
+        """Test large JSON responses are gzipped for clients asking it."""
+        self.add_recipes(20)
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res['Vary'])
+        data = json.loads(gzip.decompress(res.content))
+        self.assertEqual(len(data['results']), 20)
+
+    def test_small_or_unrequested_not_gzipped(self):
+        """Test small responses and clients without gzip are left alone."""
+        res = self.client.get(TAGS_URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+        self.add_recipes(20)
+        res = self.client.get(RECIPES_URL)
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+    def test_streamed_export_gzipped(self):
+        """Test streamed exports are compressed chunk by chunk."""
+        self.add_recipes(5)
+
+        res = self.client.get(
+            EXPORT_URL,
+            {'format': 'ndjson'},
+            HTTP_ACCEPT_ENCODING='gzip'
+        )
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(b''.join(res.streaming_content)).splitlines()
+        self.assertEqual(len(lines), 5)
+
+    def test_msgpack_list(self):
+        """Test lists are rendered as MessagePack when accepted."""
+        self.add_recipes(3)
+        expected = self.client.get(RECIPES_URL).data
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], MSGPACK)
+        self.assertEqual(
+            msgpack.unpackb(res.content),
+            json.loads(json.dumps(expected))
+        )
+
+    def test_msgpack_create(self):
+        """Test a recipe can be created from a MessagePack body."""
+        payload = {
+            'title': 'Lanbi',
+            'time_minutes': 40,
+            'price': '15.00',
+            'description': 'Lanbi boukannen',
+            'tags': [self.tag.id],
+            'ingredients': [self.ingredient.id],
+        }
+
+        res = self.client.post(
+            RECIPES_URL,
+            msgpack.packb(payload),
+            content_type=MSGPACK,
+            HTTP_ACCEPT=MSGPACK
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(msgpack.unpackb(res.content)['title'], 'Lanbi')
+        self.assertTrue(Recipe.objects.filter(title='Lanbi').exists())
+
+    def test_msgpack_invalid_body(self):
+        """Test a malformed MessagePack body is rejected."""
+        res = self.client.post(
+            TAGS_URL,
+            b'\xc1',
+            content_type=MSGPACK
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
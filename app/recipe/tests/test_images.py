@@ -0,0 +1,194 @@
+import os
+import struct
+import tempfile
+from concurrent.futures import Future
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from PIL import Image
+
+from core.models import MediaBlob, Recipe
+from recipe.images import _log_failure, render_variants, variant_names
+
+
+def image_upload_url(recipe_id):
+    """Return URL for recipe image upload"""
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def sample_image(size=(1200, 900), name='photo.jpg'):
+    """Return an uploaded JPEG file of the given size."""
+    buffer = BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+def orientation_exif(orientation):
+    """Return raw EXIF data holding only an orientation tag."""
+    return (
+        b'Exif\x00\x00II*\x00' + struct.pack('<I', 8)
+        + struct.pack('<HHHIHH', 1, 0x0112, 3, 1, orientation, 0)
+        + struct.pack('<I', 0)
+    )
+
+
+@override_settings(RECIPE_IMAGE_WORKERS=0)
+class RecipeImageVariantTests(TestCase):
+    """Test the resized variants of recipe images."""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        media_settings = override_settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.addCleanup(self.media.cleanup)
+
+        self.user = get_user_model().objects.create_user(
+            'images@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Griyo',
+            time_minutes=60,
+            price=12.00
+        )
+
+    def storage_path(self, name):
+        return os.path.join(self.media.name, name)
+
+    def test_upload_generates_variants(self):
+        """Test uploading an image writes every size in every format."""
+        res = self.client.post(
+            image_upload_url(self.recipe.id),
+            {'image': sample_image()},
+            format='multipart'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        names = variant_names(self.recipe.image.name)
+        for variant, formats in names.items():
+            for image_format, name in formats.items():
+                self.assertTrue(
+                    res.data['image_variants'][variant][image_format]
+                    .endswith(name)
+                )
+                self.assertTrue(os.path.exists(self.storage_path(name)))
+
+        with Image.open(self.storage_path(names['thumb']['webp'])) as thumb:
+            self.assertEqual(thumb.size, (160, 160))
+            self.assertEqual(thumb.format, 'WEBP')
+        with Image.open(self.storage_path(names['small']['jpeg'])) as small:
+            self.assertEqual(small.size, (480, 360))
+
+    def test_recipe_detail_lists_variants(self):
+        """Test recipes without images have no variants."""
+        res = self.client.get(
+            reverse('recipe:recipe-detail', args=[self.recipe.id])
+        )
+
+        self.assertIsNone(res.data['image_variants'])
+
+    def test_render_variants_idempotent(self):
+        """Test rendering again only writes missing variants."""
+        path = self.storage_path('photo.jpg')
+        Image.new('RGB', (800, 600)).save(path, format='JPEG')
+
+        self.assertEqual(render_variants(path), 8)
+        self.assertEqual(render_variants(path), 0)
+
+        os.remove(self.storage_path('photo_large.webp'))
+        self.assertEqual(render_variants(path), 1)
+        self.assertEqual(render_variants(path, force=True), 8)
+
+    def test_variants_follow_exif_orientation(self):
+        """Test photos taken sideways are rendered upright."""
+        path = self.storage_path('photo.jpg')
+        Image.new('RGB', (300, 200)).save(
+            path, format='JPEG', exif=orientation_exif(6)
+        )
+
+        render_variants(path)
+
+        with Image.open(self.storage_path('photo_large.jpeg')) as large:
+            self.assertEqual(large.size, (200, 300))
+
+    def test_failed_variants_logged(self):
+        """Test errors raised in the worker pool are logged."""
+        future = Future()
+        future.add_done_callback(_log_failure('uploads/photo.jpg'))
+
+        with self.assertLogs('recipe.images', 'ERROR') as logs:
+            future.set_exception(OSError('cannot identify image file'))
+
+        self.assertIn('uploads/photo.jpg', logs.output[0])
+        self.assertIn('cannot identify image file', logs.output[0])
+
+    def test_rebuild_image_variants_command(self):
+        """Test the command backfills variants in a process pool."""
+        self.recipe.image.save('photo.jpg', sample_image(size=(300, 200)))
+        out = StringIO()
+
+        call_command('rebuild_image_variants', workers=2, stdout=out)
+
+        self.assertIn('1 images checked, 8 variants written', out.getvalue())
+        for formats in variant_names(self.recipe.image.name).values():
+            for name in formats.values():
+                self.assertTrue(os.path.exists(self.storage_path(name)))
+
+
+@override_settings(RECIPE_IMAGE_WORKERS=0)
+class RecipeImageReplaceTests(TransactionTestCase):
+    """Test replacing recipe images, released once committed."""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        media_settings = override_settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.addCleanup(self.media.cleanup)
+
+        self.user = get_user_model().objects.create_user(
+            'replace@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Griyo',
+            time_minutes=60,
+            price=12.00
+        )
+
+    def test_replacing_image_removes_old_variants(self):
+        """Test a replaced image, its blob and its variants are deleted."""
+        url = image_upload_url(self.recipe.id)
+        self.client.post(url, {'image': sample_image()}, format='multipart')
+        self.recipe.refresh_from_db()
+        name = self.recipe.image.name
+        self.assertEqual(MediaBlob.objects.get(name=name).refs, 1)
+        old = variant_names(name)['thumb']['webp']
+
+        self.client.post(
+            url,
+            {'image': sample_image(size=(800, 600))},
+            format='multipart'
+        )
+
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+        self.assertFalse(
+            os.path.exists(os.path.join(self.media.name, name))
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, old)))
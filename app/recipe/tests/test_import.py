@@ -0,0 +1,167 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import Recipe, RecipeImport, Tag
+from recipe.search import search_recipes
+
+
+def recipe_record(**params):
+    """Return one record of an import file."""
+    record = {
+        'title': 'Diri djon djon',
+        'time_minutes': 40,
+        'description': 'Diri ak djon djon.',
+        'price': '8.50',
+        'tags': ['Lakay'],
+        'ingredients': ['diri', 'djon djon'],
+    }
+    record.update(params)
+    return record
+
+
+class ImportRecipesCommandTests(TestCase):
+    """Test the import_recipes management command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'import@gmail.com',
+            'test123'
+        )
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as import_file:
+            import_file.write(content)
+        return path
+
+    def write_ndjson(self, records):
+        return self.write(
+            'recipes.ndjson',
+            ''.join(json.dumps(record) + '\n' for record in records)
+        )
+
+    def import_file(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_recipes', path, user=self.user.email, stdout=out,
+            stderr=err, **options
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_import_ndjson(self):
+        """Test recipes are imported with their tags and ingredients."""
+        existing = Tag.objects.create(user=self.user, name='Lakay')
+        path = self.write_ndjson([
+            recipe_record(),
+            recipe_record(title='Pikliz', tags=['Lakay', 'Pike']),
+        ])
+
+        out, _ = self.import_file(path, batch_size=1)
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
+        self.assertEqual([r.title for r in recipes], ['Diri djon djon',
+                                                      'Pikliz'])
+        self.assertEqual(list(recipes[0].tags.all()), [existing])
+        self.assertEqual(
+            sorted(recipes[1].tags.values_list('name', flat=True)),
+            ['Lakay', 'Pike']
+        )
+        self.assertEqual(recipes[0].ingredients.count(), 2)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertIn('rows/s', out)
+
+    def test_imported_recipes_searchable(self):
+        """Test imported recipes are searchable by their linked names."""
+        path = self.write_ndjson([recipe_record(ingredients=['lalo'])])
+
+        self.import_file(path)
+
+        found = search_recipes(Recipe.objects.filter(user=self.user), 'lalo')
+        self.assertEqual([r.title for r in found], ['Diri djon djon'])
+
+    def test_import_csv(self):
+        """Test recipes are imported from CSV with `;` separated names."""
+        path = self.write(
+            'recipes.csv',
+            'title,time_minutes,description,price,link,tags,ingredients\n'
+            'Akra,30,Fritay,3.00,,Fritay;Lakay,malanga\n'
+        )
+
+        self.import_file(path)
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.title, 'Akra')
+        self.assertEqual(recipe.tags.count(), 2)
+        self.assertEqual(recipe.ingredients.get().name, 'malanga')
+
+    def test_invalid_records_skipped(self):
+        """Test invalid records are reported and the rest imported."""
+        path = self.write(
+            'recipes.ndjson',
+            json.dumps(recipe_record()) + '\n' +
+            '{not json\n' +
+            json.dumps(recipe_record(price='expensive')) + '\n'
+        )
+
+        _, err = self.import_file(path)
+
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+        self.assertIn('Record 2 skipped', err)
+        self.assertIn('Record 3 skipped', err)
+
+    def test_out_of_range_records_skipped(self):
+        """Test values overflowing their columns are skipped, not fatal."""
+        path = self.write_ndjson([
+            recipe_record(time_minutes=10 ** 12),
+            recipe_record(price='999.999'),
+            recipe_record(price='1e30'),
+            recipe_record(price='999.994'),
+        ])
+
+        _, err = self.import_file(path)
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(str(recipe.price), '999.99')
+        for number in (1, 2, 3):
+            self.assertIn(f'Record {number} skipped', err)
+
+    def test_import_resumes(self):
+        """Test a rerun skips the records already imported."""
+        path = self.write_ndjson([
+            recipe_record(title='First'),
+            recipe_record(title='Second'),
+        ])
+        RecipeImport.objects.create(
+            source=path,
+            size=os.path.getsize(path),
+            records_done=1
+        )
+
+        self.import_file(path)
+        self.import_file(path)
+
+        self.assertEqual(
+            list(Recipe.objects.values_list('title', flat=True)),
+            ['Second']
+        )
+        self.assertEqual(
+            RecipeImport.objects.get(source=path).records_done, 2
+        )
+
+    def test_unknown_user_rejected(self):
+        """Test importing for an unknown user fails."""
+        path = self.write_ndjson([recipe_record()])
+
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', path, user='nobody@gmail.com')
@@ -9,6 +9,7 @@ from core.models import Ingredient
 from recipe.serializers import IngredientSerializer
 
 INGREDIENTS_URL = reverse('recipe:ingredient-list')
+INGREDIENTS_BULK_URL = reverse('recipe:ingredient-bulk')
 
 
 class PublicIngredientsApiTest(TestCase):
@@ -45,7 +46,7 @@ class PrivateIngredientsApiTest(TestCase):
         serializer = IngredientSerializer(ingredient, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_user(self):
         """Test Ingredients are returned to authenticated user only."""
@@ -58,8 +59,8 @@ class PrivateIngredientsApiTest(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
 
     def test_create_ingredient_successfully(self):
         """Test Ingredient is created successfully."""
@@ -79,3 +80,26 @@ class PrivateIngredientsApiTest(TestCase):
         res = self.client.post(INGREDIENTS_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_duplicate_ingredient_rejected(self):
+        """Test a user cannot create two ingredients with the same name."""
+        Ingredient.objects.create(user=self.user, name='sugar')
+
+        res = self.client.post(INGREDIENTS_URL, {'name': 'sugar'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_get_or_create_ingredients(self):
+        """Test ingredients are fetched or created by name in one call."""
+        existing = Ingredient.objects.create(user=self.user, name='salt')
+        payload = {'names': ['salt', 'pepper']}
+
+        res = self.client.post(INGREDIENTS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0], {'id': existing.id, 'name': 'salt'})
+        self.assertTrue(Ingredient.objects.filter(
+            user=self.user,
+            name='pepper',
+            id=res.data[1]['id']
+        ).exists())
@@ -0,0 +1,179 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+from recipe import cache, pantry
+
+PANTRY_URL = reverse('recipe:recipe-pantry')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def sample_recipe(user, ingredients=(), **params):
+    """Create and return a sample recipe with its ingredients."""
+    defaults = {
+        'title': 'Soup joumou',
+        'time_minutes': 90,
+        'price': 12.00,
+    }
+    defaults.update(params)
+    recipe = Recipe.objects.create(user=user, **defaults)
+    recipe.ingredients.set(ingredients)
+
+    return recipe
+
+
+class PublicPantryApiTests(TestCase):
+    """Test the publicly available pantry API."""
+
+    def test_login_required(self):
+        """Test that login is required to query a pantry."""
+        res = APIClient().post(PANTRY_URL, {'ingredients': []}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivatePantryApiTests(TransactionTestCase):
+    """Test the pantry API as an authenticated user.
+
+    Changes are recorded as their transaction commits, so each test
+    commits its writes.
+    """
+
+    def setUp(self):
+        cache.get_cache().clear()
+        pantry.clear_indexes()
+        self.user = get_user_model().objects.create_user(
+            'pantry@gmail.com',
+            'test123',
+            login='pantry'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.diri, self.pwa, self.lwil, self.lay = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('diri', 'pwa', 'lwil', 'lay')
+        ]
+
+    def query(self, ingredients, **params):
+        """Query the pantry and return (recipe id, missing ids) pairs."""
+        payload = {
+            'ingredients': [ingredient.id for ingredient in ingredients],
+            **params,
+        }
+        res = self.client.post(PANTRY_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [(item['id'], item['missing']) for item in res.data]
+
+    def test_subset_recipes(self):
+        """Test only recipes needing nothing else are returned."""
+        rice = sample_recipe(self.user, [self.diri, self.lwil])
+        sample_recipe(self.user, [self.diri, self.pwa, self.lwil])
+        sample_recipe(self.user)
+
+        self.assertEqual(
+            self.query([self.diri, self.lwil, self.lay]), [(rice.id, [])]
+        )
+
+    def test_missing_ingredients(self):
+        """Test recipes missing a few ingredients come after the others."""
+        rice = sample_recipe(self.user, [self.diri, self.lwil])
+        beans = sample_recipe(self.user, [self.diri, self.pwa, self.lwil])
+        sample_recipe(self.user, [self.pwa, self.lay, self.lwil])
+
+        self.assertEqual(
+            self.query([self.diri, self.lwil], missing=1),
+            [(rice.id, []), (beans.id, [self.pwa.id])]
+        )
+        self.assertEqual(
+            self.query([self.diri, self.lwil], missing=1, limit=1),
+            [(rice.id, [])]
+        )
+
+    def test_limited_to_user(self):
+        """Test recipes of other users are never returned."""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'test123',
+            login='other'
+        )
+        sample_recipe(other, [self.diri])
+
+        self.assertEqual(self.query([self.diri]), [])
+
+    def test_invalid_query(self):
+        """Test too many missing ingredients are rejected."""
+        res = self.client.post(
+            PANTRY_URL,
+            {'ingredients': [self.diri.id], 'missing': 100},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_follows_changes(self):
+        """Test the index catches up with every kind of ingredient write."""
+        rice = sample_recipe(self.user, [self.diri])
+        self.assertEqual(self.query([self.diri]), [(rice.id, [])])
+
+        rice.ingredients.add(self.pwa)
+        self.assertEqual(self.query([self.diri]), [])
+
+        self.pwa.recipe_set.remove(rice)
+        self.assertEqual(self.query([self.diri]), [(rice.id, [])])
+
+        res = self.client.post(BULK_URL, [
+            {'id': rice.id, 'title': 'Soup joumou', 'time_minutes': 90,
+             'price': '12.00', 'description': 'Soup joumou ak lay',
+             'ingredients': [self.lay.id]},
+            {'title': 'Diri', 'time_minutes': 20, 'price': '3.00',
+             'description': 'Diri blan', 'ingredients': [self.diri.id]},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        plain = res.data['results'][1]['id']
+        self.assertEqual(self.query([self.diri]), [(plain, [])])
+
+        self.diri.delete()
+        self.assertEqual(self.query([self.lay]), [(rice.id, [])])
+
+        rice.delete()
+        self.assertEqual(self.query([self.lay]), [])
+
+    def test_index_refreshed_incrementally(self):
+        """Test an index behind the version reloads only changed recipes."""
+        rice = sample_recipe(self.user, [self.diri])
+        self.query([self.diri])
+        index = pantry.get_index(self.user.id)
+
+        beans = sample_recipe(self.user, [self.pwa])
+        with self.assertNumQueries(1):
+            found = pantry.pantry_recipes(
+                self.user.id, [self.diri.id, self.pwa.id]
+            )
+        self.assertEqual(found, [(beans.id, []), (rice.id, [])])
+        self.assertIs(pantry.get_index(self.user.id), index)
+
+        pantry.record_changes(self.user.id)
+        self.assertEqual(
+            pantry.pantry_recipes(self.user.id, [self.pwa.id]),
+            [(beans.id, [])]
+        )
+        self.assertEqual(len(index), 2)
+
+    def test_changes_recorded_on_commit(self):
+        """Test a query before the links commit does not stamp them."""
+        rice = sample_recipe(self.user, [self.diri])
+        self.assertEqual(self.query([self.diri]), [(rice.id, [])])
+        version = pantry.get_version(self.user.id)
+
+        with transaction.atomic():
+            rice.ingredients.add(self.pwa)
+            self.assertEqual(pantry.get_version(self.user.id), version)
+
+        self.assertEqual(pantry.get_version(self.user.id), version + 1)
+        self.assertEqual(self.query([self.diri]), [])
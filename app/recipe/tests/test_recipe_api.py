@@ -1,12 +1,19 @@
+from base64 import b64encode
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
 
 from core.models import Recipe, Tag, Ingredient
+from core.tests.utils import QueryBudgetMixin
+from recipe.pagination import RecipeCursorPagination
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 import tempfile
@@ -88,7 +95,7 @@ class PrivateRecipeApiTest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipes_limited_authenticated_user(self):
         """Test Recipe can only be retireved to an authenticated user."""
@@ -104,8 +111,8 @@ class PrivateRecipeApiTest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_view_recipe_detail(self):
         """Test a recipe detail can be viewed."""
@@ -178,6 +185,31 @@ class PrivateRecipeApiTest(TestCase):
         self.assertIn(ingredient1, ingredients)
         self.assertIn(ingredient2, ingredients)
 
+    def test_create_recipe_with_foreign_ids(self):
+        """Test other users' tags and ingredients cannot be attached."""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'test123',
+            login='other'
+        )
+        tag = sample_tag(user=other)
+        ingredient = sample_ingredient(user=self.user)
+        payload = {
+            'title': 'Diri kole',
+            'time_minutes': 40,
+            'price': 6.00,
+            'description': 'Diri ak pwa',
+            'tags': [tag.id],
+            'ingredients': [ingredient.id, 9999, 9998],
+        }
+
+        res = self.client.post(RECIPE_URLS, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data['tags']), 1)
+        self.assertEqual(len(res.data['ingredients']), 2)
+        self.assertFalse(Recipe.objects.exists())
+
     def test_partial_update_recipe(self):
         """Test updating a recipe partially with patch."""
         recipe = sample_recipe(user=self.user)
@@ -220,6 +252,274 @@ class PrivateRecipeApiTest(TestCase):
         self.assertEqual(recipe.description, payload['description'])
 
 
+class RecipeQueryBudgetTests(QueryBudgetMixin, TransactionTestCase):
+    """Test recipe endpoints do not issue queries per recipe.
+
+    Added rows must commit to invalidate the cached list.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'budget@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_recipes(self, count):
+        """Create recipes with a tag and an ingredient each."""
+        for _ in range(count):
+            recipe = sample_recipe(user=self.user)
+            recipe.tags.add(sample_tag(self.user, f'tag {recipe.id}'))
+            recipe.ingredients.add(
+                sample_ingredient(self.user, f'ingredient {recipe.id}')
+            )
+
+    def test_list_queries_constant(self):
+        """Test listing recipes costs the same number of queries."""
+        self.assertQueriesConstant(
+            lambda: self.client.get(RECIPE_URLS),
+            self.add_recipes
+        )
+
+    def test_list_query_budget(self):
+        """Test listing recipes prefetches tags and ingredients."""
+        self.add_recipes(3)
+        res = self.assertQueryBudget(3, self.client.get, RECIPE_URLS)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail_query_budget(self):
+        """Test retrieving a recipe prefetches nested tags and ingredients."""
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(
+            sample_tag(user=self.user),
+            sample_tag(user=self.user, name='dinner')
+        )
+        recipe.ingredients.add(sample_ingredient(user=self.user))
+
+        res = self.assertQueryBudget(
+            3, self.client.get, detail_url(recipe.id)
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, RecipeDetailSerializer(recipe).data)
+
+    def test_deep_page_query_budget(self):
+        """Test a later page costs the same queries as the first one."""
+        self.add_recipes(6)
+
+        res = self.assertQueryBudget(
+            3, self.client.get, RECIPE_URLS, {'page_size': 2}
+        )
+        while res.data['next']:
+            res = self.assertQueryBudget(3, self.client.get, res.data['next'])
+
+    def test_related_ids_validated_in_one_query(self):
+        """Test tag and ingredient ids are each checked with one query."""
+        ingredients = [
+            sample_ingredient(self.user, f'ingredient {i}') for i in range(40)
+        ]
+        payload = {
+            'title': 'Soup joumou',
+            'time_minutes': 90,
+            'price': 12.00,
+            'description': 'Soup premye janvye',
+            'tags': [sample_tag(self.user).id],
+            'ingredients': [ingredient.id for ingredient in ingredients],
+        }
+        request = APIRequestFactory().post(RECIPE_URLS)
+        request.user = self.user
+        serializer = RecipeSerializer(
+            data=payload, context={'request': request}
+        )
+
+        valid = self.assertQueryBudget(2, serializer.is_valid)
+
+        self.assertTrue(valid)
+        self.assertEqual(
+            serializer.validated_data['ingredients'], ingredients
+        )
+
+
+class RecipePaginationTests(TestCase):
+    """Test keyset pagination of the recipe list."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'pages@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def collect(self, params):
+        """Follow next links and return every recipe id returned.
+
+        Paging stops once more ids than recipes were returned.
+        """
+        res = self.client.get(RECIPE_URLS, params)
+        ids = [recipe['id'] for recipe in res.data['results']]
+        total = Recipe.objects.count()
+        while res.data['next'] and len(ids) <= total:
+            res = self.client.get(res.data['next'])
+            ids += [recipe['id'] for recipe in res.data['results']]
+
+        return ids
+
+    def test_recipes_paged_newest_first(self):
+        """Test recipes are paged by descending id by default."""
+        recipes = [sample_recipe(user=self.user) for _ in range(5)]
+
+        ids = self.collect({'page_size': 2})
+
+        self.assertEqual(ids, [recipe.id for recipe in reversed(recipes)])
+
+    def test_recipes_paged_by_selected_key(self):
+        """Test recipes can be paged by price with ties broken on id."""
+        cheap = sample_recipe(user=self.user, price=2.00)
+        tie1 = sample_recipe(user=self.user, price=4.00)
+        tie2 = sample_recipe(user=self.user, price=4.00)
+        dear = sample_recipe(user=self.user, price=9.00)
+
+        ids = self.collect({'page_size': 1, 'ordering': '-price'})
+
+        self.assertEqual(ids, [dear.id, tie2.id, tie1.id, cheap.id])
+
+    def test_ties_paged_past_offset_cutoff(self):
+        """Test rows sharing a sort value are paged without an offset."""
+        recipes = [sample_recipe(user=self.user, price=4.00) for _ in range(7)]
+        cheap = sample_recipe(user=self.user, price=2.00)
+
+        with patch.object(RecipeCursorPagination, 'offset_cutoff', 1):
+            ids = self.collect({'page_size': 2, 'ordering': 'price'})
+
+        self.assertEqual(ids, [cheap.id] + [recipe.id for recipe in recipes])
+
+    def test_ties_paged_backwards(self):
+        """Test previous links walk back through rows sharing a value."""
+        recipes = [sample_recipe(user=self.user, price=4.00) for _ in range(5)]
+        res = self.client.get(
+            RECIPE_URLS, {'page_size': 2, 'ordering': '-price'}
+        )
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        while res.data['previous']:
+            res = self.client.get(res.data['previous'])
+            ids = [recipe['id'] for recipe in res.data['results']] + ids
+
+        self.assertEqual(ids, [recipe.id for recipe in reversed(recipes)])
+
+    def test_invalid_cursor_rejected(self):
+        """Test a cursor not matching the ordering is not found."""
+        sample_recipe(user=self.user, price=4.00)
+        cursor = b64encode(b'p=%5B%22x%22%5D').decode('ascii')
+
+        res = self.client.get(
+            RECIPE_URLS, {'ordering': 'price', 'cursor': cursor}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unknown_ordering_ignored(self):
+        """Test an unsupported sort key falls back to the default."""
+        recipe1 = sample_recipe(user=self.user)
+        recipe2 = sample_recipe(user=self.user)
+
+        ids = self.collect({'ordering': 'description'})
+
+        self.assertEqual(ids, [recipe2.id, recipe1.id])
+
+
+class RecipeFilterTests(TestCase):
+    """Test filtering the recipe list by tags and ingredients."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'filter@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.vegan = sample_tag(user=self.user, name='Vegan')
+        self.spicy = sample_tag(user=self.user, name='Spicy')
+        self.rice = sample_ingredient(user=self.user, name='Diri')
+
+        self.both = sample_recipe(user=self.user, title='Pikliz')
+        self.both.tags.add(self.vegan, self.spicy)
+        self.vegan_only = sample_recipe(user=self.user, title='Legim')
+        self.vegan_only.tags.add(self.vegan)
+        self.vegan_only.ingredients.add(self.rice)
+        self.untagged = sample_recipe(user=self.user, title='Griyo')
+
+    def filtered_ids(self, params):
+        """Return the ids of the recipes listed with params."""
+        res = self.client.get(RECIPE_URLS, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return {recipe['id'] for recipe in res.data['results']}
+
+    def explain_list(self, params):
+        """Return the query plan of the recipe list query."""
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(RECIPE_URLS, params)
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('EXPLAIN ' + context.captured_queries[0]['sql'])
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def test_filter_tags_any(self):
+        """Test returning recipes with any of the given tags."""
+        ids = self.filtered_ids({'tags': f'{self.vegan.id},{self.spicy.id}'})
+
+        self.assertEqual(ids, {self.both.id, self.vegan_only.id})
+
+    def test_filter_tags_all(self):
+        """Test returning recipes with all of the given tags."""
+        ids = self.filtered_ids({
+            'tags': f'{self.vegan.id},{self.spicy.id},{self.spicy.id}',
+            'match': 'all',
+        })
+
+        self.assertEqual(ids, {self.both.id})
+
+    def test_filter_tags_and_ingredients(self):
+        """Test tag and ingredient filters are combined."""
+        ids = self.filtered_ids({
+            'tags': str(self.vegan.id),
+            'ingredients': str(self.rice.id),
+        })
+
+        self.assertEqual(ids, {self.vegan_only.id})
+
+    def test_filter_invalid_params(self):
+        """Test malformed filter params are rejected."""
+        res = self.client.get(RECIPE_URLS, {'tags': '1,a'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(RECIPE_URLS, {'tags': '1', 'match': 'some'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_all_uses_link_index(self):
+        """Test the match all filter reads the tag link index."""
+        plan = self.explain_list({
+            'tags': f'{self.vegan.id},{self.spicy.id}',
+            'match': 'all',
+        })
+
+        self.assertIn('core_recipe_tags_tag_recipe_idx', plan)
+
+    def test_filter_any_uses_link_index(self):
+        """Test the match any filter reads the ingredient link index."""
+        plan = self.explain_list({'ingredients': str(self.rice.id)})
+
+        self.assertIn('core_recipe_ingr_ingr_recipe_idx', plan)
+
+
 class RecipeImageUploadTests(TestCase):
 
     def setUp(self):
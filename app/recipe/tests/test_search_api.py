@@ -0,0 +1,142 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.search import search_recipes
+
+SEARCH_URL = reverse('recipe:recipe-search')
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Pitimi ak Pwa Kongo',
+        'time_minutes': 10,
+        'price': 5.00,
+        'description': 'Manje Ayisyen'
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PublicSearchApiTests(TestCase):
+    """Test the publicly available search API."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_login_required(self):
+        """Test that login is required to search recipes."""
+        res = self.client.get(SEARCH_URL, {'q': 'diri'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateSearchApiTests(TestCase):
+    """Test searching recipes as an authenticated user."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'search@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search_ids(self, text):
+        """Search recipes and return the ids in ranked order."""
+        res = self.client.get(SEARCH_URL, {'q': text})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [recipe['id'] for recipe in res.data]
+
+    def test_query_required(self):
+        """Test searching without a query is rejected."""
+        res = self.client.get(SEARCH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_title_ignores_accents(self):
+        """Test searching matches titles regardless of accents."""
+        recipe = sample_recipe(user=self.user, title='Sòs Pwa Nwa')
+        sample_recipe(user=self.user, title='Akra')
+
+        self.assertEqual(self.search_ids('sos pwa'), [recipe.id])
+        self.assertEqual(self.search_ids('SÒS'), [recipe.id])
+
+    def test_search_linked_names(self):
+        """Test tags and ingredients are searchable as they change."""
+        recipe = sample_recipe(user=self.user, title='Diri')
+        ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='djon djon'
+        )
+        self.assertEqual(self.search_ids('djon'), [])
+
+        recipe.ingredients.add(ingredient)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Pikliz'))
+        self.assertEqual(self.search_ids('diri djon djon'), [recipe.id])
+        self.assertEqual(self.search_ids('pikliz'), [recipe.id])
+
+        ingredient.name = 'lalo'
+        ingredient.save()
+        self.assertEqual(self.search_ids('djon'), [])
+        self.assertEqual(self.search_ids('lalo'), [recipe.id])
+
+        recipe.tags.clear()
+        self.assertEqual(self.search_ids('pikliz'), [])
+
+    def test_search_ranks_title_first(self):
+        """Test title matches rank above description matches."""
+        in_description = sample_recipe(
+            user=self.user,
+            title='Bannann Peze',
+            description='Sèvi ak griyo.'
+        )
+        in_title = sample_recipe(user=self.user, title='Griyo')
+
+        self.assertEqual(
+            self.search_ids('griyo'),
+            [in_title.id, in_description.id]
+        )
+
+    def test_search_highlights_description(self):
+        """Test results carry a rank and a highlighted snippet."""
+        sample_recipe(
+            user=self.user,
+            title='Legim',
+            description='Legim ak berejenn, chou ak vyann.'
+        )
+
+        res = self.client.get(SEARCH_URL, {'q': 'berejenn'})
+
+        self.assertEqual(len(res.data), 1)
+        self.assertIn('<mark>berejenn</mark>', res.data[0]['headline'])
+        self.assertGreater(res.data[0]['rank'], 0)
+
+    def test_search_limited_to_user(self):
+        """Test only the authenticated user's recipes are searched."""
+        user2 = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'test123',
+            login='other'
+        )
+        sample_recipe(user=user2, title='Tchaka')
+        recipe = sample_recipe(user=self.user, title='Tchaka')
+
+        self.assertEqual(self.search_ids('tchaka'), [recipe.id])
+
+    def test_search_uses_gin_index(self):
+        """Test the search query can be answered from the GIN index."""
+        queryset = search_recipes(Recipe.objects.all(), 'diri')
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+
+        self.assertIn('core_recipe_search_idx', plan)
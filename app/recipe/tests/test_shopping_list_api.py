@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+from core.tests.utils import QueryBudgetMixin
+from recipe.shopping import shopping_list
+
+SHOPPING_LIST_URL = reverse('recipe:shopping-list-list')
+
+
+def sample_recipe(user, ingredients=(), **params):
+    """Create and return a sample recipe with its ingredients."""
+    defaults = {
+        'title': 'Griyo',
+        'time_minutes': 120,
+        'price': 15.00,
+    }
+    defaults.update(params)
+    recipe = Recipe.objects.create(user=user, **defaults)
+    recipe.ingredients.set(ingredients)
+
+    return recipe
+
+
+class PublicShoppingListApiTests(TestCase):
+    """Test the publicly available shopping list API."""
+
+    def test_login_required(self):
+        """Test that login is required for a shopping list."""
+        res = APIClient().post(
+            SHOPPING_LIST_URL, {'recipes': [1]}, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateShoppingListApiTests(QueryBudgetMixin, TestCase):
+    """Test the shopping list API as an authenticated user."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'shopping@gmail.com',
+            'test123',
+            login='shopping'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.diri, self.pikliz, self.vyann = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('diri', 'pikliz', 'vyann kochon')
+        ]
+
+    def test_merged_ingredients(self):
+        """Test each ingredient is listed once with its recipes."""
+        griyo = sample_recipe(self.user, [self.vyann, self.pikliz])
+        diri = sample_recipe(self.user, [self.diri, self.pikliz])
+        sample_recipe(self.user, [self.diri])
+
+        res = self.client.post(
+            SHOPPING_LIST_URL,
+            {'recipes': [griyo.id, diri.id, griyo.id]},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'id': self.diri.id, 'name': 'diri', 'recipes': [diri.id]},
+            {'id': self.pikliz.id, 'name': 'pikliz',
+             'recipes': [griyo.id, diri.id]},
+            {'id': self.vyann.id, 'name': 'vyann kochon',
+             'recipes': [griyo.id]},
+        ])
+
+    def test_other_users_recipes_ignored(self):
+        """Test recipes of other users add nothing to the list."""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'test123',
+            login='other'
+        )
+        recipe = sample_recipe(
+            other,
+            [Ingredient.objects.create(user=other, name='sèl')]
+        )
+
+        res = self.client.post(
+            SHOPPING_LIST_URL, {'recipes': [recipe.id]}, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_recipes_required(self):
+        """Test an empty shopping list is rejected."""
+        res = self.client.post(
+            SHOPPING_LIST_URL, {'recipes': []}, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_one_query(self):
+        """Test the list takes one query whatever the number of recipes."""
+        recipes = [
+            sample_recipe(self.user, [self.diri, self.vyann])
+            for _ in range(21)
+        ]
+
+        items = self.assertQueryBudget(
+            1, shopping_list, self.user, [recipe.id for recipe in recipes]
+        )
+
+        self.assertEqual(len(items), 2)
+        self.assertEqual(len(items[0]['recipes']), 21)
@@ -0,0 +1,146 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, RecipeSignature, Tag
+from recipe.similar import similar_recipes
+
+
+def similar_url(recipe_id):
+    """Return the similar recipes url of a recipe."""
+    return reverse('recipe:recipe-similar', args=[recipe_id])
+
+
+def sample_recipe(user, tags=(), ingredients=(), **params):
+    """Create and return a sample recipe with its links."""
+    defaults = {
+        'title': 'Diri ak pwa',
+        'time_minutes': 30,
+        'price': 8.50,
+    }
+    defaults.update(params)
+    recipe = Recipe.objects.create(user=user, **defaults)
+    recipe.tags.set(tags)
+    recipe.ingredients.set(ingredients)
+
+    return recipe
+
+
+class PublicSimilarApiTests(TestCase):
+    """Test the publicly available similar recipes API."""
+
+    def test_login_required(self):
+        """Test that login is required to list similar recipes."""
+        res = APIClient().get(similar_url(1))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateSimilarApiTests(TestCase):
+    """Test listing similar recipes as an authenticated user."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'similar@gmail.com',
+            'test123',
+            login='similar'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('diri', 'pwa', 'lwil', 'sèl', 'lay', 'piman')
+        ]
+        self.tag = Tag.objects.create(user=self.user, name='Lakay')
+
+    def similar_ids(self, recipe):
+        """List the similar recipes of a recipe and return their ids."""
+        res = self.client.get(similar_url(recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item['id'] for item in res.data]
+
+    def test_similar_ranked_by_overlap(self):
+        """Test recipes sharing more ingredients and tags come first."""
+        recipe = sample_recipe(
+            self.user, tags=[self.tag], ingredients=self.ingredients[:4]
+        )
+        close = sample_recipe(
+            self.user, tags=[self.tag], ingredients=self.ingredients[:4]
+        )
+        far = sample_recipe(
+            self.user, tags=[self.tag], ingredients=self.ingredients[:3]
+        )
+        sample_recipe(self.user, ingredients=self.ingredients[4:])
+
+        res = self.client.get(similar_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['id'], item['similarity']) for item in res.data],
+            [(close.id, 1.0), (far.id, 0.8)]
+        )
+
+    def test_limited_to_user(self):
+        """Test recipes of other users are never similar."""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'test123',
+            login='other'
+        )
+        recipe = sample_recipe(self.user, ingredients=self.ingredients)
+        Recipe.objects.create(
+            user=other, title='Diri', time_minutes=5, price=5
+        ).ingredients.set(self.ingredients)
+
+        self.assertEqual(self.similar_ids(recipe), [])
+
+        res = APIClient()
+        res.force_authenticate(other)
+        res = res.get(similar_url(recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_index_follows_links(self):
+        """Test signatures are rebuilt as the links of recipes change."""
+        recipe = sample_recipe(self.user, ingredients=self.ingredients[:3])
+        other = sample_recipe(self.user, ingredients=self.ingredients[3:])
+        self.assertEqual(self.similar_ids(recipe), [])
+
+        other.ingredients.set(self.ingredients[:3])
+        self.assertEqual(self.similar_ids(recipe), [other.id])
+
+        self.ingredients[0].recipe_set.clear()
+        self.ingredients[1].delete()
+        self.ingredients[2].delete()
+        self.assertFalse(RecipeSignature.objects.exists())
+        self.assertEqual(self.similar_ids(recipe), [])
+
+    def test_exact_matches_index(self):
+        """Test the indexed search agrees with the exact one."""
+        recipe = sample_recipe(self.user, ingredients=self.ingredients[:5])
+        for size in range(2, 6):
+            sample_recipe(self.user, ingredients=self.ingredients[:size])
+
+        self.assertEqual(
+            similar_recipes(recipe.id, exact=True)[:1],
+            similar_recipes(recipe.id)[:1]
+        )
+
+    def test_rebuild_command(self):
+        """Test the rebuild command indexes recipes written directly."""
+        recipe = sample_recipe(self.user, ingredients=self.ingredients)
+        other = sample_recipe(self.user, ingredients=self.ingredients)
+        RecipeSignature.objects.all().delete()
+        self.assertEqual(self.similar_ids(recipe), [])
+
+        out = StringIO()
+        call_command('rebuild_similar_index', user=[self.user.id], stdout=out)
+
+        self.assertIn('for 2 recipes', out.getvalue())
+        self.assertEqual(self.similar_ids(recipe), [other.id])
@@ -0,0 +1,246 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Q
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, RecipeStat, Tag
+from core.tests.utils import QueryBudgetMixin
+from recipe import cache
+from recipe.stats import PERCENTILES, TOP_LINKS, price_bucket, recipe_stats
+
+STATS_URL = reverse('recipe:stats-list')
+RECIPES_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def detail_url(recipe_id):
+    """Return the url of a specific recipe based on its id."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def full_aggregate(user):
+    """Return the statistics of a user aggregated from all recipes."""
+    recipes = Recipe.objects.filter(user=user)
+    times = sorted(recipes.values_list('time_minutes', flat=True))
+    stats = {
+        'recipes': len(times),
+        'time_minutes': {'average': None},
+        'price_histogram': [],
+    }
+    for percentile in PERCENTILES:
+        stats['time_minutes'][f'p{percentile}'] = None
+
+    if times:
+        stats['time_minutes']['average'] = round(sum(times) / len(times), 2)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT percentile_disc(%s) WITHIN GROUP '
+                '(ORDER BY time_minutes) FROM core_recipe WHERE user_id = %s',
+                [[p / 100 for p in PERCENTILES], user.id]
+            )
+            values = cursor.fetchone()[0]
+        for percentile, value in zip(PERCENTILES, values):
+            stats['time_minutes'][f'p{percentile}'] = value
+
+        buckets = [price_bucket(price)
+                   for price in recipes.values_list('price', flat=True)]
+        for bucket in range(min(buckets), max(buckets) + 1):
+            stats['price_histogram'].append({
+                'min': '{:.2f}'.format(bucket * 5),
+                'max': '{:.2f}'.format((bucket + 1) * 5),
+                'recipes': buckets.count(bucket),
+            })
+
+    for name, model in (('top_tags', Tag), ('top_ingredients', Ingredient)):
+        rows = model.objects.filter(user=user).annotate(
+            recipes=Count('recipe', filter=Q(recipe__user=user))
+        ).filter(recipes__gt=0).order_by('-recipes', 'id')[:TOP_LINKS]
+        stats[name] = [
+            {'id': row.id, 'name': row.name, 'recipes': row.recipes}
+            for row in rows
+        ]
+
+    return stats
+
+
+class RecipeStatsTests(QueryBudgetMixin, TestCase):
+    """Test the incrementally maintained recipe statistics."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            'stats@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Lakay', 'Fèt', 'Vit')
+        ]
+        self.ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('diri', 'pwa', 'lwil', 'sèl')
+        ]
+
+    def create_recipe(self, time_minutes=30, price='8.50', tags=(),
+                      ingredients=()):
+        payload = {
+            'title': 'Diri ak pwa',
+            'time_minutes': time_minutes,
+            'price': price,
+            'description': 'Diri kole ak pwa rouj.',
+            'tags': [tag.id for tag in tags],
+            'ingredients': [ingredient.id for ingredient in ingredients],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return Recipe.objects.get(id=res.data['id'])
+
+    def add_recipes(self):
+        for index in range(12):
+            self.create_recipe(
+                time_minutes=5 + index * 7 % 50,
+                price=f'{index * 3.75:.2f}',
+                tags=self.tags[index % 3:],
+                ingredients=self.ingredients[:index % 4 + 1]
+            )
+
+    def assertConsistent(self):
+        """Assert the maintained statistics match a full aggregate."""
+        self.assertEqual(recipe_stats(self.user), full_aggregate(self.user))
+
+    def test_empty_stats(self):
+        """Test the statistics of a user without recipes."""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipes'], 0)
+        self.assertIsNone(res.data['time_minutes']['p50'])
+        self.assertEqual(res.data['price_histogram'], [])
+        self.assertConsistent()
+
+    def test_stats_endpoint(self):
+        """Test the endpoint returns the statistics of the user only."""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com', 'test123', login='stats2'
+        )
+        Recipe.objects.create(
+            user=other, title='Tasso', time_minutes=90, price=20,
+            description='Tasso kabrit'
+        )
+        self.add_recipes()
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, full_aggregate(self.user))
+        self.assertEqual(res.data['recipes'], 12)
+        self.assertEqual(res.data['top_tags'][0]['name'], 'Vit')
+
+    def test_stats_query_budget(self):
+        """Test reading the statistics does not grow with the recipes."""
+        self.add_recipes()
+
+        self.assertQueryBudget(3, recipe_stats, self.user)
+
+    def test_updates_and_deletes_consistent(self):
+        """Test edits, link changes and deletions keep stats consistent."""
+        self.add_recipes()
+        recipe = Recipe.objects.filter(user=self.user).first()
+
+        self.client.patch(
+            detail_url(recipe.id),
+            {'time_minutes': 120, 'price': '99.99',
+             'tags': [self.tags[0].id]},
+            format='json'
+        )
+        self.assertConsistent()
+
+        recipe.ingredients.clear()
+        self.assertConsistent()
+
+        self.tags[1].recipe_set.remove(recipe)
+        self.tags[1].recipe_set.add(*Recipe.objects.filter(user=self.user))
+        self.assertConsistent()
+
+        self.tags[2].recipe_set.clear()
+        self.assertConsistent()
+
+        self.client.delete(detail_url(recipe.id))
+        self.ingredients[0].delete()
+        self.assertConsistent()
+
+        recipe = Recipe.objects.filter(user=self.user).first()
+        recipe.time_minutes = 3
+        recipe.save(update_fields=['time_minutes'])
+        self.assertConsistent()
+
+    def test_bulk_writes_consistent(self):
+        """Test bulk created and updated recipes are counted."""
+        self.add_recipes()
+        recipe = Recipe.objects.filter(user=self.user).first()
+        items = [
+            {'title': 'Legim', 'time_minutes': 60, 'price': '12.00',
+             'description': 'Legim ak vyann', 'tags': [self.tags[0].id],
+             'ingredients': [self.ingredients[2].id]},
+            {'id': recipe.id, 'title': 'Pikliz', 'time_minutes': 15,
+             'price': '2.00', 'description': 'Pikliz pike',
+             'ingredients': [self.ingredients[3].id]},
+        ]
+
+        res = self.client.post(BULK_URL, items, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertConsistent()
+
+    def test_import_consistent(self):
+        """Test imported recipes are counted."""
+        self.add_recipes()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'recipes.ndjson')
+        with open(path, 'w') as import_file:
+            for index in range(5):
+                import_file.write(json.dumps({
+                    'title': 'Lanbi', 'time_minutes': 30 + index,
+                    'description': 'Lanbi boukannen', 'price': '15.00',
+                    'tags': ['Lakay', 'Lanmè'], 'ingredients': ['lanbi'],
+                }) + '\n')
+
+        call_command(
+            'import_recipes', path, user=self.user.email, stdout=StringIO()
+        )
+
+        self.assertConsistent()
+
+    def test_rebuild_command(self):
+        """Test the rebuild command fixes statistics left behind."""
+        self.add_recipes()
+        Recipe.objects.filter(user=self.user).update(time_minutes=1)
+        RecipeStat.objects.filter(
+            user=self.user, kind=RecipeStat.TAG
+        ).delete()
+        self.assertNotEqual(
+            recipe_stats(self.user), full_aggregate(self.user)
+        )
+
+        out = StringIO()
+        call_command('rebuild_recipe_stats', user=[self.user.id], stdout=out)
+
+        self.assertIn('of 1 users', out.getvalue())
+        self.assertConsistent()
+
+        out = StringIO()
+        call_command('rebuild_recipe_stats', stdout=out)
+        self.assertIn(' 0 rows', out.getvalue())
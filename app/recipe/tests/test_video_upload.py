@@ -0,0 +1,203 @@
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, VideoUpload
+from recipe.uploads import UploadError, append_chunk
+
+UPLOADS_URL = reverse('recipe:videoupload-list')
+VIDEO = bytes(range(256)) * 40
+
+
+def upload_url(upload_id):
+    """Return the URL of a video upload."""
+    return reverse('recipe:videoupload-detail', args=[upload_id])
+
+
+def finalize_url(upload_id):
+    """Return the URL finishing a video upload."""
+    return reverse('recipe:videoupload-finalize', args=[upload_id])
+
+
+class PublicVideoUploadApiTests(TestCase):
+    """Test the publicly available video upload API."""
+
+    def test_login_required(self):
+        """Test that login is required to start an upload."""
+        res = APIClient().post(UPLOADS_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(RECIPE_VIDEO_CHUNK_MAX_SIZE=4096)
+class PrivateVideoUploadApiTests(TestCase):
+    """Test resumable video uploads as an authenticated user."""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        media_settings = override_settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.addCleanup(self.media.cleanup)
+
+        self.user = get_user_model().objects.create_user(
+            'video@gmail.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Soup joumou',
+            time_minutes=120,
+            price=15.00
+        )
+
+    def start(self, video=VIDEO, **params):
+        payload = {
+            'recipe': self.recipe.id,
+            'filename': 'joumou.mp4',
+            'size': len(video),
+            'sha256': hashlib.sha256(video).hexdigest(),
+        }
+        payload.update(params)
+        return self.client.post(UPLOADS_URL, payload)
+
+    def put_chunk(self, upload_id, first, data, size=len(VIDEO)):
+        return self.client.put(
+            upload_url(upload_id),
+            data,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {first}-{first + len(data) - 1}/{size}'
+        )
+
+    def test_chunked_upload_attached_to_recipe(self):
+        """Test a video sent in chunks is verified and attached."""
+        upload_id = self.start().data['id']
+
+        for first in range(0, len(VIDEO), 4096):
+            res = self.put_chunk(upload_id, first, VIDEO[first:first + 4096])
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['offset'], len(VIDEO))
+
+        res = self.client.post(finalize_url(upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertTrue(self.recipe.video.name.endswith('.mp4'))
+        with self.recipe.video.open('rb') as video:
+            self.assertEqual(video.read(), VIDEO)
+        self.assertFalse(VideoUpload.objects.exists())
+
+    def test_resume_from_offset(self):
+        """Test an interrupted upload reports where to resume."""
+        upload_id = self.start().data['id']
+        self.put_chunk(upload_id, 0, VIDEO[:4096])
+
+        res = self.put_chunk(upload_id, 8192, VIDEO[8192:])
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['offset'], 4096)
+
+        res = self.client.get(upload_url(upload_id))
+        self.assertEqual(res.data['offset'], 4096)
+
+        self.put_chunk(upload_id, 4096, VIDEO[4096:8192])
+        self.put_chunk(upload_id, 8192, VIDEO[8192:])
+        res = self.client.post(finalize_url(upload_id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_concurrent_chunk_rejected(self):
+        """Test a chunk loses to one that moved the offset meanwhile."""
+        upload_id = self.start().data['id']
+        upload = VideoUpload.objects.get(id=upload_id)
+
+        class RacingStream(BytesIO):
+            def read(self, size=-1):
+                VideoUpload.objects.filter(id=upload_id).update(offset=4096)
+                return super().read(size)
+
+        with self.assertRaises(UploadError):
+            append_chunk(upload.id, RacingStream(VIDEO[:4096]), 0, 4095)
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.offset, 4096)
+
+    def test_invalid_content_range(self):
+        """Test chunks need a Content-Range within the upload."""
+        upload_id = self.start().data['id']
+
+        res = self.put_chunk(upload_id, 0, VIDEO[:10], size=10)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.put_chunk(upload_id, 0, VIDEO[:8192])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_checksum_mismatch_resets_upload(self):
+        """Test a corrupted upload is rejected and starts over."""
+        video = b'x' * 100
+        upload_id = self.start(video, sha256='0' * 64).data['id']
+        self.put_chunk(upload_id, 0, video, size=100)
+
+        res = self.client.post(finalize_url(upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(VideoUpload.objects.get(id=upload_id).offset, 0)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.video)
+
+    def test_finalize_incomplete_upload(self):
+        """Test an upload cannot be finished before every byte arrived."""
+        upload_id = self.start().data['id']
+        self.put_chunk(upload_id, 0, VIDEO[:4096])
+
+        res = self.client.post(finalize_url(upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_to_other_users_recipe_rejected(self):
+        """Test videos can only be uploaded to the user's recipes."""
+        user2 = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'test123',
+            login='other'
+        )
+        recipe = Recipe.objects.create(
+            user=user2,
+            title='Lambi',
+            time_minutes=30,
+            price=20.00
+        )
+
+        res = self.start(recipe=recipe.id)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_clear_stale_uploads(self):
+        """Test abandoned uploads and their bytes are deleted."""
+        stale = self.start().data['id']
+        fresh = self.start().data['id']
+        path = os.path.join(
+            self.media.name, VideoUpload.objects.get(id=stale).partial_name
+        )
+        VideoUpload.objects.filter(id=stale).update(
+            updated=timezone.now() - timedelta(days=2)
+        )
+
+        call_command('clear_video_uploads', stdout=StringIO())
+
+        self.assertEqual(
+            [str(upload.id) for upload in VideoUpload.objects.all()],
+            [fresh]
+        )
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import VideoUpload, recipe_upload_file_path
+
+READ_SIZE = 64 * 1024
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadError(Exception):
+    """A chunk or a finished upload was rejected."""
+
+
+def parse_content_range(header, size):
+    """Return the first and last byte of a Content-Range header."""
+    match = CONTENT_RANGE.match(header or '')
+    if not match:
+        raise UploadError('Content-Range must be "bytes first-last/size".')
+
+    first, last, total = (int(value) for value in match.groups())
+    if total != size or first > last or last >= size:
+        raise UploadError('Content-Range does not fit the upload size.')
+    if last - first + 1 > settings.RECIPE_VIDEO_CHUNK_MAX_SIZE:
+        raise UploadError('Chunks are limited to {} bytes.'.format(
+            settings.RECIPE_VIDEO_CHUNK_MAX_SIZE
+        ))
+
+    return first, last
+
+
+def start_upload(upload):
+    """Create the empty file the chunks of an upload are written to."""
+    path = default_storage.path(upload.partial_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+
+
+def append_chunk(upload_id, stream, first, last):
+    """Write the bytes first to last of an upload from stream.
+
+    The chunk is copied to disk as it is read instead of being buffered,
+    with no transaction or row lock held while the client sends it. The
+    offset only moves on if no other request moved it meanwhile, the
+    loser gets an UploadError. Return the upload.
+    """
+    upload = VideoUpload.objects.get(id=upload_id)
+    if first != upload.offset:
+        raise UploadError(
+            f'Expected the chunk starting at byte {upload.offset}.'
+        )
+
+    remaining = last - first + 1
+    with open(default_storage.path(upload.partial_name), 'r+b') as part:
+        part.seek(first)
+        while remaining:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            part.write(data)
+            remaining -= len(data)
+
+    # Bytes that arrived before the client went away are kept, so a
+    # retry resumes from there. The file is not truncated, as a later
+    # chunk may already be written past this one.
+    offset = last + 1 - remaining
+    moved = VideoUpload.objects.filter(id=upload_id, offset=first).update(
+        offset=offset, updated=timezone.now()
+    )
+    if not moved:
+        raise UploadError('Another request wrote this chunk meanwhile.')
+    upload.offset = offset
+
+    if remaining:
+        raise UploadError(
+            f'The chunk ended early, resume from byte {upload.offset}.'
+        )
+    return upload
+
+
+def finish_upload(upload):
+    """Verify a complete upload and attach it as the recipe video."""
+    if upload.offset != upload.size:
+        raise UploadError(
+            f'Only {upload.offset} of {upload.size} bytes were received.'
+        )
+
+    path = default_storage.path(upload.partial_name)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for data in iter(lambda: part.read(1024 * 1024), b''):
+            digest.update(data)
+    if digest.hexdigest() != upload.sha256:
+        with transaction.atomic():
+            upload.offset = 0
+            upload.save(update_fields=['offset', 'updated'])
+            open(path, 'wb').close()
+        raise UploadError('Checksum mismatch, the upload was reset.')
+
+    recipe = upload.recipe
+    name = recipe.video.storage.store_file(
+        path,
+        recipe_upload_file_path(recipe, upload.filename),
+        upload.sha256
+    )
+
+    with transaction.atomic():
+        recipe.video.name = name
+        recipe.save(update_fields=['video'])
+        upload.delete()
+
+    return recipe
+
+
+def discard_upload(upload):
+    """Delete an upload and the bytes received so far."""
+    default_storage.delete(upload.partial_name)
+    upload.delete()
+
+
+def purge_stale_uploads(max_age=None):
+    """Delete uploads without a chunk for max_age, return the count."""
+    if max_age is None:
+        max_age = timedelta(seconds=settings.RECIPE_VIDEO_UPLOAD_EXPIRY)
+
+    stale = VideoUpload.objects.filter(updated__lt=timezone.now() - max_age)
+    count = 0
+    for upload in stale.iterator():
+        discard_upload(upload)
+        count += 1
+
+    return count
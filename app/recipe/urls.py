@@ -8,6 +8,11 @@ router = DefaultRouter()
 router.register('tags', views.TagViewSet)
 router.register('ingredients', views.IngredientViewSet)
 router.register('recipes', views.RecipeViewSet)
+router.register('video-uploads', views.VideoUploadViewSet)
+router.register('stats', views.RecipeStatsViewSet, basename='stats')
+router.register(
+    'shopping-list', views.ShoppingListViewSet, basename='shopping-list'
+)
 
 app_name = 'recipe'
 
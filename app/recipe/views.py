@@ -1,27 +1,100 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Prefetch
+from django.http import StreamingHttpResponse
+
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.decorators import action
 
-from core.models import Tag, Ingredient, Recipe
+from core.models import Tag, Ingredient, Recipe, VideoUpload
+from core.routers import ReplicaReadMixin, pin_to_primary
 from recipe import serializers
+from recipe.bulk import bulk_write_recipes
+from recipe.cache import bump_version, cache_response
+from recipe.export import EXPORT_WRITERS, export_rows
+from recipe.fast import FastListMixin, recipe_data, recipe_values
+from recipe.images import schedule_variants
+from recipe.pagination import NameCursorPagination, RecipeCursorPagination
+from recipe.pantry import pantry_recipes
+from recipe.renderers import CSVRenderer, MessagePackParser, \
+    MessagePackRenderer, NDJSONRenderer
+from recipe.search import search_recipes
+from recipe.shopping import shopping_list
+from recipe.similar import similar_recipes
+from recipe.stats import recipe_stats
+from recipe.uploads import UploadError, append_chunk, discard_upload, \
+    finish_upload, parse_content_range, start_upload
+from user.authentication import CachedTokenAuthentication
+
+# JSON stays the default, clients opt in to MessagePack with Accept and
+# Content-Type: application/msgpack.
+RENDERER_CLASSES = (
+    *api_settings.DEFAULT_RENDERER_CLASSES, MessagePackRenderer
+)
+PARSER_CLASSES = (*api_settings.DEFAULT_PARSER_CLASSES, MessagePackParser)
 
 
-class BaseRecipeAttrViewSet(viewsets.GenericViewSet,
+class BaseRecipeAttrViewSet(ReplicaReadMixin,
+                            FastListMixin,
+                            viewsets.GenericViewSet,
                             mixins.ListModelMixin,
                             mixins.CreateModelMixin):
     """Base viewset for user owned recipe attributes."""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    renderer_classes = RENDERER_CLASSES
+    parser_classes = PARSER_CLASSES
+    pagination_class = NameCursorPagination
 
     def get_queryset(self):
         """Return objects for the authenticated user only."""
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        return self.queryset.filter(
+            user=self.request.user
+        ).order_by('-name', 'id')
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        """List objects of the authenticated user."""
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """Create new object."""
-        serializer.save(user=self.request.user)
+        try:
+            with transaction.atomic():
+                serializer.save(user=self.request.user)
+        except IntegrityError:
+            raise ValidationError({'name': ['This name already exists.']})
+
+    @action(methods=['POST'], detail=False)
+    def bulk(self, request):
+        """Get or create objects by name and return them in order."""
+        serializer = serializers.NameListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        names = serializer.validated_data['names']
+
+        model = self.queryset.model
+        model.objects.bulk_create(
+            [model(user=request.user, name=name) for name in names],
+            ignore_conflicts=True
+        )
+        bump_version(request.user.id)
+
+        objects = {
+            obj.name: obj
+            for obj in self.get_queryset().filter(name__in=names)
+        }
+        serializer = self.get_serializer(
+            [objects[name] for name in names],
+            many=True
+        )
+
+        return Response(serializer.data)
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
@@ -36,16 +109,110 @@ class IngredientViewSet(BaseRecipeAttrViewSet):
     serializer_class = serializers.IngredientSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, FastListMixin, viewsets.ModelViewSet):
     """Manage Recipe in the databse."""
     serializer_class = serializers.RecipeSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    renderer_classes = RENDERER_CLASSES
+    parser_classes = PARSER_CLASSES
+    pagination_class = RecipeCursorPagination
     queryset = Recipe.objects.all()
+    read_actions = ('pantry',)
+    detail_fields = (
+        'id', 'title', 'time_minutes', 'description', 'price', 'link',
+        'image',
+    )
+
+    def _params_to_ints(self, param):
+        """Convert a comma separated list of ids to a set of integers."""
+        value = self.request.query_params.get(param)
+        if not value:
+            return set()
+
+        try:
+            return {int(str_id) for str_id in value.split(',')}
+        except ValueError:
+            raise ValidationError(
+                {param: ['Expected a comma separated list of ids.']}
+            )
+
+    def _filter_links(self, queryset, through, column, ids, match_all):
+        """Filter recipes linked to any or all ids in one subquery."""
+        links = through.objects.filter(**{f'{column}__in': ids})
+        if match_all:
+            links = links.values('recipe_id').annotate(
+                matched=Count(column)
+            ).filter(matched=len(ids))
+
+        return queryset.filter(id__in=links.values('recipe_id'))
+
+    def filter_queryset(self, queryset):
+        """Filter recipes by the tags and ingredients query params."""
+        queryset = super().filter_queryset(queryset)
+        if self.action != 'list':
+            return queryset
+
+        match = self.request.query_params.get('match', 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError({'match': ['Expected "any" or "all".']})
+
+        tag_ids = self._params_to_ints('tags')
+        ingredient_ids = self._params_to_ints('ingredients')
+        if tag_ids:
+            queryset = self._filter_links(
+                queryset, Recipe.tags.through, 'tag_id', tag_ids,
+                match == 'all'
+            )
+        if ingredient_ids:
+            queryset = self._filter_links(
+                queryset, Recipe.ingredients.through, 'ingredient_id',
+                ingredient_ids, match == 'all'
+            )
+
+        return queryset
 
     def get_queryset(self):
         """Retrieve the recipes for the authenticated user."""
-        return self.queryset.filter(user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+
+        if self.action in ('list', 'search', 'similar', 'pantry'):
+            return queryset.prefetch_related(
+                Prefetch(
+                    'tags',
+                    queryset=Tag.objects.only('id').order_by('id')
+                ),
+                Prefetch(
+                    'ingredients',
+                    queryset=Ingredient.objects.only('id').order_by('id')
+                ),
+            )
+        elif self.action == 'retrieve':
+            return queryset.only(*self.detail_fields).prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.only('id', 'name')),
+                Prefetch(
+                    'ingredients',
+                    queryset=Ingredient.objects.only('id', 'name')
+                ),
+            )
+
+        return queryset
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        """List recipes of the authenticated user."""
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a recipe of the authenticated user."""
+        return super().retrieve(request, *args, **kwargs)
+
+    def get_fast_rows(self, queryset):
+        return recipe_values(queryset)
+
+    def get_fast_data(self, rows):
+        return recipe_data(rows, self.request)
 
     def get_serializer_class(self):
         """Return appropriate serializer class."""
@@ -55,6 +222,12 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return serializers.RecipeImageSerializer
         elif self.action == 'upload_video':
             return serializers.RecipeVideoSerilizer
+        elif self.action == 'search':
+            return serializers.RecipeSearchSerializer
+        elif self.action == 'similar':
+            return serializers.RecipeSimilarSerializer
+        elif self.action == 'pantry':
+            return serializers.RecipePantrySerializer
 
         return self.serializer_class
 
@@ -62,6 +235,110 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """CReate new recipe."""
         serializer.save(user=self.request.user)
 
+    @action(methods=['GET'], detail=False)
+    def search(self, request):
+        """Full text search the recipes of the authenticated user."""
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response(
+                {'q': ['This query parameter is required.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+        except ValueError:
+            limit = 20
+
+        recipes = search_recipes(self.get_queryset(), text)[:max(limit, 1)]
+        serializer = self.get_serializer(recipes, many=True)
+
+        return Response(serializer.data)
+
+    @action(methods=['GET'], detail=True)
+    def similar(self, request, pk=None):
+        """List the recipes sharing most ingredients and tags with one."""
+        recipe = self.get_object()
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 50)
+        except ValueError:
+            limit = 10
+
+        ranked = similar_recipes(recipe.id, max(limit, 1))
+        recipes = self.get_queryset().in_bulk([pk for pk, _ in ranked])
+        results = []
+        for pk, similarity in ranked:
+            if pk in recipes:
+                recipes[pk].similarity = round(similarity, 4)
+                results.append(recipes[pk])
+        serializer = self.get_serializer(results, many=True)
+
+        return Response(serializer.data)
+
+    @action(methods=['POST'], detail=False)
+    def pantry(self, request):
+        """List the recipes cookable with the ingredients of a pantry."""
+        query = serializers.PantryQuerySerializer(data=request.data)
+        query.is_valid(raise_exception=True)
+
+        found = pantry_recipes(request.user.id, **query.validated_data)
+        recipes = self.get_queryset().in_bulk([pk for pk, _ in found])
+        results = []
+        for pk, missing in found:
+            if pk in recipes:
+                recipes[pk].missing = missing
+                results.append(recipes[pk])
+        serializer = self.get_serializer(results, many=True)
+
+        return Response(serializer.data)
+
+    @action(
+        methods=['GET'],
+        detail=False,
+        renderer_classes=(NDJSONRenderer, CSVRenderer)
+    )
+    def export(self, request):
+        """Stream every recipe of the user as NDJSON or CSV."""
+        export_format = request.accepted_renderer.format
+        lines = EXPORT_WRITERS[export_format](export_rows(self.get_queryset()))
+
+        response = StreamingHttpResponse(
+            lines,
+            content_type=request.accepted_renderer.media_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{export_format}"'
+        )
+        return response
+
+    @action(methods=['POST'], detail=False)
+    def bulk(self, request):
+        """Create or update many recipes in one request."""
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {'detail': 'Expected a list of recipes.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.RECIPE_BULK_MAX_ITEMS:
+            return Response(
+                {'detail': 'At most {} recipes per request.'.format(
+                    settings.RECIPE_BULK_MAX_ITEMS
+                )},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = bulk_write_recipes(request.user, items)
+        failed = sum('errors' in result for result in results)
+        if not failed:
+            code = status.HTTP_201_CREATED
+        elif failed < len(results):
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+
+        return Response({'results': results}, status=code)
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload an image to a recipe."""
@@ -73,6 +350,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         if serializer.is_valid():
             serializer.save()
+            schedule_variants(recipe.image.name)
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
@@ -103,3 +381,106 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+
+class VideoUploadViewSet(viewsets.GenericViewSet,
+                         mixins.CreateModelMixin,
+                         mixins.RetrieveModelMixin,
+                         mixins.DestroyModelMixin):
+    """Upload recipe videos in resumable chunks.
+
+    POST creates an upload, each PUT writes the chunk given by its
+    Content-Range header, GET returns the offset to resume from and
+    finalize attaches the verified file to the recipe.
+    """
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    serializer_class = serializers.VideoUploadSerializer
+    queryset = VideoUpload.objects.all()
+
+    def get_queryset(self):
+        """Return the uploads of the authenticated user only."""
+        return self.queryset.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        """Create an upload and its empty file."""
+        start_upload(serializer.save(user=self.request.user))
+
+    def perform_destroy(self, instance):
+        """Abort an upload."""
+        discard_upload(instance)
+
+    def update(self, request, pk=None):
+        """Write one chunk of the upload from the raw request body."""
+        upload = self.get_object()
+        try:
+            first, last = parse_content_range(
+                request.META.get('HTTP_CONTENT_RANGE'), upload.size
+            )
+        except UploadError as exc:
+            return Response(
+                {'detail': str(exc), 'offset': upload.offset},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            upload = append_chunk(
+                upload.id, request.stream or BytesIO(), first, last
+            )
+        except UploadError as exc:
+            upload.refresh_from_db()
+            return Response(
+                {'detail': str(exc), 'offset': upload.offset},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response(self.get_serializer(upload).data)
+
+    @action(methods=['POST'], detail=True)
+    def finalize(self, request, pk=None):
+        """Check the checksum and attach the video to the recipe."""
+        upload = self.get_object()
+        try:
+            recipe = finish_upload(upload)
+        except UploadError as exc:
+            return Response(
+                {'detail': str(exc), 'offset': upload.offset},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        pin_to_primary(request.user.pk)
+
+        serializer = serializers.RecipeVideoSerilizer(
+            recipe,
+            context=self.get_serializer_context()
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class RecipeStatsViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    """Summarize the recipes of the authenticated user."""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    renderer_classes = RENDERER_CLASSES
+
+    @cache_response
+    def list(self, request):
+        """Return the recipe statistics of the authenticated user."""
+        return Response(recipe_stats(request.user))
+
+
+class ShoppingListViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    """Merge the ingredients of many recipes into one shopping list."""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    renderer_classes = RENDERER_CLASSES
+    parser_classes = PARSER_CLASSES
+    read_actions = ('create',)
+
+    def create(self, request):
+        """Return the merged ingredients of the given recipes."""
+        serializer = serializers.ShoppingListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(shopping_list(
+            request.user, serializer.validated_data['recipes']
+        ))
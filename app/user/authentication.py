@@ -0,0 +1,70 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the cache backend holding authenticated tokens."""
+    return caches[settings.TOKEN_CACHE_ALIAS]
+
+
+def _token_cache_key(key):
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f'auth-token:{digest}'
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def token_cache_stats():
+    """Return the token cache hit and miss counters of this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def reset_token_cache_stats():
+    """Reset the token cache hit and miss counters."""
+    with _stats_lock:
+        _stats.update(hits=0, misses=0)
+
+
+def forget_tokens(*keys):
+    """Drop tokens from the cache so the next request reloads them."""
+    get_cache().delete_many([_token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication caching the token owner between requests."""
+
+    def authenticate_credentials(self, key):
+        """Return the user and token from the cache or the database."""
+        cache = get_cache()
+        cache_key = _token_cache_key(key)
+        credentials = cache.get(cache_key)
+
+        if credentials is None:
+            _count('misses')
+            credentials = super().authenticate_credentials(key)
+            cache.set(cache_key, credentials)
+        else:
+            _count('hits')
+
+        user = credentials[0]
+        if not user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+
+        return credentials
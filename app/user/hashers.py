@@ -0,0 +1,106 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.db.utils import DatabaseError
+
+_stats = {'hashes': 0, 'hash_seconds': 0.0}
+_tuning = {'iterations': None, 'loaded': None}
+_lock = threading.Lock()
+
+
+def hash_stats():
+    """Return the password hash counters of this process."""
+    with _lock:
+        stats = dict(_stats)
+
+    hashes = stats['hashes']
+    stats['mean_hash_ms'] = (
+        stats['hash_seconds'] * 1000 / hashes if hashes else 0.0
+    )
+    return stats
+
+
+def reset_hash_stats():
+    """Reset the password hash counters."""
+    with _lock:
+        _stats.update(hashes=0, hash_seconds=0.0)
+
+
+def forget_tuning():
+    """Reload the tuned iteration count on the next hash."""
+    with _lock:
+        _tuning.update(iterations=None, loaded=None)
+
+
+def tuned_iterations(algorithm):
+    """Return the iteration count recorded by tune_password_hasher.
+
+    The value is read again every PASSWORD_HASHER_REFRESH seconds, so
+    every server picks up a new count without a restart. None means the
+    hasher was never tuned.
+    """
+    from core.models import HasherTuning
+
+    now = time.monotonic()
+    with _lock:
+        loaded = _tuning['loaded']
+        if loaded is not None and \
+                now - loaded < settings.PASSWORD_HASHER_REFRESH:
+            return _tuning['iterations']
+
+    try:
+        iterations = HasherTuning.objects.filter(
+            algorithm=algorithm
+        ).values_list('iterations', flat=True).first()
+    except DatabaseError:
+        return None
+
+    with _lock:
+        _tuning.update(iterations=iterations, loaded=now)
+    return iterations
+
+
+def measure_iterations(target_ms, sample_iterations=20000, repeat=5):
+    """Return the PBKDF2 iteration count hashing in about target_ms here.
+
+    The best of a few timed sample hashes gives the cost of one
+    iteration, and the count is rounded down to a thousand.
+    """
+    hasher = PBKDF2PasswordHasher()
+    salt = hasher.salt()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hasher.encode('tune password hasher', salt, sample_iterations)
+        timings.append(time.perf_counter() - start)
+
+    per_iteration = min(timings) / sample_iterations
+    return max(int(target_ms / 1000 / per_iteration) // 1000 * 1000, 1000)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 hasher using the iteration count tuned for the hardware.
+
+    Stored hashes with another count are updated by Django on the next
+    successful login, and every hash is timed for hash_stats().
+    """
+
+    @property
+    def iterations(self):
+        tuned = tuned_iterations(self.algorithm)
+        if tuned is None:
+            return PBKDF2PasswordHasher.iterations
+
+        return max(tuned, settings.PASSWORD_HASH_MIN_ITERATIONS)
+
+    def encode(self, password, salt, iterations=None):
+        start = time.perf_counter()
+        try:
+            return super().encode(password, salt, iterations)
+        finally:
+            elapsed = time.perf_counter() - start
+            with _lock:
+                _stats['hashes'] += 1
+                _stats['hash_seconds'] += elapsed
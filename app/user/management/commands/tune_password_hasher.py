@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+
+from core.models import HasherTuning
+from user.hashers import forget_tuning, measure_iterations
+
+
+class Command(BaseCommand):
+    """Django command to fit the password hash cost to this hardware.
+
+    The PBKDF2 iteration count hashing in --target-ms is recorded for
+    every server, and stored hashes are updated as users log in.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target-ms', type=float, default=150,
+            help='Time one password hash should take'
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        iterations = max(
+            measure_iterations(options['target_ms']),
+            settings.PASSWORD_HASH_MIN_ITERATIONS
+        )
+
+        hasher = get_hasher()
+        salt = hasher.salt()
+        start = time.perf_counter()
+        hasher.encode('tune password hasher', salt, iterations)
+        hash_ms = (time.perf_counter() - start) * 1000
+
+        self.stdout.write(
+            f'{hasher.algorithm}: {iterations} iterations, '
+            f'{hash_ms:.1f} ms per hash'
+        )
+        if options['dry_run']:
+            return
+
+        HasherTuning.objects.update_or_create(
+            algorithm=hasher.algorithm,
+            defaults={'iterations': iterations, 'hash_ms': hash_ms}
+        )
+        forget_tuning()
+        self.stdout.write(self.style.SUCCESS('Iteration count recorded'))
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import forget_tokens
+
+
+@receiver(post_delete, sender=Token)
+@receiver(post_save, sender=Token)
+def forget_changed_token(sender, instance, **kwargs):
+    """Drop a saved or deleted token from the token cache."""
+    forget_tokens(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_user_tokens(sender, instance, **kwargs):
+    """Drop the tokens of a user whose password or status may change."""
+    keys = Token.objects.filter(user=instance).values_list('key', flat=True)
+    forget_tokens(*keys)
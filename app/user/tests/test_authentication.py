@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.tests.utils import QueryBudgetMixin
+from user import authentication
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(QueryBudgetMixin, TestCase):
+    """Test authenticating with cached tokens."""
+
+    def setUp(self):
+        authentication.get_cache().clear()
+        authentication.reset_token_cache_stats()
+        self.user = get_user_model().objects.create_user(
+            email='token@gmail.com',
+            password='test123',
+            name='Token',
+            login='token'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_cached(self):
+        """Test the token owner is loaded once across requests."""
+        self.client.get(ME_URL)
+
+        res = self.assertQueryBudget(0, self.client.get, ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(authentication.token_cache_stats(), {
+            'hits': 1,
+            'misses': 1,
+            'hit_rate': 0.5,
+        })
+
+    def test_invalid_token_rejected(self):
+        """Test unknown tokens are still rejected."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token wrong')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_deletion_invalidates(self):
+        """Test a deleted token stops authenticating immediately."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_invalidates(self):
+        """Test deactivated users stop authenticating immediately."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_invalidates(self):
+        """Test updating the profile refreshes the cached user."""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'New Name', 'password': 'pw1234'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New Name')
+        self.assertEqual(authentication.token_cache_stats()['misses'], 2)
@@ -0,0 +1,150 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import HasherTuning
+from user import hashers, throttling
+
+TOKEN_URL = reverse('user:token')
+RATES = {
+    'ip': {'burst': 5, 'per_minute': 60},
+    'account': {'burst': 2, 'per_minute': 6},
+}
+
+
+@override_settings(LOGIN_THROTTLE_RATES=RATES)
+class LoginThrottleTests(TestCase):
+    """Test token requests are limited before passwords are hashed."""
+
+    def setUp(self):
+        throttling.reset_login_throttle()
+        hashers.reset_hash_stats()
+        self.client = APIClient()
+        get_user_model().objects.create_user(
+            'throttle@gmail.com',
+            'test123'
+        )
+
+    def login(self, email='throttle@gmail.com', password='wrong', **extra):
+        return self.client.post(
+            TOKEN_URL, {'email': email, 'password': password}, **extra
+        )
+
+    def test_account_limited_without_hashing(self):
+        """Test bad logins past the account burst are not hashed."""
+        for _ in range(2):
+            res = self.login()
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        hashes = hashers.hash_stats()['hashes']
+
+        res = self.login(email=' Throttle@gmail.com')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        self.assertEqual(hashers.hash_stats()['hashes'], hashes)
+        self.assertEqual(
+            throttling.login_throttle_stats()['rejected_account'], 1
+        )
+
+    def test_ip_limited_across_accounts(self):
+        """Test one client cannot spread attempts over many accounts."""
+        for index in range(5):
+            res = self.login(email=f'user{index}@gmail.com')
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.login(email='other@gmail.com')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.login(
+            email='other@gmail.com', REMOTE_ADDR='10.0.0.2'
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(throttling.login_throttle_stats()['rejected_ip'], 1)
+
+    def test_bucket_refills(self):
+        """Test attempts are allowed again as the bucket refills."""
+        now = 1000.0
+        with patch.object(throttling.time, 'time', lambda: now):
+            self.login()
+            self.login()
+            self.assertEqual(self.login().status_code, 429)
+
+            now += 10
+            res = self.login(password='test123')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(LOGIN_THROTTLE_CACHE_ALIAS='tokens')
+    def test_shared_cache_buckets(self):
+        """Test buckets can be kept in a cache shared by the servers."""
+        throttling.caches['tokens'].clear()
+        self.login()
+        self.login()
+
+        self.assertEqual(self.login().status_code, 429)
+        self.assertFalse(throttling._buckets)
+
+
+class HasherTuningTests(TestCase):
+    """Test password hashes follow the tuned iteration count."""
+
+    def setUp(self):
+        hashers.forget_tuning()
+        self.addCleanup(hashers.forget_tuning)
+        self.user = get_user_model().objects.create_user(
+            'tuning@gmail.com',
+            'test123'
+        )
+
+    def iterations(self):
+        self.user.refresh_from_db()
+        return int(self.user.password.split('$')[1])
+
+    def test_rehash_on_login(self):
+        """Test a successful login rehashes with the tuned count."""
+        HasherTuning.objects.create(
+            algorithm='pbkdf2_sha256', iterations=300000, hash_ms=80
+        )
+        hashers.forget_tuning()
+
+        res = APIClient().post(
+            TOKEN_URL, {'email': 'tuning@gmail.com', 'password': 'test123'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.iterations(), 300000)
+        self.assertTrue(self.user.check_password('test123'))
+
+    def test_tune_command_records_count(self):
+        """Test the tuning command records a count above the minimum."""
+        with patch(
+            'user.management.commands.tune_password_hasher.'
+            'measure_iterations',
+            return_value=300000
+        ):
+            call_command('tune_password_hasher', stdout=StringIO())
+
+        tuning = HasherTuning.objects.get(algorithm='pbkdf2_sha256')
+        self.assertEqual(tuning.iterations, 300000)
+        self.assertEqual(hashers.tuned_iterations('pbkdf2_sha256'), 300000)
+
+    def test_minimum_iterations(self):
+        """Test the tuned count never goes below Django's default."""
+        HasherTuning.objects.create(
+            algorithm='pbkdf2_sha256', iterations=1000, hash_ms=1
+        )
+        hashers.forget_tuning()
+        self.user.set_password('test123')
+        self.user.save()
+
+        self.assertEqual(
+            self.iterations(), PBKDF2PasswordHasher.iterations
+        )
@@ -5,6 +5,8 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from user.throttling import reset_login_throttle
+
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
 ME_URL = reverse('user:me')
@@ -18,6 +20,7 @@ class PublicUserApiTests(TestCase):
     """Test the users API (public)."""
 
     def setUp(self):
+        reset_login_throttle()
         self.client = APIClient()
 
     def test_create_valid_user_success(self):
@@ -0,0 +1,110 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.throttling import BaseThrottle
+
+# Buckets of this process, used unless LOGIN_THROTTLE_CACHE_ALIAS is set.
+MAX_LOCAL_BUCKETS = 10000
+_buckets = OrderedDict()
+_stats = {'attempts': 0, 'rejected_ip': 0, 'rejected_account': 0}
+_lock = threading.Lock()
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def login_throttle_stats():
+    """Return the token request counters of this process."""
+    with _lock:
+        return dict(_stats)
+
+
+def reset_login_throttle():
+    """Empty the local buckets and reset the counters."""
+    with _lock:
+        _buckets.clear()
+        for name in _stats:
+            _stats[name] = 0
+
+
+def _refill(state, now, burst, rate):
+    """Return the tokens of a bucket after refilling it until now."""
+    if state is None:
+        return burst
+
+    tokens, updated = state
+    return min(burst, tokens + (now - updated) * rate)
+
+
+def take(key, burst, per_minute):
+    """Take a token from a bucket, returning the seconds to wait or 0.
+
+    A shared cache is read and written without a lock, so concurrent
+    attempts on several servers may each get the last token. The limit
+    is only meant to keep bursts of bad logins from hashing.
+    """
+    rate = per_minute / 60
+    now = time.time()
+    alias = settings.LOGIN_THROTTLE_CACHE_ALIAS
+    if alias:
+        cache = caches[alias]
+        tokens = _refill(cache.get(key), now, burst, rate)
+        if tokens >= 1:
+            cache.set(key, (tokens - 1, now), int(burst / rate) + 1)
+            return 0
+        return (1 - tokens) / rate
+
+    with _lock:
+        tokens = _refill(_buckets.pop(key, None), now, burst, rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        _buckets[key] = (tokens, now)
+        while len(_buckets) > MAX_LOCAL_BUCKETS:
+            _buckets.popitem(last=False)
+
+    return 0 if allowed else (1 - tokens) / rate
+
+
+class LoginRateThrottle(BaseThrottle):
+    """Limit token requests per client IP and per account.
+
+    Attempts are counted before the password is hashed, using the
+    buckets configured in LOGIN_THROTTLE_RATES.
+    """
+
+    def get_idents(self, request):
+        """Return the (scope, ident) pairs the request is counted on."""
+        idents = [('ip', self.get_ident(request))]
+        email = request.data.get('email') \
+            if hasattr(request.data, 'get') else None
+        if isinstance(email, str) and email.strip():
+            idents.append(('account', email.strip().lower()))
+
+        return idents
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        _count('attempts')
+        for scope, ident in self.get_idents(request):
+            digest = hashlib.sha256(ident.encode()).hexdigest()
+            wait = take(
+                f'login-throttle:{scope}:{digest}',
+                **settings.LOGIN_THROTTLE_RATES[scope]
+            )
+            if wait:
+                _count(f'rejected_{scope}')
+                self.wait_seconds = wait
+                return False
+
+        return True
+
+    def wait(self):
+        return self.wait_seconds